@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: bench_decoder.py
+Description:
+    Measures receive decoder throughput in bytes per second, comparing:
+    legacy:    the former per-byte HAND_OnData string state machine (reference copy below)
+    per-byte:  HAND_OnData, which only runs the decoder once a frame can be complete
+    chunk:     HAND_OnBytes with one whole read per call, as the UART/CAN interfaces do
+
+    Usage: python3 benchmarks/bench_decoder.py [frame_count]
+"""
+
+import sys
+import time
+
+from ohand.constants import *
+from ohand.OHandSerialAPI import OHandSerialAPI
+
+ADDRESS_MASTER = 0x01
+ADDRESS_HAND = 0x02
+
+
+class LegacyDecoder:
+    """Copy of the per-byte decoder HAND_OnBytes replaced, kept for comparison only"""
+
+    def __init__(self, address_master):
+        self.address_master = address_master
+        self.packet_data = bytearray(MAX_PROTOCOL_DATA_SIZE + 5)
+        self.is_whole_packet = False
+        self.decode_state = "WAIT_ON_HEADER_0"
+        self.byte_count = 0
+
+    def HAND_OnData(self, data):
+        if self.is_whole_packet:
+            return
+
+        if self.decode_state == "WAIT_ON_HEADER_0":
+            if data == 0x55:
+                self.decode_state = "WAIT_ON_HEADER_1"
+        elif self.decode_state == "WAIT_ON_HEADER_1":
+            if data == 0xAA:
+                self.decode_state = "WAIT_ON_ADDRESSED_NODE_ID"
+            else:
+                self.decode_state = "WAIT_ON_HEADER_0"
+        elif self.decode_state == "WAIT_ON_ADDRESSED_NODE_ID":
+            self.packet_data[0] = data
+            self.decode_state = "WAIT_ON_OWN_NODE_ID"
+        elif self.decode_state == "WAIT_ON_OWN_NODE_ID":
+            self.packet_data[1] = data
+            self.decode_state = "WAIT_ON_COMMAND_ID"
+        elif self.decode_state == "WAIT_ON_COMMAND_ID":
+            self.packet_data[2] = data
+            self.decode_state = "WAIT_ON_BYTECOUNT"
+        elif self.decode_state == "WAIT_ON_BYTECOUNT":
+            self.packet_data[3] = data
+            self.byte_count = data
+            if self.byte_count > MAX_PROTOCOL_DATA_SIZE:
+                self.decode_state = "WAIT_ON_HEADER_0"
+            elif self.byte_count > 0:
+                self.decode_state = "WAIT_ON_DATA"
+            else:
+                self.decode_state = "WAIT_ON_LRC"
+        elif self.decode_state == "WAIT_ON_DATA":
+            index = 4 + self.packet_data[3] - self.byte_count
+            self.packet_data[index] = data
+            self.byte_count -= 1
+            if self.byte_count == 0:
+                self.decode_state = "WAIT_ON_LRC"
+        elif self.decode_state == "WAIT_ON_LRC":
+            index = 4 + self.packet_data[3]
+            self.packet_data[index] = data
+            if self.packet_data[0] == self.address_master:
+                self.is_whole_packet = True
+            self.decode_state = "WAIT_ON_HEADER_0"
+
+
+def make_frame(cmd, payload):
+    body = bytes([ADDRESS_MASTER, ADDRESS_HAND, cmd, len(payload)]) + payload
+    lrc = 0
+    for byte in body:
+        lrc ^= byte
+    return PROTOCOL_HEADER + body + bytes([lrc])
+
+
+def make_chunks(frame_count):
+    """One chunk per response, as read() returns them, cycling through typical payload sizes"""
+    frames = [
+        make_frame(HAND_CMD_GET_FINGER_POS_ALL, bytes(range(24))),
+        make_frame(HAND_CMD_GET_FINGER_POS, bytes(range(5))),
+        make_frame(HAND_CMD_SET_FINGER_POS_ALL, b""),
+        make_frame(HAND_CMD_SET_CUSTOM, bytes(range(48))),
+    ]
+    return [frames[i % len(frames)] for i in range(frame_count)]
+
+
+def run_legacy(chunks):
+    decoder = LegacyDecoder(ADDRESS_MASTER)
+    frames = 0
+    for chunk in chunks:
+        for byte in chunk:
+            decoder.HAND_OnData(byte)
+        if decoder.is_whole_packet:
+            decoder.is_whole_packet = False
+            frames += 1
+    return frames
+
+
+def run_per_byte(chunks):
+    api = OHandSerialAPI(None, HAND_PROTOCOL_UART, ADDRESS_MASTER, None)
+    for chunk in chunks:
+        for byte in chunk:
+            api.HAND_OnData(byte)
+    return api.get_rx_stats()["received"]
+
+
+def run_chunk(chunks):
+    api = OHandSerialAPI(None, HAND_PROTOCOL_UART, ADDRESS_MASTER, None)
+    for chunk in chunks:
+        api.HAND_OnBytes(chunk)
+    return api.get_rx_stats()["received"]
+
+
+def bench(name, func, chunks, total_bytes):
+    start = time.perf_counter()
+    frames = func(chunks)
+    elapsed = time.perf_counter() - start
+    print(f"{name:10s} {total_bytes / elapsed / 1e6:8.2f} MB/s  {frames / elapsed:12.0f} frames/s  ({frames} frames)")
+    return elapsed
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    chunks = make_chunks(frame_count)
+    total_bytes = sum(len(chunk) for chunk in chunks)
+
+    legacy = bench("legacy", run_legacy, chunks, total_bytes)
+    bench("per-byte", run_per_byte, chunks, total_bytes)
+    chunk = bench("chunk", run_chunk, chunks, total_bytes)
+    print(f"HAND_OnBytes speedup over legacy: {legacy / chunk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: bench_encoder.py
+Description:
+    Measures command encoding throughput in frames per second, comparing:
+    legacy:  the former HAND_SendCmd frame building with a per-byte LRC loop (reference copy below)
+    current: HAND_SendCmd with cached frames, per-command send buffers and the folded LRC
+    for payload-less GET commands, typical SET commands and large SET_CUSTOM payloads.
+    The transport discards the frames, only encoding is measured.
+
+    Usage: python3 benchmarks/bench_encoder.py [frame_count]
+"""
+
+import sys
+import time
+
+from ohand.constants import *
+from ohand.OHandSerialAPI import OHandSerialAPI
+
+ADDRESS_MASTER = 0x01
+ADDRESS_HAND = 0x02
+
+
+def send_data_impl(addr, data, length, context):
+    return 0
+
+
+class LegacyEncoder:
+    """Copy of the frame building HAND_SendCmd replaced, kept for comparison only"""
+
+    def __init__(self, address_master, send_data_impl):
+        self.address_master = address_master
+        self.send_data_impl = send_data_impl
+        self.private_data = None
+        self._get_milli_seconds_impl = time.monotonic
+        self._delay_milli_seconds_impl = time.sleep
+
+    def HAND_SendCmd(self, addr, cmd, data, nb_data):
+        if not self.send_data_impl:
+            return HAND_RESP_INVALID_CONTEXT
+
+        if not self._delay_milli_seconds_impl or not self._get_milli_seconds_impl:
+            return HAND_RESP_TIMER_FUNC_NOT_SET
+
+        if nb_data >= MAX_PROTOCOL_DATA_SIZE:
+            return HAND_RESP_DATA_SIZE_TOO_BIG
+
+        send_buf = bytearray(7 + nb_data)
+        send_buf[0] = 0x55
+        send_buf[1] = 0xAA
+        send_buf[2] = addr
+        send_buf[3] = self.address_master
+        send_buf[4] = cmd
+        send_buf[5] = nb_data
+
+        if data is not None:
+            send_buf[6 : 6 + nb_data] = data
+
+        lrc = 0
+        for i in range(2, 6 + nb_data):
+            lrc ^= send_buf[i]
+        send_buf[6 + nb_data] = lrc
+
+        if self.send_data_impl(addr, send_buf, len(send_buf), self.private_data) != 0:
+            return HAND_RESP_HAND_ERROR
+
+        return HAND_RESP_SUCCESS
+
+
+CASES = [
+    ("GET_FINGER_POS_ALL", HAND_CMD_GET_FINGER_POS_ALL, None, 0),
+    ("SET_FINGER_POS", HAND_CMD_SET_FINGER_POS, bytes(4), 4),
+    ("SET_FINGER_POS_ALL", HAND_CMD_SET_FINGER_POS_ALL, bytes(range(18)), 18),
+    ("SET_CUSTOM", HAND_CMD_SET_CUSTOM, bytes(range(37)), 37),
+]
+
+
+def run(encoder, cmd, data, nb_data, frame_count, repeat=5):
+    """Best time of repeat runs"""
+    send_cmd = encoder.HAND_SendCmd
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(frame_count):
+            send_cmd(ADDRESS_HAND, cmd, data, nb_data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    legacy = LegacyEncoder(ADDRESS_MASTER, send_data_impl)
+    current = OHandSerialAPI(None, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl)
+    current.HAND_SetTimerFunction(lambda: int(time.monotonic() * 1000), lambda ms: time.sleep(ms / 1000.0))
+
+    print(f"{'command':20s} {'legacy':>14s} {'current':>14s}  speedup")
+    for name, cmd, data, nb_data in CASES:
+        legacy_time = run(legacy, cmd, data, nb_data, frame_count)
+        current_time = run(current, cmd, data, nb_data, frame_count)
+        print(
+            f"{name:20s} {frame_count / legacy_time:10.0f} f/s {frame_count / current_time:10.0f} f/s"
+            f"  {legacy_time / current_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+End-to-end round trip benchmark of OHandSerialAPI against the simulated hand, see __main__.py
+"""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: benchmarks/roundtrip/__main__.py
+Description:
+    Drives OHandSerialAPI against the simulated hand of ohand.interface.sim and reports for each command family
+    (single finger getters, *_All getters and setters, HAND_SetCustom):
+    p50, p99 and max round trip latency, commands per second, CPU time per command and bytes on the wire.
+    CPU time is that of the whole process, simulated hand included.
+
+    With the default baud rate 0 the wire takes no time, latencies are those of the SDK and the simulated
+    hand only, which makes regressions of HAND_SendCmd, HAND_OnBytes and HAND_GetResponse visible.
+    Pass --baudrate 115200 to see what a real bus adds.
+
+    Usage: python3 -m benchmarks.roundtrip [--count N] [--json FILE] [--baseline FILE [--threshold 0.1]]
+    The exit status is 1 if a metric degraded beyond the threshold compared with the baseline, 2 if commands
+    failed.
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+
+from .suite import FAMILIES, TRANSPORTS, WAIT_MODES, compare, run_suite
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.roundtrip", description=__doc__.split("Usage")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--family", action="append", choices=list(FAMILIES), help="family to run, default all")
+    parser.add_argument("--count", type=int, default=2000, help="commands measured per family")
+    parser.add_argument("--warmup", type=int, default=200, help="commands issued before measuring")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="loopback",
+                        help="loopback: in process, pty: UART interface over a pseudo terminal")
+    parser.add_argument("--wait-mode", choices=WAIT_MODES, default="block",
+                        help="HAND_WAIT_POLL, HAND_WAIT_BLOCK or the reader thread")
+    parser.add_argument("--baudrate", type=int, default=0, help="emulated wire speed, 0 for no wire time")
+    parser.add_argument("--response-delay-ms", type=float, default=0.0, help="processing time of the hand")
+    parser.add_argument("--json", metavar="FILE", help="write the report as JSON to FILE, - for stdout")
+    parser.add_argument("--baseline", metavar="FILE", help="JSON report to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative degradation reported as regression, default 0.10")
+    return parser.parse_args(argv)
+
+
+def same_setup(a, b):
+    """Whether both configurations measure the same thing, the command counts may differ"""
+    keys = ("transport", "wait_mode", "baudrate", "response_delay_ms")
+    return all(a.get(key) == b.get(key) for key in keys)
+
+
+def print_report(report, out):
+    print(
+        f"{'family':12s} {'p50 us':>9s} {'p99 us':>9s} {'max us':>9s} {'cmds/s':>9s} {'cpu us':>8s}"
+        f" {'tx B':>6s} {'rx B':>6s} {'errors':>6s}",
+        file=out,
+    )
+    for family, r in report["results"].items():
+        print(
+            f"{family:12s} {r['p50_us']:9.1f} {r['p99_us']:9.1f} {r['max_us']:9.1f} {r['cmds_per_s']:9.0f}"
+            f" {r['cpu_us_per_cmd']:8.1f} {r['tx_bytes_per_cmd']:6.1f} {r['rx_bytes_per_cmd']:6.1f}"
+            f" {r['errors']:6d}",
+            file=out,
+        )
+
+
+def print_comparison(rows, threshold, out):
+    print(f"\n{'family':12s} {'metric':15s} {'baseline':>10s} {'current':>10s} {'better':>8s}", file=out)
+    for family, metric, old, new, change in rows:
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{family:12s} {metric:15s} {old:10.1f} {new:10.1f} {-change:+8.1%}{flag}", file=out)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Keep stdout clean for the JSON report
+    out = sys.stderr if args.json == "-" else sys.stdout
+    with contextlib.redirect_stdout(out):
+        report = run_suite(
+            args.family, args.count, args.warmup, args.transport, args.wait_mode, args.baudrate,
+            args.response_delay_ms,
+        )
+    print_report(report, out)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not same_setup(baseline["config"], report["config"]):
+            print("\nWarning: baseline was recorded with a different configuration", file=out)
+        rows = compare(report, baseline, args.threshold)
+        print_comparison(rows, args.threshold, out)
+        if any(change > args.threshold for *_, change in rows):
+            status = 1
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if any(r["errors"] for r in report["results"].values()):
+        status = 2
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
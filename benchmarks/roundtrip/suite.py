@@ -0,0 +1,212 @@
+"""
+Command families, measurement and baseline comparison of the round trip benchmark
+"""
+
+import platform
+import sys
+import time
+
+from ohand.constants import *
+from ohand.custom import encode_custom
+from ohand.interface.sim import SimHand, Sim_Init, Sim_InitPty
+from ohand.interface.sim import delay_milli_seconds_impl, get_milli_seconds_impl
+from ohand.interface.sim import recv_data_impl as sim_recv_data_impl
+from ohand.interface.sim import send_data_impl as sim_send_data_impl
+from ohand.OHandSerialAPI import OHandSerialAPI
+
+ADDRESS_MASTER = 0x01
+ADDRESS_HAND = 0x02
+NUM_MOTORS = 6
+
+WAIT_MODES = ("poll", "block", "reader")
+TRANSPORTS = ("loopback", "pty")
+
+# Metrics compared against the baseline: name -> True if higher is better
+GATED_METRICS = {
+    "p50_us": False,
+    "p99_us": False,
+    "cmds_per_s": True,
+    "cpu_us_per_cmd": False,
+}
+
+
+def _finger_get(api):
+    target, current = [0], [0]
+    calls = [
+        lambda finger_id: api.HAND_GetFingerPos(ADDRESS_HAND, finger_id, target, current, [])[0],
+        lambda finger_id: api.HAND_GetFingerAngle(ADDRESS_HAND, finger_id, target, current, [])[0],
+        lambda finger_id: api.HAND_GetFingerCurrent(ADDRESS_HAND, finger_id, current, [])[0],
+    ]
+    return lambda i: calls[i % len(calls)](i // len(calls) % NUM_MOTORS)
+
+
+def _all_get(api):
+    target, current, motor_cnt = [0] * NUM_MOTORS, [0] * NUM_MOTORS, [NUM_MOTORS]
+    calls = [
+        lambda: api.HAND_GetFingerPosAll(ADDRESS_HAND, target, current, motor_cnt, [])[0],
+        lambda: api.HAND_GetFingerAngleAll(ADDRESS_HAND, target, current, motor_cnt, [])[0],
+    ]
+    return lambda i: calls[i % len(calls)]()
+
+
+def _all_set(api):
+    speed = [255] * NUM_MOTORS
+    poses = [[0] * NUM_MOTORS, [65535] * NUM_MOTORS]
+    angles = [[0] * NUM_MOTORS, [9000] * NUM_MOTORS]
+    calls = [
+        lambda i: api.HAND_SetFingerPosAll(ADDRESS_HAND, poses[i >> 1 & 1], speed, NUM_MOTORS, []),
+        lambda i: api.HAND_SetFingerAngleAll(ADDRESS_HAND, angles[i >> 1 & 1], speed, NUM_MOTORS, []),
+    ]
+    return lambda i: calls[i % len(calls)](i)
+
+
+def _set_custom(api):
+    # Speed and position of each motor, position read back: the request of the glove teleoperation loop
+    requests = [
+        encode_custom(speed=[65535] * NUM_MOTORS, pos=[pos] * NUM_MOTORS, get=SUB_CMD_GET_POS)
+        for pos in (0, 65535)
+    ]
+    buf = bytearray(MAX_PROTOCOL_DATA_SIZE)
+
+    def call(i):
+        data = requests[i & 1]
+        buf[: len(data)] = data
+        return api.HAND_SetCustom(ADDRESS_HAND, buf, len(data), [])
+
+    return call
+
+
+# Family name -> factory returning call(i) -> error code
+FAMILIES = {
+    "finger_get": _finger_get,
+    "all_get": _all_get,
+    "all_set": _all_set,
+    "set_custom": _set_custom,
+}
+
+
+def _percentile(samples, q):
+    # samples sorted, nearest rank
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def open_api(transport="loopback", wait_mode="block", baudrate=0, response_delay_ms=0.0):
+    """Return (api, port, close) with a simulated hand, port counts the bytes on the wire"""
+    hands = [SimHand(ADDRESS_HAND, NUM_MOTORS)]
+
+    if transport == "pty":
+        from ohand.interface.uart import Serial_Init
+        from ohand.interface.uart import recv_data_impl, send_data_impl
+
+        pty = Sim_InitPty(hands, baudrate, response_delay_ms)
+        port, context = pty.port, Serial_Init(pty.name, 115200)
+
+        def close():
+            context.close()
+            pty.stop()
+
+    else:
+        send_data_impl, recv_data_impl = sim_send_data_impl, sim_recv_data_impl
+        port = context = Sim_Init(hands, baudrate, response_delay_ms)
+
+        def close():
+            pass
+
+    api = OHandSerialAPI(context, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl, recv_data_impl)
+    api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+    api.HAND_SetCommandTimeOut(1000)
+    api.HAND_SetWaitMode(HAND_WAIT_POLL if wait_mode == "poll" else HAND_WAIT_BLOCK)
+    if wait_mode == "reader":
+        api.HAND_StartReader()
+
+        def close(close=close):
+            api.HAND_StopReader()
+            close()
+
+    return api, port, close
+
+
+def run_family(api, port, family, count, warmup):
+    """Issue count commands of family one after the other, return its metrics"""
+    call = FAMILIES[family](api)
+    for i in range(warmup):
+        call(i)
+
+    latencies = [0] * count
+    errors = 0
+    perf_counter_ns = time.perf_counter_ns
+    bytes_sent, bytes_received = port.bytes_sent, port.bytes_received
+    cpu_start = time.process_time_ns()
+    start = perf_counter_ns()
+    for i in range(count):
+        t0 = perf_counter_ns()
+        err = call(i)
+        latencies[i] = perf_counter_ns() - t0
+        if err != HAND_RESP_SUCCESS:
+            errors += 1
+    elapsed = perf_counter_ns() - start
+    cpu = time.process_time_ns() - cpu_start
+
+    latencies.sort()
+    return {
+        "count": count,
+        "errors": errors,
+        "p50_us": _percentile(latencies, 0.50) / 1000,
+        "p99_us": _percentile(latencies, 0.99) / 1000,
+        "max_us": latencies[-1] / 1000,
+        "cmds_per_s": count * 1e9 / elapsed,
+        "cpu_us_per_cmd": cpu / count / 1000,
+        "tx_bytes_per_cmd": (port.bytes_sent - bytes_sent) / count,
+        "rx_bytes_per_cmd": (port.bytes_received - bytes_received) / count,
+    }
+
+
+def run_suite(families=None, count=2000, warmup=200, transport="loopback", wait_mode="block", baudrate=0,
+              response_delay_ms=0.0):
+    """Run families (default all) on a fresh simulated hand each, return the JSON report"""
+    config = {
+        "count": count,
+        "warmup": warmup,
+        "transport": transport,
+        "wait_mode": wait_mode,
+        "baudrate": baudrate,
+        "response_delay_ms": response_delay_ms,
+    }
+    results = {}
+    for family in families or FAMILIES:
+        api, port, close = open_api(transport, wait_mode, baudrate, response_delay_ms)
+        try:
+            results[family] = run_family(api, port, family, count, warmup)
+        finally:
+            close()
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "config": config,
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare GATED_METRICS of report with baseline, return [(family, metric, baseline, current, change)],
+    change being the relative degradation, those beyond threshold are regressions.
+    Families missing in either report are skipped.
+    """
+    rows = []
+    for family, current in report["results"].items():
+        previous = baseline["results"].get(family)
+        if previous is None:
+            continue
+        for metric, higher_is_better in GATED_METRICS.items():
+            old, new = previous.get(metric), current[metric]
+            if not old:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            rows.append((family, metric, old, new, change))
+    return rows
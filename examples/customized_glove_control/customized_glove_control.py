@@ -2,8 +2,11 @@ from serial.tools import list_ports
 import asyncio
 import signal
 
-from ohand.OHandSerialAPI import *
+import numpy as np
+
+from ohand.AsyncOHandSerialAPI import AsyncOHandSerialAPI
 from ohand.constants import *
+from ohand.setpoint import OHandSetpointFilter
 from pos_input_ble_glove import PosInputBleGlove as PosInput
 
 PORT_UART = 0
@@ -27,9 +30,8 @@ NUM_FINGERS = 5
 NUM_MOTORS = 6
 THUMB_ROOT_ID = 5
 POS_THRESHOLD = 4096
-
-def clamp(n, smallest, largest):
-    return max(smallest, min(n, largest))
+DEADBAND = 256  # Glove noise, targets closer than this to the last sent ones are not sent
+KEEP_ALIVE_MS = 200  # Send the targets at least this often while the glove is still
 
 def interpolate(n, from_min, from_max, to_min, to_max):
     return (n - from_min) / (from_max - from_min) * (to_max - to_min) + to_min
@@ -55,107 +57,6 @@ class Application:
                 return port.device
         return None
 
-    def set_custom(self, instance, hand_id, speed=None, position=None, angle=None, get_flag=0x00):
-            data_flag = get_flag
-            data = bytearray(1)
-
-            if speed is not None:
-                data_flag |= SUB_CMD_SET_SPEED
-                for i in range(len(speed)):
-                    value = int(speed[i])
-                    value = clamp(value, 0, 65535)
-                    data.append(value & 0xFF)
-                    data.append((value >> 8) & 0xFF)
-
-            if position is not None:
-                data_flag |= SUB_CMD_SET_POS
-                for i in range(len(position)):
-                    value = int(position[i])
-                    value = clamp(value, 0, 65535)
-                    data.append(value & 0xFF)
-                    data.append((value >> 8) & 0xFF)
-
-            if angle is not None:
-                data_flag |= SUB_CMD_SET_ANGLE
-                for i in range(len(angle)):
-                    value = int(angle[i] * 100)  # scale
-                    if value < 0:
-                        value += 65536
-                    value = clamp(value, 0, 65535)
-                    data.append(value & 0xFF)
-                    data.append((value >> 8) & 0xFF)
-
-            data[0] = data_flag
-
-            err = instance.HAND_SetCustom(hand_id, data, len(data), [])
-            if err != HAND_RESP_SUCCESS:
-                return (err, None, None, None, None, None)
-
-            # Parse data
-            position = None
-            angle = None
-            current = None
-            force = None
-            status = None
-
-            motor_cnt = 0
-            data_entry = 0
-            data_len = len(data)
-            # print(f"data_len: {data_len}")
-
-            if (data_flag & SUB_CMD_GET_POS): data_entry += 2
-            if (data_flag & SUB_CMD_GET_ANGLE): data_entry += 2
-            if (data_flag & SUB_CMD_GET_CURRENT): data_entry += 2
-            if (data_flag & SUB_CMD_GET_FORCE): data_entry += 2
-            if (data_flag & SUB_CMD_GET_STATUS): data_entry += 1
-
-            if data_entry != 0:
-                motor_cnt = int(data_len / data_entry)
-
-            if motor_cnt * data_entry != data_len:
-                return (HAND_RESP_DATA_INVALID, None, None, None, None, None)
-
-            # print(f"motor_cnt: {motor_cnt}")
-            offset = 0
-
-            if (data_flag & SUB_CMD_GET_POS):
-                position = []
-                for i in range(motor_cnt):
-                    value = data[offset] | (data[offset + 1] << 8)
-                    position.append(float(value))
-                    offset += 2
-
-            if (data_flag & SUB_CMD_GET_ANGLE):
-                angle = []
-                for i in range(motor_cnt):
-                    value = data[offset] | (data[offset + 1] << 8)
-                    angle.append(float(value))
-                    offset += 2
-
-            if (data_flag & SUB_CMD_GET_CURRENT):
-                current = []
-                for i in range(motor_cnt):
-                    value = data[offset] | (data[offset + 1] << 8)
-                    current.append(float(value))
-                    offset += 2
-
-            if (data_flag & SUB_CMD_GET_FORCE):
-                force = []
-                for i in range(motor_cnt):
-                    value = data[offset] | (data[offset + 1] << 8)
-                    force.append(float(value))
-                    offset += 2
-
-            if (data_flag & SUB_CMD_GET_STATUS):
-                status = []
-                for i in range(motor_cnt):
-                    value = data[offset]
-                    status.append(int(value))
-                    offset += 1
-
-            return (err, position, angle, current, force, status)
-
-
     async def main(self):
         interface_instance = None
         ohand_instance = None
@@ -169,14 +70,17 @@ class Application:
             print("Port init failed\n")
             return
 
-        ohand_instance = OHandSerialAPI(interface_instance, HAND_PROTOCOL_UART, ADDRESS_MASTER,
+        # Hand I/O runs on the event loop, it doesn't block BLE notifications of the glove
+        ohand_instance = AsyncOHandSerialAPI(interface_instance, HAND_PROTOCOL_UART, ADDRESS_MASTER,
                                                send_data_impl, recv_data_impl)
 
         ohand_instance.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
         ohand_instance.HAND_SetCommandTimeOut(255)
+        ohand_instance.HAND_StartReader()
         print(ohand_instance.get_private_data(), "\n")
 
-        speed = [65535 for _ in range(NUM_MOTORS)]
+        speed = np.full(NUM_MOTORS, 65535, dtype=np.uint16)
+        setpoint_filter = OHandSetpointFilter(NUM_MOTORS, deadband=DEADBAND, keep_alive_ms=KEEP_ALIVE_MS)
             
         pos_input = PosInput()
         await pos_input.start()
@@ -184,22 +88,24 @@ class Application:
         while not self.terminated:
             # Data from motion capture
             finger_data = await pos_input.get_position()
+            if not setpoint_filter.check(finger_data):
+                continue  # Within the deadband of the targets the hand already has
 
             # Send to OHand and read
-            err, position, angle, current, force, status = self.set_custom(ohand_instance,
-                ADDRESS_HAND, speed=speed, position=finger_data, angle= None, get_flag= SUB_CMD_GET_POS
-            )
+            err, result = await ohand_instance.set_custom(ADDRESS_HAND, speed=speed, pos=finger_data, get=SUB_CMD_GET_POS)
 
             if err != HAND_RESP_SUCCESS:    
-                print(f"HAND_SetCustom returned error: {err}")
+                print(f"set_custom returned error: {err}")
             else:
-                for i in range(NUM_MOTORS):
-                    pos_err = abs(finger_data[i] - position[i])
-                    if pos_err < POS_THRESHOLD:
-                        speed[i] = interpolate(pos_err, 0, POS_THRESHOLD, 0, 65535)
-                    else:
-                        speed[i] = 65535
+                setpoint_filter.sent(range(NUM_MOTORS), finger_data)
+
+                # Slow down fingers close to their target
+                pos_err = np.abs(np.asarray(finger_data, dtype=np.int32) - result["pos"])
+                speed = np.where(pos_err < POS_THRESHOLD, interpolate(pos_err, 0, POS_THRESHOLD, 0, 65535), 65535)
+                speed = np.rint(speed).astype(np.uint16)
 
+        print(setpoint_filter.get_stats())
+        ohand_instance.HAND_StopReader()
         await pos_input.stop()
 
 
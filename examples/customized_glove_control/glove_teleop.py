@@ -0,0 +1,96 @@
+from serial.tools import list_ports
+import asyncio
+import signal
+
+from ohand.OHandSerialAPI import OHandSerialAPI
+from ohand.constants import *
+from ohand.teleop import OHandTeleop
+from pos_input_ble_glove import PosInputBleGlove as PosInput
+
+PORT_UART = 0
+PORT_CAN = 1
+
+# Modify PORT_TYPE to select the communication port
+PORT_TYPE = PORT_UART
+
+if PORT_TYPE == PORT_UART:
+    from ohand.interface.uart import *
+else:
+    from ohand.interface.can import *
+
+ADDRESS_MASTER = 0x01
+
+# Modify ADDRESS_HAND to select the hand ID
+ADDRESS_HAND = 0x02
+
+OUTPUT_RATE_HZ = 50  # Hand command rate, independent of the rate of the glove
+DEADBAND = 256  # Glove noise, targets closer than this to the last sent ones are not sent
+KEEP_ALIVE_MS = 200  # Send the targets at least this often while the glove is still
+
+
+class Application:
+    def __init__(self):
+        signal.signal(signal.SIGINT, lambda signal, frame: self._signal_handler())
+        self.terminated = False
+
+    def _signal_handler(self):
+        print("You pressed ctrl-c, exit")
+        self.terminated = True
+
+    def find_comport(self, port_name):
+        """
+        Find available serial port automatically
+        :param port_name: Characterization of the port description, such as "CH340"
+        :return: Comport of device if successful, None otherwise
+        """
+        ports = list_ports.comports()
+        for port in ports:
+            if port_name in port.description:
+                return port.device
+        return None
+
+    async def main(self):
+        if PORT_TYPE == PORT_UART:
+            interface_instance = Serial_Init(port_name=self.find_comport("CH340") or self.find_comport("Serial"), baudrate=115200)
+        else:
+            interface_instance = CAN_Init(port_name="1", baudrate=1000000)
+
+        if interface_instance is None:
+            print("Port init failed\n")
+            return
+
+        # Hand I/O runs in the reader and output threads, the event loop only receives the glove
+        ohand_instance = OHandSerialAPI(interface_instance, HAND_PROTOCOL_UART, ADDRESS_MASTER,
+                                        send_data_impl, recv_data_impl)
+
+        ohand_instance.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+        ohand_instance.HAND_SetCommandTimeOut(255)
+        ohand_instance.HAND_StartReader()
+        print(ohand_instance.get_private_data(), "\n")
+
+        pos_input = PosInput()
+        if not await pos_input.start():
+            print("Calibration failed, open and close the hand several times")
+
+        teleop = OHandTeleop(ohand_instance, ADDRESS_HAND, pos_input.channels, rate_hz=OUTPUT_RATE_HZ,
+                             emg_min=pos_input.emg_min, emg_max=pos_input.emg_max, deadband=DEADBAND,
+                             keep_alive_ms=KEEP_ALIVE_MS)
+        teleop.start()
+
+        while not self.terminated:
+            # Every batch of the glove, stamped when its notification arrived
+            batch, stamp_ns = await pos_input.get_batch()
+            teleop.push(batch, stamp_ns)
+
+        teleop.stop()
+        stats = teleop.get_stats()
+        print("Batches: {0}, frames: {1}, glove to hand ack latency: {2}".format(
+            stats["batches"], stats["output"]["frames"], stats["output"]["latency"]))
+
+        ohand_instance.HAND_StopReader()
+        await pos_input.stop()
+
+
+if __name__ == '__main__':
+    app = Application()
+    asyncio.run(app.main())
\ No newline at end of file
@@ -1,5 +1,6 @@
 import asyncio
 import struct
+import time
 from asyncio import Queue
 from contextlib import suppress
 from dataclasses import dataclass
@@ -259,7 +260,8 @@ class GForce:
             self._on_cmd_response,
         )
 
-    def _on_data_response(self, q: Queue, bs: bytearray):
+    def _on_data_response(self, q: Queue, bs: bytearray, timestamped: bool = False):
+        stamp = time.perf_counter_ns()
         bs = bytes(bs)
         full_packet = []
 
@@ -327,7 +329,7 @@ class GForce:
                     f"Unknown data type {data_type}, full packet: {full_packet}"
                 )
 
-        q.put_nowait(data)
+        q.put_nowait((data, stamp) if timestamped else data)
 
     def _convert_emg_to_raw(self, data: bytes) -> np.ndarray[np.integer]:
         match self.resolution:
@@ -670,11 +672,12 @@ class GForce:
             )
         )
 
-    async def start_streaming(self) -> Queue:
+    async def start_streaming(self, timestamped: bool = False) -> Queue:
+        # timestamped: queue (data, time.perf_counter_ns() of the notification) instead of data
         q = Queue()
         await self.client.start_notify(
             DATA_NOTIFY_CHAR_UUID,
-            lambda _, data: self._on_data_response(q, data),
+            lambda _, data: self._on_data_response(q, data, timestamped),
         )
         return q
 
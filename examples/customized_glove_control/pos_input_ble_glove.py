@@ -62,12 +62,13 @@ class PosInputBleGlove:
         print("电池电量: {0}%\nDevice baterry level: {0}%".format(baterry_level))
 
         await self._gforce_device.set_subscription(gforce.DataSubscription.EMG_RAW)
-        self._q = await self._gforce_device.start_streaming()
+        # Batches stamped when their notification arrives, for the latency from glove to hand
+        self._q = await self._gforce_device.start_streaming(timestamped=True)
 
         print("校正模式，请执行握拳和张开动作若干次\nCalibrating mode, please perform a fist and open action several times")
 
         for _ in range(256):
-            v = await self._q.get()
+            v, _ = await self._q.get()
             # print(v)
 
             emg_sum = [0 for _ in range(NUM_FINGERS)]
@@ -92,15 +93,24 @@ class PosInputBleGlove:
 
         return range_valid
 
-    async def get_position(self):
-        while True:
-            v = await self._q.get()
-            if self._q.empty():
-                break
+    @property
+    def channels(self):
+        """EMG channel of each finger"""
+        return INDEX_CHANNELS
 
-        # print(v)
+    @property
+    def emg_min(self):
+        return list(self._emg_min)
 
-        finger_data = [0 for _ in range(NUM_FINGERS)]
+    @property
+    def emg_max(self):
+        return list(self._emg_max)
+
+    async def get_batch(self):
+        """Return the next EMG batch (samples x channels) and time.perf_counter_ns() of its notification"""
+        return await self._q.get()
+
+    def _filter(self, v):
         emg_sum = [0 for _ in range(NUM_FINGERS)]
 
         for j in range(len(v)):
@@ -110,6 +120,17 @@ class PosInputBleGlove:
         for i in range(NUM_FINGERS):
             self._emg_data[i] = (self._emg_data[i] * 3 + emg_sum[i] / len(v)) / 4
 
+    async def get_position(self):
+        # Every batch received since the last call goes through the filter, the position is that of the newest
+        v, _ = await self._q.get()
+        self._filter(v)
+        while not self._q.empty():
+            v, _ = self._q.get_nowait()
+            self._filter(v)
+
+        finger_data = [0 for _ in range(NUM_FINGERS)]
+
+        for i in range(NUM_FINGERS):
             finger_data[i] = round(self.interpolate(self._emg_data[i], self._emg_min[i], self._emg_max[i], 65535, 0))
             finger_data[i] = self.clamp(finger_data[i], 0, 65535)
 
@@ -4,7 +4,8 @@ VERSION = "25.12.16"
 
 INSTALL_REQUIRES = [
     "pyserial==3.5",
-    "python-can==4.5.0"
+    "python-can==4.5.0",
+    "numpy"
 ]
 
 setup(
@@ -0,0 +1,193 @@
+import asyncio
+import concurrent.futures
+import functools
+
+from .constants import *
+from .OHandSerialAPI import OHandSerialAPI
+
+__all__ = [
+    'AsyncOHandSerialAPI',
+]
+
+# Methods which do not wait for the hand, inherited unchanged from OHandSerialAPI
+_LOCAL_METHODS = {
+    'HAND_ProtocolLRC',
+    'HAND_SendCmd',
+    'HAND_SendRequest',
+    'HAND_GetResponse',
+    'HAND_SetTimerFunction',
+    'HAND_GetTick',
+    'HAND_SetCommandTimeOut',
+    'HAND_SetWaitMode',
+    'HAND_OnData',
+    'HAND_OnBytes',
+    'HAND_StartReader',
+    'HAND_StopReader',
+}
+
+
+class _ResponsePending(Exception):
+    """Raised by HAND_GetResponse in the first pass of an async command"""
+
+
+class _AsyncRequest:
+    __slots__ = ("hand_id", "cmd", "future")
+
+    def __init__(self, hand_id, cmd, future):
+        self.hand_id = hand_id
+        self.cmd = cmd
+        self.future = future
+
+    def _complete(self, frame, tick):
+        if not self.future.done():
+            self.future.set_result(frame)
+
+
+class AsyncOHandSerialAPI(OHandSerialAPI):
+    """
+    asyncio counterpart of OHandSerialAPI, every HAND_* command and set_custom() is a coroutine with the same
+    arguments and results.
+
+    Responses are received through loop.add_reader() on the serial port or socketcan socket, so hand I/O shares
+    the event loop with other I/O. recv_data_impl must accept the time_out argument, see HAND_SetWaitMode().
+
+    A command runs the synchronous implementation in two passes: the first one sends the request and stops at
+    HAND_GetResponse, the second one decodes the awaited response. Neither pass blocks, but the body of the
+    method, argument packing included, runs twice per command.
+
+    Transports without a file descriptor (e.g. PCAN) or received by an OHandMux can't be watched by the event
+    loop, commands then run the synchronous implementation one at a time in a worker thread.
+    """
+
+    def __init__(self, private_data, protocol, address_master, send_data_impl, recv_data_impl=None):
+        super().__init__(private_data, protocol, address_master, send_data_impl, recv_data_impl)
+        self._loop = None
+        self._fd = None  # File descriptor watched by the event loop
+        self._no_fd = False  # The transport has no file descriptor, commands run in the executor
+        self._executor = None  # Single worker thread of commands on transports the event loop can't watch
+        self._capturing = False  # First pass of a command
+        self._request = None  # Request sent in the first pass
+        self._replaying = False  # Second pass of a command
+        self._replay_frame = None  # Response decoded in the second pass, None on timeout
+
+    def HAND_StartReader(self):
+        """Watch the transport with loop.add_reader(), call from within the running event loop"""
+        if not self.recv_data_impl or self._rx_driver is not None or self._no_fd:
+            return HAND_RESP_INVALID_CONTEXT
+
+        if self._fd is None:
+            try:
+                fd = self.private_data.fileno()
+            except Exception as e:
+                print(f"Transport has no file descriptor, commands run in the executor: {e}")
+                self._no_fd = True
+                return HAND_RESP_INVALID_CONTEXT
+            self._loop = asyncio.get_running_loop()
+            self._loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+
+        return HAND_RESP_SUCCESS
+
+    def HAND_StopReader(self):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+
+    def _set_rx_driver(self, driver):
+        if driver is not None and self._fd is not None:
+            return HAND_RESP_INVALID_CONTEXT  # The event loop receives
+        return super()._set_rx_driver(driver)
+
+    def _on_readable(self):
+        # Reads what is buffered, recv_data_impl must not block with time_out=0
+        self.recv_data_impl(self.private_data, self, 0)
+
+    def _poll_transport(self, time_out):
+        if self._fd is not None:
+            return False  # The event loop receives
+        return super()._poll_transport(time_out)
+
+    def HAND_SendCmd(self, addr, cmd, data, nb_data):
+        if self._replaying:
+            return HAND_RESP_SUCCESS  # Sent in the first pass
+
+        if not self._capturing:
+            return super().HAND_SendCmd(addr, cmd, data, nb_data)
+
+        request = _AsyncRequest(addr, cmd, self._loop.create_future())
+        err = self._send_request(request, data, nb_data)
+        if err == HAND_RESP_SUCCESS:
+            self._request = request
+        return err
+
+    def HAND_GetResponse(self, addr, cmd, time_out, resp_bytes, remote_err):
+        if self._replaying:
+            if self._replay_frame is None:
+                err = HAND_RESP_TIMEOUT
+            else:
+                err = self._parse_response(self._replay_frame, resp_bytes, remote_err)
+            if self._timing:
+                self._record_result(addr, cmd, err)
+            return err
+
+        if self._capturing and self._request is not None:
+            request, self._request = self._request, None
+            raise _ResponsePending(request, time_out)
+
+        return super().HAND_GetResponse(addr, cmd, time_out, resp_bytes, remote_err)
+
+    async def _run_command(self, method, args, kwargs):
+        if self._fd is None and self.HAND_StartReader() != HAND_RESP_SUCCESS:
+            # Nothing the event loop can watch, wait for the response in a worker thread instead. One thread, the
+            # synchronous implementation receives in the calling thread and must not run concurrently
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="OHandAsync")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, self, *args, **kwargs))
+
+        self._capturing = True
+        try:
+            result = method(self, *args, **kwargs)
+        except _ResponsePending as pending:
+            request, time_out = pending.args
+            sent_ns = getattr(self._tls, "sent_ns", None)  # Other commands send while this one waits
+        else:
+            return result  # Finished without waiting, e.g. invalid arguments or send failure
+        finally:
+            self._capturing = False
+            self._request = None
+
+        frame = None
+        try:
+            frame = await asyncio.wait_for(request.future, time_out / 1000.0)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if frame is None:
+                # Timed out or cancelled, a late answer must not complete it
+                with self._rx_lock:
+                    self._cancel_request(request)
+
+        self._replaying = True
+        self._replay_frame = frame
+        self._tls.sent_ns = sent_ns
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._replaying = False
+            self._replay_frame = None
+
+
+def _async_command(method):
+    @functools.wraps(method)
+    async def command(self, *args, **kwargs):
+        return await self._run_command(method, args, kwargs)
+
+    return command
+
+
+for _name in dir(OHandSerialAPI):
+    if _name.startswith("HAND_") and _name not in _LOCAL_METHODS:
+        setattr(AsyncOHandSerialAPI, _name, _async_command(getattr(OHandSerialAPI, _name)))
+
+AsyncOHandSerialAPI.set_custom = _async_command(OHandSerialAPI.set_custom)
@@ -1,7 +1,15 @@
 import struct
+import threading
 import time
+from collections import deque
 
+from .cache import OHandCache
+from .codec import HAND_CMD_CODECS
 from .constants import *
+from .custom import decode_custom, encode_custom
+from .request import OHandRequest
+from .stats import OHandStats
+from .timeouts import OHandTimeouts
 
 __all__ = [
     'OHandSerialAPI',
@@ -21,14 +29,32 @@ def match_data_type(data, type):
         return False
 
 
-def match_list_type(data, type):
-    if isinstance(data, list):
-        for item in data:
-            if not match_data_type(item, type):
-                return False
-        return True
-    else:
-        return False
+# Right shifts folding a payload of n bytes onto its lowest byte, see _lrc()
+_LRC_SHIFTS = []
+for _n in range(MAX_PROTOCOL_DATA_SIZE + 8):
+    _shift = 8
+    while _shift < 8 * _n:
+        _shift <<= 1
+    _LRC_SHIFTS.append(tuple(1 << _i for _i in range(_shift.bit_length() - 2, 2, -1)))
+
+
+_LRC_BYTES = [bytes((_i,)) for _i in range(256)]
+
+
+def _lrc(data):
+    """XOR of all bytes of data"""
+    if len(data) < 24:
+        # Looping is cheaper for short data
+        lrc = 0
+        for byte in data:
+            lrc ^= byte
+        return lrc
+
+    # Fold halves onto each other as one big integer, the lowest byte ends up as the XOR of all bytes
+    value = int.from_bytes(data, "little")
+    for shift in _LRC_SHIFTS[len(data)]:
+        value ^= value >> shift
+    return value & 0xFF
 
 
 class OHandSerialAPI:
@@ -39,29 +65,83 @@ class OHandSerialAPI:
         self.send_data_impl = send_data_impl
         self.recv_data_impl = recv_data_impl
         self.timeout = 255  # Default timeout in ms
+        self._wait_mode = HAND_WAIT_POLL
         self._get_milli_seconds_impl = None
         self._delay_milli_seconds_impl = None
-        self.packet_data = bytearray(MAX_PROTOCOL_DATA_SIZE + 5)
-        self.is_whole_packet = False
-        self.decode_state = self._initial_state()
-        self.byte_count = 0
-
-    def _initial_state(self):
-        if self.protocol == HAND_PROTOCOL_UART:
-            return "WAIT_ON_HEADER_0"
-        elif self.protocol == HAND_PROTOCOL_I2C:
-            return "WAIT_ON_ADDRESSED_NODE_ID"
+        self._rx_frames = deque()  # Decoded frames as (arrival tick, frame), oldest first
+        self._rx_frame_cnt = 0  # Frames decoded and queued
+        self._rx_overflow_cnt = 0  # Frames evicted from a full queue
+        self._rx_drop_cnt = 0  # Frames discarded as stale or unclaimed
+        self._rx_resync_cnt = 0  # Times the decoder skipped bytes to find the next frame
+        self._rx_skip_cnt = 0  # Bytes skipped to resynchronize
+        self._rx_lock = threading.Lock()  # Guards the frame queue
+        self._rx_cond = threading.Condition(self._rx_lock)  # Notified on queued frames
+        self._rx_waiters = 0  # Threads waiting on _rx_cond
+        self._pending = {}  # Requests waiting for a response, {(hand_id, cmd): deque of OHandRequest}
+        self._tls = threading.local()  # Request of the HAND_SendCmd -> HAND_GetResponse pair per thread
+        self._tx_lock = threading.Lock()  # Serializes writes to the transport
+        self._tx_frames = {}  # Complete frames of commands without data, {(addr, cmd): bytes}
+        self._tx_headers = {}  # Frame headers and their LRC, {(addr, cmd, nb_data): (bytes, lrc)}
+        self._cache = None  # OHandCache of static device information, see enable_cache()
+        self._stats = None  # OHandStats, see enable_stats()
+        self._timeouts = None  # OHandTimeouts, see enable_adaptive_timeout()
+        self._timing = False  # Whether requests are timed for _stats or _timeouts
+        self._reader = None  # Thread owning recv_data_impl, see HAND_StartReader()
+        self._rx_driver = None  # Owner driving recv_data_impl from outside, e.g. OHandMux, see _set_rx_driver()
+        self._reader_running = False
+        self._rx_buf = bytearray()  # Bytes received but not yet decoded into a frame
+        # I2C frames have no 0x55 0xAA header, they start with the addressed node id
+        self._rx_header = PROTOCOL_HEADER if protocol == HAND_PROTOCOL_UART else b""
+        # Shortest frame: header, node ids, command, byte count, lrc. Nothing completes with fewer bytes, so the
+        # per-byte path doesn't run the decoder until then
+        self._rx_min = len(self._rx_header) + 5
+        self._rx_need = self._rx_min  # Length _rx_buf must reach before decoding can make progress
+        self._rx_counted = 0  # Bytes of _rx_buf counted for the stats, the per-byte path counts when it decodes
 
     def get_private_data(self):
         return self.private_data
 
     def HAND_ProtocolLRC(self, lrcBytes):
-        lrc = 0
-        for byte in lrcBytes:
-            lrc ^= byte
-        return lrc
+        return _lrc(lrcBytes)
 
     def HAND_SendCmd(self, addr, cmd, data, nb_data):
+        if self._reader is not None or self._rx_driver is not None:
+            # The response is demultiplexed by the reader thread, HAND_GetResponse waits on the request
+            err, self._tls.request = self.HAND_SendRequest(addr, cmd, data, nb_data)
+            return err
+
+        return self._send_cmd(addr, cmd, data, nb_data)
+
+    def HAND_SendRequest(self, addr, cmd, data, nb_data):
+        """
+        Send a command and return (err, OHandRequest), call request.wait() to get the response.
+        Requests of several threads may be pending at the same time, answers complete them per (addr, cmd)
+        in order.
+        """
+        request = OHandRequest(self, addr, cmd)
+        err = self._send_request(request, data, nb_data)
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        return err, request
+
+    def _send_request(self, request, data, nb_data):
+        # Registered before sending, the answer may be decoded before _send_cmd returns
+        key = (request.hand_id, request.cmd)
+        with self._rx_lock:
+            waiters = self._pending.get(key)
+            if waiters is None:
+                waiters = self._pending[key] = deque()
+            waiters.append(request)
+
+        err = self._send_cmd(request.hand_id, request.cmd, data, nb_data)
+        if err != HAND_RESP_SUCCESS:
+            with self._rx_lock:
+                self._cancel_request(request)
+
+        return err
+
+    def _send_cmd(self, addr, cmd, data, nb_data):
         if not self.send_data_impl:
             return HAND_RESP_INVALID_CONTEXT
 
@@ -71,77 +151,383 @@ class OHandSerialAPI:
         if nb_data >= MAX_PROTOCOL_DATA_SIZE:
             return HAND_RESP_DATA_SIZE_TOO_BIG
 
-        send_buf = bytearray(7 + nb_data)
-        send_buf[0] = 0x55
-        send_buf[1] = 0xAA
-        send_buf[2] = addr
-        send_buf[3] = self.address_master
-        send_buf[4] = cmd
-        send_buf[5] = nb_data
-
-        # 处理data为None或空的情况
-        if data is not None:
-            send_buf[6 : 6 + nb_data] = data  # 确保data是可迭代的字节数据
-
-        # 计算LRC校验（从addr开始到data结束）
-        lrc = 0
-        for i in range(2, 6 + nb_data):
-            lrc ^= send_buf[i]
-        send_buf[6 + nb_data] = lrc
-
-        # 发送数据并返回结果（假设send_data_impl返回0表示成功）
-        if self.send_data_impl(addr, send_buf, len(send_buf), self.private_data) != 0:
-            return HAND_RESP_HAND_ERROR
+        # Queued answers to an earlier (addr, cmd) request nobody waits for any more
+        if self._rx_frames:
+            with self._rx_lock:
+                self._rx_drop_cnt += len(self._remove_frames(addr, cmd))
+
+        key = (addr, cmd)
+        if nb_data == 0 or data is None:
+            frame = self._tx_frames.get(key)
+            if frame is None:
+                header = bytes((addr, self.address_master, cmd, 0))
+                frame = self._tx_frames[key] = PROTOCOL_HEADER + header + bytes((_lrc(header),))
+
+            return self._transmit(addr, cmd, frame)
+
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data[:nb_data])  # Lists and other sequences of byte values
+        elif len(data) != nb_data:
+            data = data[:nb_data]  # data may be a larger, reused buffer
+
+        key = (addr, cmd, nb_data)
+        template = self._tx_headers.get(key)
+        if template is None:
+            header = bytes((addr, self.address_master, cmd, nb_data))
+            template = self._tx_headers[key] = (PROTOCOL_HEADER + header, _lrc(header))
+        header, lrc = template
+
+        # LRC covers addr to the end of data, the header part is precomputed
+        frame = header + data + _LRC_BYTES[lrc ^ _lrc(data)]
+
+        return self._transmit(addr, cmd, frame)
+
+    def _transmit(self, addr, cmd, frame):
+        if self._timing:
+            if self._stats is not None:
+                self._stats.on_send(len(frame))
+            self._tls.sent_ns = time.perf_counter_ns()
+
+        with self._tx_lock:
+            if self.send_data_impl(addr, frame, len(frame), self.private_data) != 0:
+                if self._timing:
+                    self._record_result(addr, cmd, HAND_RESP_HAND_ERROR)
+                return HAND_RESP_HAND_ERROR
 
         return HAND_RESP_SUCCESS
 
     def HAND_GetResponse(self, addr, cmd, time_out, resp_bytes, remote_err):
+        err = self._get_response(addr, cmd, time_out, resp_bytes, remote_err)
+        if self._timing:
+            self._record_result(addr, cmd, err)
+        return err
+
+    def _record_result(self, addr, cmd, err, sent_ns=None):
+        # Latency since the request was sent, by default by this thread, unknown if sent before timing was enabled
+        if sent_ns is None:
+            tls = self._tls
+            sent_ns = getattr(tls, "sent_ns", None)
+            tls.sent_ns = None
+        latency_ns = time.perf_counter_ns() - sent_ns if sent_ns is not None else None
+
+        stats = self._stats
+        if stats is not None:
+            stats.on_result(addr, cmd, err, latency_ns)
+        timeouts = self._timeouts
+        if timeouts is not None:
+            timeouts.on_result(addr, cmd, err, latency_ns / 1e6 if latency_ns is not None else None)
+
+    def _command_timeout(self, hand_id, cmd):
+        timeouts = self._timeouts
+        return self.timeout if timeouts is None else timeouts.get(hand_id, cmd, self.timeout)
+
+    def _get_response(self, addr, cmd, time_out, resp_bytes, remote_err):
+        request = getattr(self._tls, "request", None)
+        if request is not None and request.hand_id == addr and request.cmd == cmd:
+            self._tls.request = None
+            return self._wait_request(request, time_out, resp_bytes, remote_err)
+
         wait_start = self._get_milli_seconds_impl()
         wait_timeout = wait_start + time_out
+        recv_data_impl = self.recv_data_impl if self._reader is None and self._rx_driver is None else None
+
+        with self._rx_lock:
+            self._expire_frames(wait_start - time_out)
+            frame = self._take_frame(addr, cmd)
+
+        while frame is None:
+            if recv_data_impl is None:
+                # Data is fed from another thread through HAND_OnBytes
+                remaining = wait_timeout - self._get_milli_seconds_impl()
+                if remaining <= 0:
+                    break
+
+                with self._rx_lock:
+                    frame = self._take_frame(addr, cmd)
+                    if frame is None:
+                        self._rx_waiters += 1
+                        self._rx_cond.wait(remaining / 1000.0)
+                        self._rx_waiters -= 1
+                        frame = self._take_frame(addr, cmd)
+            elif self._wait_mode == HAND_WAIT_BLOCK:
+                remaining = wait_timeout - self._get_milli_seconds_impl()
+                if remaining <= 0:
+                    break
+
+                # Transport blocks until the pending frame completes or time is up
+                recv_data_impl(self.private_data, self, remaining)
+                with self._rx_lock:
+                    frame = self._take_frame(addr, cmd)
+            else:
+                remaining = wait_timeout - self._get_milli_seconds_impl()
+                if remaining < 0:
+                    break
+
+                time.sleep(min(remaining, POLL_INTERVAL) / 1000.0)  # Delay 1ms, less before the deadline
+
+                recv_data_impl(self.private_data, self)
+
+                with self._rx_lock:
+                    frame = self._take_frame(addr, cmd)
+
+        if frame is None:
+            if recv_data_impl:
+                self._count_received()
+                self._rx_buf.clear()
+                self._rx_counted = 0
+                self._rx_need = self._rx_min
+            return HAND_RESP_TIMEOUT
+
+        return self._parse_response(frame, resp_bytes, remote_err)
+
+    def _wait_request(self, request, time_out, resp_bytes, remote_err):
+        if time_out is None:
+            time_out = self.timeout
+
+        if not request.done():
+            if self._reader is None and self._rx_driver is None and self.recv_data_impl:
+                # Nobody else receives, drive the transport until the request completes
+                wait_timeout = self._get_milli_seconds_impl() + time_out
+                while not request.done():
+                    remaining = wait_timeout - self._get_milli_seconds_impl()
+                    if remaining <= 0:
+                        break
+                    if self._wait_mode == HAND_WAIT_BLOCK:
+                        self.recv_data_impl(self.private_data, self, remaining)
+                    else:
+                        time.sleep(min(remaining, POLL_INTERVAL) / 1000.0)
+                        self.recv_data_impl(self.private_data, self)
+            else:
+                request._event.wait(time_out / 1000.0)
 
-        while not self.is_whole_packet:
-            time.sleep(0.001)  # Delay 1ms
+        with self._rx_lock:
+            if request.frame is None:
+                self._cancel_request(request)
+                return HAND_RESP_TIMEOUT
 
-            if self.recv_data_impl:
-                self.recv_data_impl(self.private_data, self)
+        return self._parse_response(request.frame, resp_bytes, remote_err)
+
+    def _cancel_request(self, request):
+        key = (request.hand_id, request.cmd)
+        waiters = self._pending.get(key)
+        if waiters and request in waiters:
+            waiters.remove(request)
+            if not waiters:
+                del self._pending[key]
+
+    def _dispatch_frame(self, frame, tick):
+        """Complete the oldest request waiting for frame, or queue it for HAND_GetResponse"""
+        if self._pending:
+            cmd = frame[2] & ~CMD_ERROR_MASK
+            key = (frame[1], cmd)
+            waiters = self._pending.get(key)
+            if not waiters:
+                key = (0xFF, cmd)  # Broadcast request, answered by any node
+                waiters = self._pending.get(key)
+            if waiters:
+                request = waiters.popleft()
+                if not waiters:
+                    del self._pending[key]
+                request._complete(frame, tick)
+                self._rx_frame_cnt += 1
+                return
+
+        frames = self._rx_frames
+        if len(frames) >= MAX_RX_FRAMES:
+            frames.popleft()
+            self._rx_overflow_cnt += 1
+        frames.append((tick, frame))
+        self._rx_frame_cnt += 1
+        if self._rx_waiters:
+            self._rx_cond.notify_all()
+
+    def HAND_StartReader(self):
+        """
+        Start a thread owning recv_data_impl, decoding frames continuously and completing pending requests.
+        recv_data_impl must accept the time_out argument, see HAND_SetWaitMode().
+        Afterwards HAND_* commands may be issued from several threads at the same time.
+        """
+        if not self.recv_data_impl or self._rx_driver is not None:
+            return HAND_RESP_INVALID_CONTEXT
 
-            if self._get_milli_seconds_impl() > wait_timeout:
-                self.decode_state = self._initial_state()
-                return HAND_RESP_TIMEOUT
+        if self._reader is None:
+            self._reader_running = True
+            self._reader = threading.Thread(target=self._reader_loop, name="OHandReader", daemon=True)
+            self._reader.start()
+
+        return HAND_RESP_SUCCESS
+
+    def HAND_StopReader(self):
+        reader = self._reader
+        if reader is not None:
+            self._reader_running = False
+            reader.join()
+            self._reader = None
+
+    def _reader_loop(self):
+        while self._reader_running:
+            self.recv_data_impl(self.private_data, self, READER_RECV_TIMEOUT)
+
+    def _set_rx_driver(self, driver):
+        """
+        Let driver receive instead of callers and the reader thread, it calls recv_data_impl itself and other
+        threads wait for their responses. None releases the transport. Return HAND_RESP_INVALID_CONTEXT if a
+        reader or another driver already receives.
+        """
+        if driver is not None and (self._reader is not None or self._rx_driver is not None):
+            return HAND_RESP_INVALID_CONTEXT
+        self._rx_driver = driver
+        return HAND_RESP_SUCCESS
+
+    def _poll_transport(self, time_out):
+        """Receive for up to time_out ms unless a reader or driver does, return whether it received"""
+        if self._reader is not None or self._rx_driver is not None or not self.recv_data_impl:
+            return False
+        self.recv_data_impl(self.private_data, self, time_out)
+        return True
+
+    def _parse_response(self, frame, resp_bytes, remote_err):
+        # frame: addressed node id, own node id, command, byte count, data..., lrc
+        byte_count = frame[3]
 
         # Validate LRC
-        lrc = self.HAND_ProtocolLRC(self.packet_data[: self.packet_data[3] + 4])
-        if lrc != self.packet_data[self.packet_data[3] + 4]:
-            self.is_whole_packet = False
+        lrc = self.HAND_ProtocolLRC(frame[: byte_count + 4])
+        if lrc != frame[byte_count + 4]:
             return ERR_PROTOCOL_WRONG_LRC
 
         # Check if response is error
-        if (self.packet_data[2] & CMD_ERROR_MASK) != 0:
-            self.is_whole_packet = False
+        if (frame[2] & CMD_ERROR_MASK) != 0:
             if remote_err is not None:
-                remote_err.append(self.packet_data[4])
+                remote_err.append(frame[4])
             return HAND_RESP_HAND_ERROR
 
-        if self.packet_data[1] != addr and addr != 0xFF:
-            self.is_whole_packet = False
-            return HAND_RESP_UNMATCHED_ADDR
-
-        if self.packet_data[2] != cmd:
-            self.is_whole_packet = False
-            return HAND_RESP_UNMATCHED_CMD
-
         # Copy response data
         if resp_bytes:
-            packet_byte_count = self.packet_data[3]
-            if packet_byte_count > len(resp_bytes):
+            if byte_count > len(resp_bytes):
                 return HAND_RESP_INVALID_OUT_BUFFER_SIZE
             else:
-                resp_bytes[:] = self.packet_data[4 : 4 + packet_byte_count]
+                resp_bytes[:] = frame[4 : 4 + byte_count]
 
-        self.is_whole_packet = False
+        self._tls.frame = frame  # Unpacked in place by _execute()
         return HAND_RESP_SUCCESS
 
+    def _remove_frames(self, addr, cmd):
+        """Remove and return queued frames answering cmd from node addr (0xFF: any node), oldest first"""
+        removed = []
+        if not self._rx_frames:
+            return removed
+        kept = deque()
+        for entry in self._rx_frames:
+            frame = entry[1]
+            if (frame[2] & ~CMD_ERROR_MASK) == cmd and (addr == 0xFF or frame[1] == addr):
+                removed.append(frame)
+            else:
+                kept.append(entry)
+        if removed:
+            self._rx_frames = kept
+        return removed
+
+    def _take_frame(self, addr, cmd):
+        """Return the newest queued answer to (addr, cmd), older ones are stale and dropped"""
+        frames = self._remove_frames(addr, cmd)
+        if not frames:
+            return None
+        self._rx_drop_cnt += len(frames) - 1
+        return frames[-1]
+
+    def _expire_frames(self, tick):
+        """Drop frames queued before tick, no pending request can claim them any more"""
+        frames = self._rx_frames
+        while frames and frames[0][0] < tick:
+            frames.popleft()
+            self._rx_drop_cnt += 1
+
+    def get_rx_need(self):
+        """Return the number of bytes still missing before the decoder can complete a frame"""
+        return max(self._rx_need - len(self._rx_buf), 1)
+
+    def get_rx_stats(self):
+        """Return counters of the receive frame queue"""
+        return {
+            "received": self._rx_frame_cnt,
+            "queued": len(self._rx_frames),
+            "overflow": self._rx_overflow_cnt,
+            "dropped": self._rx_drop_cnt,
+            "resync": self._rx_resync_cnt,
+            "skipped_bytes": self._rx_skip_cnt,
+        }
+
+    def enable_cache(self, enable=True):
+        """
+        Serve getters of static device information like versions, UID, calibration data and PID parameters
+        from memory once read, see cache.OHandCache. Use it only if no other master changes these settings.
+        """
+        if not enable:
+            self._cache = None
+        elif self._cache is None:
+            self._cache = OHandCache()
+
+    def invalidate_cache(self, hand_id=None):
+        """Drop what is cached about hand_id, all hands if None, e.g. after the hand was replaced"""
+        if self._cache is not None:
+            self._cache.clear(hand_id)
+
+    def get_cache_stats(self):
+        """Return hit, miss and entry counters of the cache, None if disabled"""
+        return self._cache.get_stats() if self._cache is not None else None
+
+    def enable_stats(self, enable=True):
+        """
+        Record latency histograms per (hand_id, cmd), return code counts and bytes on the wire, see
+        stats.OHandStats. Disabled, instrumentation costs one attribute check per command.
+        """
+        if not enable:
+            self._stats = None
+        elif self._stats is None:
+            self._stats = OHandStats()
+        self._timing = self._stats is not None or self._timeouts is not None
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def get_stats(self):
+        """
+        Return a snapshot of the instrumentation, see OHandStats.get_stats(), with the receive counters under
+        'rx' and cache counters under 'cache'. None if disabled, cheap enough to poll from another thread.
+        """
+        stats = self._stats
+        if stats is None:
+            return None
+
+        snapshot = stats.get_stats()
+        snapshot["rx"] = self.get_rx_stats()
+        snapshot["cache"] = self.get_cache_stats()
+        return snapshot
+
+    def enable_adaptive_timeout(self, enable=True, percentile=0.99, multiplier=2.0, floor=2.0, ceiling=2000.0,
+                                window=32, min_samples=8):
+        """
+        Wait for responses of each (hand_id, cmd) as long as its recent round trip times suggest instead of the
+        command timeout, see timeouts.OHandTimeouts: the percentile of the last window round trip times times
+        multiplier, clamped to [floor, ceiling] ms. A lost frame then stalls for a few ms instead of 255 ms.
+        Calling it again restarts learning with the new parameters.
+        """
+        if enable:
+            self._timeouts = OHandTimeouts(percentile, multiplier, floor, ceiling, window, min_samples)
+        else:
+            self._timeouts = None
+        self._timing = self._stats is not None or self._timeouts is not None
+
+    def get_timeouts(self):
+        """Return the learned timeouts, see OHandTimeouts.get_timeouts(), None if disabled"""
+        return self._timeouts.get_timeouts() if self._timeouts is not None else None
+
     def HAND_SetTimerFunction(self, get_milli_seconds_impl, delay_milli_seconds_impl):
+        """
+        get_milli_seconds_impl() must be monotonic, deadlines are computed from it. Return a float with fractions
+        of milliseconds, like the interfaces do, for timeouts below 1ms to be honored.
+        """
         self._get_milli_seconds_impl = get_milli_seconds_impl
         self._delay_milli_seconds_impl = delay_milli_seconds_impl
 
@@ -152,920 +538,496 @@ class OHandSerialAPI:
             return 0
 
     def HAND_SetCommandTimeOut(self, timeout):
+        """Response timeout in ms, fractions allowed, e.g. 0.5 to fail fast on a 1 Mbit/s bus"""
         self.timeout = timeout
 
+    def HAND_SetWaitMode(self, mode):
+        """
+        HAND_WAIT_POLL: poll recv_data_impl every 1ms while waiting for a response.
+        HAND_WAIT_BLOCK: block in recv_data_impl(private_data, api, time_out) until data arrives or the
+        deadline passes, or without recv_data_impl, wait for frames fed by another thread via HAND_OnBytes.
+        """
+        self._wait_mode = mode
+
     def HAND_OnData(self, data):
-        if self.is_whole_packet:
-            return  # Old packet is not processed, ignore
-
-        if self.decode_state == "WAIT_ON_HEADER_0":
-            if data == 0x55:
-                self.decode_state = "WAIT_ON_HEADER_1"
-        elif self.decode_state == "WAIT_ON_HEADER_1":
-            if data == 0xAA:
-                self.decode_state = "WAIT_ON_ADDRESSED_NODE_ID"
-            else:
-                self.decode_state = "WAIT_ON_HEADER_0"
-        elif self.decode_state == "WAIT_ON_ADDRESSED_NODE_ID":
-            self.packet_data[0] = data
-            self.decode_state = "WAIT_ON_OWN_NODE_ID"
-        elif self.decode_state == "WAIT_ON_OWN_NODE_ID":
-            self.packet_data[1] = data
-            self.decode_state = "WAIT_ON_COMMAND_ID"
-        elif self.decode_state == "WAIT_ON_COMMAND_ID":
-            self.packet_data[2] = data
-            self.decode_state = "WAIT_ON_BYTECOUNT"
-        elif self.decode_state == "WAIT_ON_BYTECOUNT":
-            self.packet_data[3] = data
-            self.byte_count = data
-            if self.byte_count > MAX_PROTOCOL_DATA_SIZE:
-                self.decode_state = self._initial_state()
-            elif self.byte_count > 0:
-                self.decode_state = "WAIT_ON_DATA"
-            else:
-                self.decode_state = "WAIT_ON_LRC"
-        elif self.decode_state == "WAIT_ON_DATA":
-            index = 4 + self.packet_data[3] - self.byte_count
-            self.packet_data[index] = data
-            self.byte_count -= 1
-            if self.byte_count == 0:
-                self.decode_state = "WAIT_ON_LRC"
-        elif self.decode_state == "WAIT_ON_LRC":
-            index = 4 + self.packet_data[3]
-            self.packet_data[index] = data
-            if self.packet_data[0] == self.address_master:
-                self.is_whole_packet = True
-            self.decode_state = self._initial_state()
+        # Hot path of byte-wise transports, kept minimal: bytes are counted by _decode()
+        rx = self._rx_buf
+        rx.append(data)
+        if len(rx) >= self._rx_need:
+            self._decode()
+
+    def HAND_OnBytes(self, buf):
+        """
+        Decode a chunk of received bytes (bytes, bytearray or memoryview).
+        Frames may span several chunks, incomplete tails are kept for the next call.
+        Every whole frame addressed to us is queued, see MAX_RX_FRAMES.
+        """
+        self._rx_buf += buf
+        self._decode()
+
+    def _count_received(self):
+        # Bytes appended to _rx_buf since the last call, counted for the stats
+        rx_len = len(self._rx_buf)
+        if self._stats is not None and rx_len > self._rx_counted:
+            self._stats.on_receive(rx_len - self._rx_counted)
+        self._rx_counted = rx_len
+
+    def _decode(self):
+        # Decode the frames in _rx_buf, keep the incomplete tail
+        rx = self._rx_buf
+        if self._stats is not None:
+            self._count_received()
+        header = self._rx_header
+        header_len = len(header)
+        tick = None  # Arrival tick, shared by all frames of the chunk
+
+        while True:
+            if header_len:
+                start = rx.find(header)
+                if start < 0:
+                    # Keep a trailing 0x55, it may be the first half of a header
+                    skip = len(rx) - 1 if rx and rx[-1] == header[0] else len(rx)
+                    if skip:
+                        del rx[:skip]
+                        self._rx_resync_cnt += 1
+                        self._rx_skip_cnt += skip
+                    self._rx_need = self._rx_min
+                    self._rx_counted = len(rx)
+                    return
+                if start > 0:
+                    del rx[:start]
+                    self._rx_resync_cnt += 1
+                    self._rx_skip_cnt += start
+
+            # [header] addressed node id, own node id, command, byte count, data..., lrc
+            if len(rx) < header_len + 4:
+                self._rx_need = self._rx_min
+                self._rx_counted = len(rx)
+                return
+
+            byte_count = rx[header_len + 3]
+            if byte_count > MAX_PROTOCOL_DATA_SIZE:
+                del rx[: header_len or 1]  # Not a frame, resync on the next header
+                self._rx_resync_cnt += 1
+                self._rx_skip_cnt += header_len or 1
+                continue
+
+            frame_end = header_len + byte_count + 5
+            if len(rx) < frame_end:
+                self._rx_need = frame_end
+                self._rx_counted = len(rx)
+                return
+
+            if rx[header_len] == self.address_master:
+                if tick is None:
+                    tick = self.HAND_GetTick()
+                with self._rx_lock:
+                    self._dispatch_frame(bytes(rx[header_len:frame_end]), tick)
+
+            del rx[:frame_end]
+            if not rx:
+                self._rx_need = self._rx_min
+                self._rx_counted = 0
+                return
+
+    def HAND_Execute(self, hand_id, cmd, args=(), remote_err=None):
+        """
+        Send cmd with args packed by its layout in codec.HAND_CMD_CODECS and wait for the response.
+        Return (err, values), values is the response payload unpacked by its layout, None on error.
+        """
+        return self._execute(hand_id, cmd, args, remote_err)
+
+    def _execute(self, hand_id, cmd, args, remote_err):
+        codec = HAND_CMD_CODECS[cmd]
+        tls = self._tls
+        try:
+            buf = tls.payload
+        except AttributeError:
+            buf = tls.payload = bytearray(MAX_PROTOCOL_DATA_SIZE)  # Per thread, packed requests are sent in place
+
+        try:
+            layout = codec.request.get(args)
+            layout.pack_into(buf, 0, *args)
+        except (struct.error, TypeError, IndexError):
+            return HAND_RESP_DATA_INVALID, None
+
+        cache = self._cache
+        if cache is not None:
+            values = cache.on_request(hand_id, cmd, args)
+            if values is not None:
+                return HAND_RESP_SUCCESS, values
+
+        err = self.HAND_SendCmd(hand_id, cmd, buf, layout.size)
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        err = self.HAND_GetResponse(hand_id, cmd, self._command_timeout(hand_id, cmd), None, remote_err)
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        # Unpacked in place from the frame HAND_GetResponse accepted
+        values = self._unpack_response(codec, args, tls.frame)
+        if values is None:
+            return HAND_RESP_DATA_INVALID, None
+
+        if cache is not None:
+            cache.on_response(hand_id, cmd, args, values)
+
+        return HAND_RESP_SUCCESS, values
+
+    def _unpack_response(self, codec, args, frame):
+        """Return the payload of the accepted response frame to args unpacked by codec, None if invalid"""
+        byte_count = frame[3]
+        layout = codec.response.get(memoryview(frame)[4 : 4 + byte_count])
+        values = layout.unpack_from(frame, 4) if layout.size <= byte_count else None
+        if values is None or (codec.echo and values[0] != args[0]):
+            if self._stats is not None:
+                self._stats.on_rejected()
+            return None
+        return values
 
     def HAND_GetProtocolVersion(self, hand_id, major, minor, remote_err):
-        out = bytearray(2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                minor[0] = out[0]
-                major[0] = out[1]
+            minor[0], major[0] = values
         return err, major[0], minor[0]
 
     def HAND_GetFirmwareVersion(self, hand_id, major, minor, revision, remote_err):
-        out = bytearray(4)  # Assuming revision is 2 bytes, and major/minor are 1 byte each
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FW_VERSION, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_FW_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FW_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                revision[0] = out[0] | (out[1] << 8)
-                minor[0] = out[2]
-                major[0] = out[3]
+            revision[0], minor[0], major[0] = values
         return err, major[0], minor[0], revision[0]
 
     def HAND_GetHardwareVersion(self, hand_id, hw_type, hw_ver, boot_version, remote_err):
-        out = bytearray(4)  # Assuming boot_version is 2 bytes, and hw_type/hw_ver are 1 byte each
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_HW_VERSION, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_HW_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_HW_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                hw_type[0] = out[0]
-                hw_ver[0] = out[1]
-                boot_version[0] = (out[2] << 8) | out[3]
+            hw_type[0], hw_ver[0], boot_version[0] = values
         return err, hw_type[0], hw_ver[0], boot_version[0]
 
     def HAND_GetCaliData(self, hand_id, end_pos, start_pos, motor_cnt, thumb_root_pos, thumb_root_pos_cnt, remote_err):
-        out = bytearray(2 + 2 * MAX_MOTOR_CNT + 2 * MAX_MOTOR_CNT + 1 + 2 * MAX_THUMB_ROOT_POS)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_CALI_DATA, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_CALI_DATA, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_CALI_DATA, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                p_data = iter(out)
-                motor_cnt_ret = next(p_data)
-                thumb_root_pos_cnt_ret = next(p_data)
-                if motor_cnt[0] < motor_cnt_ret or thumb_root_pos_cnt[0] < thumb_root_pos_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                thumb_root_pos_cnt[0] = thumb_root_pos_cnt_ret
-
-                end_pos_size = 2 * motor_cnt_ret
-                start_pos_size = 2 * motor_cnt_ret
-                thumb_root_pos_size = 2 * thumb_root_pos_cnt_ret
-
-                if end_pos:
-                    for i in range(motor_cnt_ret):
-                        end_pos[i] = next(p_data) | (next(p_data) << 8)
-
-                if start_pos:
-                    for i in range(motor_cnt_ret):
-                        start_pos[i] = next(p_data) | (next(p_data) << 8)
-
-                if thumb_root_pos:
-                    for i in range(thumb_root_pos_cnt_ret):
-                        thumb_root_pos[i] = next(p_data) | (next(p_data) << 8)
+            motor_cnt_ret, thumb_root_pos_cnt_ret = values[0], values[1]
+            if motor_cnt[0] < motor_cnt_ret or thumb_root_pos_cnt[0] < thumb_root_pos_cnt_ret:
+                return HAND_RESP_DATA_SIZE_TOO_BIG
+            motor_cnt[0] = motor_cnt_ret
+            thumb_root_pos_cnt[0] = thumb_root_pos_cnt_ret
+
+            p_data = 2
+            if end_pos:
+                end_pos[:motor_cnt_ret] = values[p_data : p_data + motor_cnt_ret]
+            p_data += motor_cnt_ret
+            if start_pos:
+                start_pos[:motor_cnt_ret] = values[p_data : p_data + motor_cnt_ret]
+            p_data += motor_cnt_ret
+            if thumb_root_pos:
+                thumb_root_pos[:thumb_root_pos_cnt_ret] = values[p_data:]
 
         return err, end_pos, start_pos, thumb_root_pos
 
     def HAND_GetFingerPID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + 4 + 4 + 4 + 4)  # Assuming float is 4 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_PID, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_PID, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_PID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                p[0] = struct.unpack('f', out[1:5])
-                i[0] = struct.unpack('f', out[5:9])
-                d[0] = struct.unpack('f', out[9:13])
-                g[0] = struct.unpack('f', out[13:17])
-            else:
-                err = HAND_RESP_DATA_INVALID
-        return err, p[0][0], i[0][0], d[0][0], g[0][0]
+            _, p[0], i[0], d[0], g[0] = values
+        return err, p[0], i[0], d[0], g[0]
 
     def HAND_GetFingerCurrentLimit(self, hand_id, finger_id, current_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                current_limit[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            current_limit[0] = values[1]
         return err, current_limit[0]
 
     def HAND_GetFingerCurrent(self, hand_id, finger_id, current, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_CURRENT, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_CURRENT, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_CURRENT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                current[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            current[0] = values[1]
         return err, current[0]
 
     def HAND_GetFingerForceTarget(self, hand_id, finger_id, force_target, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                force_target[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            force_target[0] = values[1]
         return err, force_target[0]
 
     def HAND_GetFingerForce(self, hand_id, finger_id, force_entry_cnt, force, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + MAX_FORCE_ENTRIES * 2)  # Assuming each entry is 2 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_FORCE, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                if finger_id != out[0]:
-                    err = HAND_RESP_DATA_INVALID
-                else:
-                    force_entry_cnt[0] = out[1]
-                    for i in range(force_entry_cnt[0]):
-                        if i < len(force):
-                            force[i] = out[2 + i]
+            force_entry_cnt[0] = values[1]
+            n = min(values[1], len(force))
+            force[:n] = values[2 : 2 + n]
         return err, force
 
     def HAND_GetFingerPosLimit(self, hand_id, finger_id, low_limit, high_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                low_limit[0] = out[1] | (out[2] << 8)
-                high_limit[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            _, low_limit[0], high_limit[0] = values
         return err, low_limit[0], high_limit[0]
 
     def HAND_GetFingerPosAbs(self, hand_id, finger_id, target_pos, current_pos, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ABS, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_POS_ABS, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ABS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_pos:
-                    target_pos[0] = out[1] | (out[2] << 8)
-                if current_pos:
-                    current_pos[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_pos:
+                target_pos[0] = values[1]
+            if current_pos:
+                current_pos[0] = values[2]
         return err, target_pos[0], current_pos[0]
 
     def HAND_GetFingerPos(self, hand_id, finger_id, target_pos, current_pos, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_POS, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_pos:
-                    target_pos[0] = out[1] | (out[2] << 8)
-                if current_pos:
-                    current_pos[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_pos:
+                target_pos[0] = values[1]
+            if current_pos:
+                current_pos[0] = values[2]
         return err, target_pos[0], current_pos[0]
 
     def HAND_GetFingerAngle(self, hand_id, finger_id, target_angle, current_angle, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_ANGLE, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_ANGLE, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_ANGLE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_angle:
-                    target_angle[0] = int.from_bytes(out[1:3], byteorder="little", signed=True)
-                if current_angle:
-                    current_angle[0] = int.from_bytes(out[3:5], byteorder="little", signed=True)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_angle:
+                target_angle[0] = values[1]
+            if current_angle:
+                current_angle[0] = values[2]
         return err, target_angle[0], current_angle[0]
 
     def HAND_GetThumbRootPos(self, hand_id, raw_encoder, pos, remote_err):
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                raw_encoder[0] = out[0] | (out[1] << 8)
-                pos[0] = out[2]
+            raw_encoder[0], pos[0] = values
         return err, raw_encoder[0], pos[0]
 
-    def HAND_GetFingerPosAbsAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, None, 0)
+    def _get_all(self, hand_id, cmd, target, current, motor_cnt, remote_err):
+        # Response: target * motor_cnt, current * motor_cnt, motor_cnt follows from the payload size
+        err, values = self._execute(hand_id, cmd, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_pos:
-                    for i in range(motor_cnt_ret):
-                        target_pos[i] = out[2 * i] | (out[2 * i + 1] << 8)
-                if current_pos:
-                    for i in range(motor_cnt_ret):
-                        current_pos[i] = out[2 * motor_cnt_ret + 2 * i] | (out[2 * motor_cnt_ret + 2 * i + 1] << 8)
-        return err, target_pos, current_pos
+            motor_cnt_ret = len(values) // 2
+            if motor_cnt[0] < motor_cnt_ret:
+                return HAND_RESP_DATA_SIZE_TOO_BIG
+            motor_cnt[0] = motor_cnt_ret
+            if target:
+                target[:motor_cnt_ret] = values[:motor_cnt_ret]
+            if current:
+                current[:motor_cnt_ret] = values[motor_cnt_ret:]
+        return err, target, current
+
+    def HAND_GetFingerPosAbsAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, target_pos, current_pos, motor_cnt, remote_err)
 
     def HAND_GetFingerPosAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ALL, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_pos:
-                    for i in range(motor_cnt_ret):
-                        target_pos[i] = out[2 * i] | (out[2 * i + 1] << 8)
-                if current_pos:
-                    for i in range(motor_cnt_ret):
-                        current_pos[i] = out[2 * motor_cnt_ret + 2 * i] | (out[2 * motor_cnt_ret + 2 * i + 1] << 8)
-        return err, target_pos, current_pos
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_POS_ALL, target_pos, current_pos, motor_cnt, remote_err)
 
     def HAND_GetFingerAngleAll(self, hand_id, target_angle, current_angle, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_angle:
-                    for i in range(motor_cnt_ret):
-                        target_angle[i] = int.from_bytes(out[2 * i : 2 * i + 2], byteorder="little", signed=True)
-                if current_angle:
-                    for i in range(motor_cnt_ret):
-                        current_angle[i] = int.from_bytes(
-                            out[2 * motor_cnt_ret + 2 * i : 2 * motor_cnt_ret + 2 * i + 2], byteorder="little", signed=True
-                        )
-        return err, target_angle, current_angle
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, target_angle, current_angle, motor_cnt, remote_err)
 
     def HAND_GetFingerStopParams(self, hand_id, finger_id, speed, stop_current, stop_after_period, retry_interval, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(9)  # Assuming 4 bytes of stop params
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                speed[0] = out[1] | (out[2] << 8)
-                stop_current[0] = out[3] | (out[4] << 8)
-                stop_after_period[0] = out[5] | (out[6] << 8)
-                retry_interval[0] = out[7] | (out[8] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            _, speed[0], stop_current[0], stop_after_period[0], retry_interval[0] = values
         return err, speed[0], stop_current[0], stop_after_period[0], retry_interval[0]
 
     def HAND_GetFingerForcePID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + 4 + 4 + 4 + 4)  # Assuming float is 4 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                p[0] = struct.unpack('f', out[1:5])
-                i[0] = struct.unpack('f', out[5:9])
-                d[0] = struct.unpack('f', out[9:13])
-                g[0] = struct.unpack('f', out[13:17])
-            else:
-                err = HAND_RESP_DATA_INVALID
-        return err, p[0][0], i[0][0], d[0][0], g[0][0]
+            _, p[0], i[0], d[0], g[0] = values
+        return err, p[0], i[0], d[0], g[0]
 
     def HAND_GetSelfTestLevel(self, hand_id, self_test_level, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                self_test_level[0] = out[0]
+            self_test_level[0] = values[0]
         return err, self_test_level[0]
 
     def HAND_GetBeepSwitch(self, hand_id, beep_switch, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BEEP_SWITCH, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_BEEP_SWITCH, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BEEP_SWITCH, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                beep_switch[0] = out[0]
+            beep_switch[0] = values[0]
         return err, beep_switch[0]
 
     def HAND_GetButtonPressedCnt(self, hand_id, pressed_cnt, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                pressed_cnt[0] = out[0]
+            pressed_cnt[0] = values[0]
         return err, pressed_cnt[0]
 
     def HAND_GetUID(self, hand_id, uid_w0, uid_w1, uid_w2, remote_err):
-        out = bytearray(12)  # 96 bits UID
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_UID, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_UID, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_UID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                uid_w0[0] = out[0] | (out[1] << 8) | (out[2] << 16) | (out[3] << 24)
-                uid_w1[0] = out[4] | (out[5] << 8) | (out[6] << 16) | (out[7] << 24)
-                uid_w2[0] = out[8] | (out[9] << 8) | (out[10] << 16) | (out[11] << 24)
+            uid_w0[0], uid_w1[0], uid_w2[0] = values
         return err, uid_w0[0], uid_w1[0], uid_w2[0]
 
     def HAND_GetBatteryVoltage(self, hand_id, voltage, remote_err):
-        out = bytearray(2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                voltage[0] = out[0] | (out[1] << 8)
+            voltage[0] = values[0]
         return err
 
     def HAND_GetUsageStat(self, hand_id, total_use_time, total_open_times, motor_cnt, remote_err):
-        data = bytearray(1)
-        data[0] = motor_cnt
-        out = bytearray(4 + 4 * MAX_MOTOR_CNT)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_USAGE_STAT, data, len(data))
+        err, values = self._execute(hand_id, HAND_CMD_GET_USAGE_STAT, (motor_cnt,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_USAGE_STAT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                total_use_time[0] = out[0] | (out[1] << 8) | (out[2] << 16) | (out[3] << 24)
-                for i in range(MAX_MOTOR_CNT):
-                    index = 4 + i * 4
-                    total_open_times[i] = out[index] | (out[index + 1] << 8) | (out[index + 2] << 16) | (out[index + 3] << 24)
+            total_use_time[0] = values[0]
+            n = min(len(values) - 1, len(total_open_times))
+            total_open_times[:n] = values[1 : 1 + n]
         return err
 
     def HAND_GetManufactureData(self, hand_id, sub_model, hw_revision, serial_number, customer_tag, remote_err):
-        out = bytearray(26)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                sub_model[0] = out[0]
-                hw_revision[0] = out[1]
-                serial_bytes = out[2:18]
-                customer_bytes = out[18:26]
-
-                serial_numbers = [int(byte) for byte in serial_bytes]
-                serial_number_str = ''.join(map(str, serial_numbers))
-                serial_number[0] = serial_number_str
-
-                customer_numbers = [int(byte) for byte in customer_bytes]
-                customer_numbers_str = ''.join(map(str, customer_numbers))
-                customer_tag[0] = customer_numbers_str
-            else:
-                err = HAND_RESP_DATA_INVALID
+            sub_model[0], hw_revision[0], serial_bytes, customer_bytes = values
+            serial_number[0] = ''.join(map(str, serial_bytes))
+            customer_tag[0] = ''.join(map(str, customer_bytes))
         return err, sub_model[0], hw_revision[0], serial_number[0], customer_tag[0]
 
     def HAND_GetFingerSpeedCtrlParams(self, hand_id, brake_distance, accel_distance, speed_ratio, remote_err):
-        out = bytearray(2 + 2 + 4)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, None, 0)
+        err, values = self._execute(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                brake_distance[0] = out[0] | (out[1] << 8)
-                accel_distance[0] = out[2] | (out[3] << 8)
-                speed_ratio[0] = struct.unpack('f', out[4:8])
-            else:
-                err = HAND_RESP_DATA_INVALID
-
-        return err, brake_distance[0], accel_distance[0], speed_ratio[0][0]
+            brake_distance[0], accel_distance[0], speed_ratio[0] = values
+        return err, brake_distance[0], accel_distance[0], speed_ratio[0]
 
     def HAND_Reset(self, hand_id, mode, remote_err):
-        if not match_data_type(mode, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = mode
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_RESET, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_RESET, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_RESET, (mode,), remote_err)[0]
 
     def HAND_PowerOff(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_POWER_OFF, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_POWER_OFF, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_POWER_OFF, (), remote_err)[0]
 
     def HAND_SetID(self, hand_id, new_id, remote_err):
-        if not match_data_type(new_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = new_id
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_NODE_ID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_NODE_ID, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_NODE_ID, (new_id,), remote_err)[0]
 
     def HAND_Calibrate(self, hand_id, key, remote_err):
-        data = bytearray(2)
-        data[0] = key & 0xFF
-        data[1] = (key >> 8) & 0xFF
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_CALIBRATE, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_CALIBRATE, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_CALIBRATE, (key,), remote_err)[0]
 
     def HAND_SetCaliData(self, hand_id, end_pos, start_pos, motor_cnt, thumb_root_pos, thumb_root_pos_cnt, remote_err):
         if not match_data_type(motor_cnt, UINT8_T) or not match_data_type(thumb_root_pos_cnt, UINT8_T):
             return HAND_RESP_DATA_INVALID
 
-        data = bytearray(1 + 2 * MAX_MOTOR_CNT + 2 * MAX_MOTOR_CNT + 1 + 2 * MAX_THUMB_ROOT_POS)
-        p_data = 0
-        data[p_data] = motor_cnt
-        p_data += 1
-
-        for i in range(motor_cnt):
-            data[p_data] = end_pos[i] & 0xFF
-            data[p_data + 1] = (end_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        for i in range(motor_cnt):
-            data[p_data] = start_pos[i] & 0xFF
-            data[p_data + 1] = (start_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        data[p_data] = thumb_root_pos_cnt
-        p_data += 1
-
-        for i in range(thumb_root_pos_cnt):
-            data[p_data] = thumb_root_pos[i] & 0xFF
-            data[p_data + 1] = (thumb_root_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_CALI_DATA, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CALI_DATA, self.timeout, None, remote_err)
-        return err
+        args = (
+            motor_cnt,
+            *end_pos[:motor_cnt],
+            *start_pos[:motor_cnt],
+            thumb_root_pos_cnt,
+            *thumb_root_pos[:thumb_root_pos_cnt],
+        )
+        return self._execute(hand_id, HAND_CMD_SET_CALI_DATA, args, remote_err)[0]
 
     def HAND_SetFingerPID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1 + 4 + 4 + 4 + 4)
-        data[0] = finger_id
-        data[1:5] =   struct.pack('f', p)
-        data[5:9] =   struct.pack('f', i)
-        data[9:13] =  struct.pack('f', d)
-        data[13:17] = struct.pack('f', g)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_PID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_PID, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_PID, (finger_id, p, i, d, g), remote_err)[0]
 
     def HAND_SetFingerCurrentLimit(self, hand_id, finger_id, current_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(current_limit, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3)
-        data[0] = finger_id
-        data[1] = current_limit & 0xFF
-        data[2] = (current_limit >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_CURRENT_LIMIT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_CURRENT_LIMIT, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_CURRENT_LIMIT, (finger_id, current_limit), remote_err)[0]
 
     def HAND_SetFingerForceTarget(self, hand_id, finger_id, force_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(force_limit, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3)
-        data[0] = finger_id
-        data[1] = force_limit & 0xFF
-        data[2] = (force_limit >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_FORCE_TARGET, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_FORCE_TARGET, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_FORCE_TARGET, (finger_id, force_limit), remote_err)[0]
 
     def HAND_SetFingerPosLimit(self, hand_id, finger_id, pos_limit_low, pos_limit_high, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(pos_limit_low, UINT16_T)
-            or not match_data_type(pos_limit_high, UINT16_T)
-            or pos_limit_low > pos_limit_high
-        ):
+        if pos_limit_low > pos_limit_high:
             return HAND_RESP_DATA_INVALID
 
-        data = bytearray(5)
-        data[0] = finger_id
-        data[1] = pos_limit_low & 0xFF
-        data[2] = (pos_limit_low >> 8) & 0xFF
-        data[3] = pos_limit_high & 0xFF
-        data[4] = (pos_limit_high >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_LIMIT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_LIMIT, self.timeout, None, remote_err)
-        return err
+        args = (finger_id, pos_limit_low, pos_limit_high)
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_POS_LIMIT, args, remote_err)[0]
 
     def HAND_FingerStart(self, hand_id, finger_id_bits, remote_err):
-        if not match_data_type(finger_id_bits, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id_bits
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_FINGER_START, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_FINGER_START, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_FINGER_START, (finger_id_bits,), remote_err)[0]
 
     def HAND_FingerStop(self, hand_id, finger_id_bits, remote_err):
-        if not match_data_type(finger_id_bits, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id_bits
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_FINGER_STOP, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_FINGER_STOP, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_FINGER_STOP, (finger_id_bits,), remote_err)[0]
 
     def HAND_SetFingerPosAbs(self, hand_id, finger_id, raw_pos, speed, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(raw_pos, UINT16_T)
-            or not match_data_type(speed, UINT8_T)
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = raw_pos & 0xFF
-        data[2] = (raw_pos >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ABS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ABS, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_POS_ABS, (finger_id, raw_pos, speed), remote_err)[0]
 
     def HAND_SetFingerPos(self, hand_id, finger_id, pos, speed, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(pos, UINT16_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = pos & 0xFF
-        data[2] = (pos >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_POS, (finger_id, pos, speed), remote_err)[0]
 
     def HAND_SetFingerAngle(self, hand_id, finger_id, angle, speed, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(angle, INT16_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = angle & 0xFF
-        data[2] = (angle >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_ANGLE, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_ANGLE, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_ANGLE, (finger_id, angle, speed), remote_err)[0]
 
     def HAND_SetThumbRootPos(self, hand_id, pos, speed, remote_err):
-        if not match_data_type(pos, UINT8_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(2)
-        data[0] = pos
-        data[1] = speed
+        return self._execute(hand_id, HAND_CMD_SET_THUMB_ROOT_POS, (pos, speed), remote_err)[0]
 
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_THUMB_ROOT_POS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_THUMB_ROOT_POS, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerPosAbsAll(self, hand_id, raw_pos, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(raw_pos, UINT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
+    def _set_all(self, hand_id, cmd, values, speed, motor_cnt, remote_err):
+        # Request: [value, speed] * motor_cnt
+        if not match_data_type(motor_cnt, UINT8_T) or motor_cnt > MAX_MOTOR_CNT:
+            return HAND_RESP_DATA_INVALID
+        if len(values) < motor_cnt or len(speed) < motor_cnt:
             return HAND_RESP_DATA_INVALID
 
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = raw_pos[i] & 0xFF
-            data[p_data + 1] = (raw_pos[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
+        args = [0] * (2 * motor_cnt)
+        args[0::2] = values[:motor_cnt]
+        args[1::2] = speed[:motor_cnt]
+        return self._execute(hand_id, cmd, args, remote_err)[0]
 
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, self.timeout, None, remote_err)
-        return err
+    def HAND_SetFingerPosAbsAll(self, hand_id, raw_pos, speed, motor_cnt, remote_err):
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, raw_pos, speed, motor_cnt, remote_err)
 
     def HAND_SetFingerPosAll(self, hand_id, pos, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(pos, UINT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = pos[i] & 0xFF
-            data[p_data + 1] = (pos[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ALL, self.timeout, None, remote_err)
-        return err
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_POS_ALL, pos, speed, motor_cnt, remote_err)
 
     def HAND_SetFingerAngleAll(self, hand_id, angle, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(angle, INT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = angle[i] & 0xFF
-            data[p_data + 1] = (angle[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, self.timeout, None, remote_err)
-        return err
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, angle, speed, motor_cnt, remote_err)
 
     def HAND_SetFingerStopParams(self, hand_id, finger_id, speed, stop_current, stop_after_period, retry_interval, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(speed, UINT16_T)
-            or not match_data_type(stop_current, UINT16_T)
-            or not match_data_type(stop_after_period, UINT16_T)
-            or not match_data_type(retry_interval, UINT16_T)
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1 + 2 + 2 + 2 + 2)
-        data[0] = finger_id
-        data[1] = speed & 0xFF
-        data[2] = (speed >> 8) & 0xFF
-        data[3] = stop_current & 0xFF
-        data[4] = (stop_current >> 8) & 0xFF
-        data[5] = stop_after_period & 0xFF
-        data[6] = (stop_after_period >> 8) & 0xFF
-        data[7] = retry_interval & 0xFF
-        data[8] = (retry_interval >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_STOP_PARAMS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_STOP_PARAMS, self.timeout, None, remote_err)
-        return err
+        args = (finger_id, speed, stop_current, stop_after_period, retry_interval)
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_STOP_PARAMS, args, remote_err)[0]
 
     def HAND_SetFingerForcePID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1 + 4 + 4 + 4 + 4)
-        data[0] = finger_id
-        data[1:5] =   struct.pack('f', p)
-        data[5:9] =   struct.pack('f', i)
-        data[9:13] =  struct.pack('f', d)
-        data[13:17] = struct.pack('f', g)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, (finger_id, p, i, d, g), remote_err)[0]
 
     def HAND_ResetForce(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_RESET_FORCE, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_RESET_FORCE, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_RESET_FORCE, (), remote_err)[0]
 
     def HAND_SetCustom(self, hand_id, data, send_data_size, remote_err):
         err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_CUSTOM, data, send_data_size)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CUSTOM, self.timeout, data, remote_err)
+            timeout = self._command_timeout(hand_id, HAND_CMD_SET_CUSTOM)
+            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CUSTOM, timeout, data, remote_err)
         return err
 
-    def HAND_SetSelfTestLevel(self, hand_id, self_test_level, remote_err):
-        if not match_data_type(self_test_level, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = self_test_level
+    def set_custom(self, hand_id, speed=None, pos=None, angle=None, get=0, remote_err=None):
+        """
+        HAND_CMD_SET_CUSTOM with arrays, see custom.encode_custom() and custom.decode_custom().
+        Return (err, result), result['pos'], result['angle'], ... are the requested GET blocks, one entry per
+        motor, result is None if get is 0 or on error.
+        """
+        try:
+            data = encode_custom(speed, pos, angle, get)
+        except (OverflowError, ValueError, TypeError):
+            return HAND_RESP_DATA_INVALID, None
+
+        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_CUSTOM, data, len(data))
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        timeout = self._command_timeout(hand_id, HAND_CMD_SET_CUSTOM)
+        err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CUSTOM, timeout, None, remote_err)
+        if err != HAND_RESP_SUCCESS or get == 0:
+            return err, None
+
+        frame = self._tls.frame
+        result = decode_custom(data[0], memoryview(frame)[4 : 4 + frame[3]])
+        if result is None:
+            if self._stats is not None:
+                self._stats.on_rejected()
+            return HAND_RESP_DATA_INVALID, None
+
+        return HAND_RESP_SUCCESS, result
 
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_SELF_TEST_LEVEL, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_SELF_TEST_LEVEL, self.timeout, None, remote_err)
-        return err
+    def HAND_SetSelfTestLevel(self, hand_id, self_test_level, remote_err):
+        return self._execute(hand_id, HAND_CMD_SET_SELF_TEST_LEVEL, (self_test_level,), remote_err)[0]
 
     def HAND_SetBeepSwitch(self, hand_id, beep_on, remote_err):
-        if not match_data_type(beep_on, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = beep_on
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_BEEP_SWITCH, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_BEEP_SWITCH, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_BEEP_SWITCH, (beep_on,), remote_err)[0]
 
     def HAND_Beep(self, hand_id, duration, remote_err):
-        if not match_data_type(duration, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(2)
-        data[0] = duration & 0xFF
-        data[1] = (duration >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_BEEP, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_BEEP, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_BEEP, (duration,), remote_err)[0]
 
     def HAND_SetButtonPressedCnt(self, hand_id, pressed_cnt, remote_err):
-        if not match_data_type(pressed_cnt, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = pressed_cnt
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_BUTTON_PRESSED_CNT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_BUTTON_PRESSED_CNT, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_SET_BUTTON_PRESSED_CNT, (pressed_cnt,), remote_err)[0]
 
     def HAND_StartInit(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_START_INIT, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_START_INIT, self.timeout, None, remote_err)
-        return err
+        return self._execute(hand_id, HAND_CMD_START_INIT, (), remote_err)[0]
 
     def HAND_SetManufactureData(self, hand_id, key, sub_model, hw_revision, serial_number, customer_tag, remote_err):
-        data = bytearray(28)
-        data[0:2] = key
-        data[2] = sub_model
-        data[3] = hw_revision
-        data[4:20] = serial_number
-        data[20:28] = customer_tag
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, self.timeout, None, remote_err)
-        return err
+        args = (bytes(key), sub_model, hw_revision, bytes(serial_number), bytes(customer_tag))
+        return self._execute(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, args, remote_err)[0]
 
     def HAND_SetFingerSpeedCtrlParams(self, hand_id, brake_distance, accel_distance, speed_ratio, remote_err):
-        if not match_data_type(brake_distance, UINT16_T) or not match_data_type(accel_distance, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(8)
-        data[0] = brake_distance & 0xFF
-        data[1] = brake_distance >> 8 & 0xFF
-        data[2] = accel_distance & 0xFF
-        data[3] = accel_distance >> 8 & 0xFF
-        data[4:8] = struct.pack('f', speed_ratio)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_SPEED_CTRL_PARAMS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_SPEED_CTRL_PARAMS, self.timeout, None, remote_err)
-        return err
+        args = (brake_distance, accel_distance, speed_ratio)
+        return self._execute(hand_id, HAND_CMD_SET_SPEED_CTRL_PARAMS, args, remote_err)[0]
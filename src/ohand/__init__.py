@@ -1,4 +1,40 @@
 from .OHandSerialAPI import *
 from .OHandSerialAPI import __all__ as _ohandserialapi_all  
+from .AsyncOHandSerialAPI import *
+from .AsyncOHandSerialAPI import __all__ as _asyncohandserialapi_all
+from .request import *
+from .request import __all__ as _request_all
+from .codec import *
+from .codec import __all__ as _codec_all
+from .custom import *
+from .custom import __all__ as _custom_all
+from .cache import *
+from .cache import __all__ as _cache_all
+from .stats import *
+from .stats import __all__ as _stats_all
+from .timeouts import *
+from .timeouts import __all__ as _timeouts_all
+from .stream import *
+from .stream import __all__ as _stream_all
+from .setpoint import *
+from .setpoint import __all__ as _setpoint_all
+from .cyclic import *
+from .cyclic import __all__ as _cyclic_all
+from .fleet import *
+from .fleet import __all__ as _fleet_all
+from .mux import *
+from .mux import __all__ as _mux_all
+from .shm import *
+from .shm import __all__ as _shm_all
+from .worker import *
+from .worker import __all__ as _worker_all
+from .telemetry import *
+from .telemetry import __all__ as _telemetry_all
+from .daemon import *
+from .daemon import __all__ as _daemon_all
+from .trajectory import *
+from .trajectory import __all__ as _trajectory_all
+from .teleop import *
+from .teleop import __all__ as _teleop_all
 
-__all__ = _ohandserialapi_all
\ No newline at end of file
+__all__ = _ohandserialapi_all + _asyncohandserialapi_all + _request_all + _codec_all + _custom_all + _cache_all + _stats_all + _timeouts_all + _stream_all + _setpoint_all + _cyclic_all + _fleet_all + _mux_all + _shm_all + _worker_all + _telemetry_all + _daemon_all + _trajectory_all + _teleop_all
\ No newline at end of file
@@ -0,0 +1,115 @@
+import threading
+
+from .constants import *
+
+__all__ = [
+    'OHandCache',
+]
+
+# Getters of data only changed by this SDK's setters, or by resetting the hand
+CACHED_CMDS = frozenset(
+    (
+        HAND_CMD_GET_PROTOCOL_VERSION,
+        HAND_CMD_GET_FW_VERSION,
+        HAND_CMD_GET_HW_VERSION,
+        HAND_CMD_GET_CALI_DATA,
+        HAND_CMD_GET_FINGER_PID,
+        HAND_CMD_GET_FINGER_CURRENT_LIMIT,
+        HAND_CMD_GET_FINGER_FORCE_TARGET,
+        HAND_CMD_GET_FINGER_POS_LIMIT,
+        HAND_CMD_GET_FINGER_STOP_PARAMS,
+        HAND_CMD_GET_FINGER_FORCE_PID,
+        HAND_CMD_GET_SELF_TEST_LEVEL,
+        HAND_CMD_GET_BEEP_SWITCH,
+        HAND_CMD_GET_UID,
+        HAND_CMD_GET_SPEED_CTRL_PARAMS,
+        HAND_CMD_GET_MANUFACTURE_DATA,
+    )
+)
+
+# Setter -> getters it invalidates
+INVALIDATES = {
+    HAND_CMD_SET_CALI_DATA: (HAND_CMD_GET_CALI_DATA,),
+    HAND_CMD_SET_FINGER_PID: (HAND_CMD_GET_FINGER_PID,),
+    HAND_CMD_SET_FINGER_CURRENT_LIMIT: (HAND_CMD_GET_FINGER_CURRENT_LIMIT,),
+    HAND_CMD_SET_FINGER_FORCE_TARGET: (HAND_CMD_GET_FINGER_FORCE_TARGET,),
+    HAND_CMD_SET_FINGER_POS_LIMIT: (HAND_CMD_GET_FINGER_POS_LIMIT,),
+    HAND_CMD_SET_FINGER_STOP_PARAMS: (HAND_CMD_GET_FINGER_STOP_PARAMS,),
+    HAND_CMD_SET_FINGER_FORCE_PID: (HAND_CMD_GET_FINGER_FORCE_PID,),
+    HAND_CMD_SET_SELF_TEST_LEVEL: (HAND_CMD_GET_SELF_TEST_LEVEL,),
+    HAND_CMD_SET_BEEP_SWITCH: (HAND_CMD_GET_BEEP_SWITCH,),
+    HAND_CMD_SET_SPEED_CTRL_PARAMS: (HAND_CMD_GET_SPEED_CTRL_PARAMS,),
+    HAND_CMD_SET_MANUFACTURE_DATA: (HAND_CMD_GET_MANUFACTURE_DATA,),
+}
+
+# Commands after which nothing cached about the hand is trusted
+INVALIDATES_HAND = frozenset(
+    (
+        HAND_CMD_RESET,
+        HAND_CMD_POWER_OFF,
+        HAND_CMD_SET_NODE_ID,
+        HAND_CMD_CALIBRATE,
+        HAND_CMD_START_INIT,
+    )
+)
+
+
+class OHandCache:
+    """
+    Read-through cache of static device information, responses of CACHED_CMDS per (hand_id, cmd, request).
+    Setters invalidate the getters of what they change, see INVALIDATES and INVALIDATES_HAND. Invalidation
+    happens when the setter is sent, whether it succeeds or not.
+    """
+
+    def __init__(self):
+        self._entries = {}  # {hand_id: {(cmd, args): values}}
+        self._lock = threading.Lock()
+        self.hits = 0  # Requests answered from the cache
+        self.misses = 0  # Responses fetched from the hand and stored
+
+    def on_request(self, hand_id, cmd, args):
+        """Return the cached values answering the request, None to send it"""
+        if cmd in CACHED_CMDS:
+            with self._lock:
+                values = self._entries.get(hand_id, {}).get((cmd, tuple(args)))
+                if values is not None:
+                    self.hits += 1
+                return values
+
+        if cmd in INVALIDATES_HAND:
+            self.clear(hand_id)
+            if cmd == HAND_CMD_SET_NODE_ID and args:
+                self.clear(args[0])  # Anything cached about a former hand with the new id
+        else:
+            getters = INVALIDATES.get(cmd)
+            if getters is not None:
+                with self._lock:
+                    entries = self._entries.get(hand_id)
+                    if entries:
+                        for key in [key for key in entries if key[0] in getters]:
+                            del entries[key]
+
+        return None
+
+    def on_response(self, hand_id, cmd, args, values):
+        """Store a successful response to the request"""
+        if cmd in CACHED_CMDS:
+            with self._lock:
+                self._entries.setdefault(hand_id, {})[(cmd, tuple(args))] = values
+                self.misses += 1
+
+    def clear(self, hand_id=None):
+        """Drop what is cached about hand_id, all hands if None"""
+        with self._lock:
+            if hand_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(hand_id, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(entries) for entries in self._entries.values()),
+            }
@@ -0,0 +1,154 @@
+import struct
+
+from .constants import *
+
+__all__ = [
+    'CommandCodec',
+    'HAND_CMD_CODECS',
+]
+
+
+class Layout:
+    """Fixed struct layout of a payload, little endian unless fmt starts with a byte order character"""
+
+    __slots__ = ("struct",)
+
+    def __init__(self, fmt):
+        self.struct = struct.Struct(fmt if fmt[:1] in ("<", ">") else "<" + fmt)
+
+    def get(self, data):
+        return self.struct
+
+
+class VarLayout:
+    """
+    Layout with item counts depending on the data, fmt(*counts) is compiled once per counts and cached.
+    counts(data) gets the request arguments or the response payload.
+    """
+
+    __slots__ = ("_fmt", "_counts", "_structs")
+
+    def __init__(self, fmt, counts):
+        self._fmt = fmt
+        self._counts = counts
+        self._structs = {}
+
+    def get(self, data):
+        counts = self._counts(data)
+        layout = self._structs.get(counts)
+        if layout is None:
+            layout = self._structs[counts] = struct.Struct(self._fmt(*counts))
+        return layout
+
+
+class CommandCodec:
+    """
+    Request and response payload layouts of a HAND_CMD_*.
+    echo: the response starts with the first request argument, e.g. finger id, which must match.
+    """
+
+    __slots__ = ("cmd", "request", "response", "echo")
+
+    def __init__(self, cmd, request="", response="", echo=False):
+        self.cmd = cmd
+        self.request = request if isinstance(request, VarLayout) else Layout(request)
+        self.response = response if isinstance(response, VarLayout) else Layout(response)
+        self.echo = echo
+
+
+def _motor_cnt(payload):
+    # [target/value * motor_cnt][current * motor_cnt], 2 bytes each
+    return (len(payload) // 4,)
+
+
+_GET_ALL_U16 = VarLayout(lambda n: f"<{n}H{n}H", _motor_cnt)
+_GET_ALL_I16 = VarLayout(lambda n: f"<{n}h{n}h", _motor_cnt)
+# [value, speed] * motor_cnt, args are interleaved the same way
+_SET_ALL_U16 = VarLayout(lambda n: "<" + "HB" * n, lambda args: (len(args) // 2,))
+_SET_ALL_I16 = VarLayout(lambda n: "<" + "hB" * n, lambda args: (len(args) // 2,))
+
+# motor_cnt, thumb_root_pos_cnt, end_pos * motor_cnt, start_pos * motor_cnt, thumb_root_pos * thumb_root_pos_cnt
+_GET_CALI_DATA = VarLayout(
+    lambda n, m: f"<BB{n}H{n}H{m}H",
+    lambda payload: (payload[0], payload[1]) if len(payload) >= 2 else (0, 0),
+)
+# motor_cnt, end_pos * motor_cnt, start_pos * motor_cnt, thumb_root_pos_cnt, thumb_root_pos * thumb_root_pos_cnt
+_SET_CALI_DATA = VarLayout(
+    lambda n, m: f"<B{n}H{n}HB{m}H",
+    lambda args: (args[0], args[1 + 2 * args[0]]),
+)
+# finger_id, force_entry_cnt, force * force_entry_cnt
+_GET_FINGER_FORCE = VarLayout(
+    lambda n: f"<BB{n}B",
+    lambda payload: (payload[1],) if len(payload) >= 2 else (0,),
+)
+# total_use_time, total_open_times * motor_cnt
+_GET_USAGE_STAT = VarLayout(lambda n: f"<I{n}I", lambda payload: (max(len(payload) - 4, 0) // 4,))
+
+
+HAND_CMD_CODECS = {
+    codec.cmd: codec
+    for codec in (
+        # Chief GET commands
+        CommandCodec(HAND_CMD_GET_PROTOCOL_VERSION, response="BB"),  # minor, major
+        CommandCodec(HAND_CMD_GET_FW_VERSION, response="HBB"),  # revision, minor, major
+        CommandCodec(HAND_CMD_GET_HW_VERSION, response=">BBH"),  # hw_type, hw_ver, boot_version sent major first
+        CommandCodec(HAND_CMD_GET_CALI_DATA, response=_GET_CALI_DATA),
+        CommandCodec(HAND_CMD_GET_FINGER_PID, "B", "B4f", echo=True),  # finger_id, p, i, d, g
+        CommandCodec(HAND_CMD_GET_FINGER_CURRENT_LIMIT, "B", "BH", echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_CURRENT, "B", "BH", echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE_TARGET, "B", "BH", echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE, "B", _GET_FINGER_FORCE, echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_POS_LIMIT, "B", "BHH", echo=True),  # finger_id, low, high
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ABS, "B", "BHH", echo=True),  # finger_id, target, current
+        CommandCodec(HAND_CMD_GET_FINGER_POS, "B", "BHH", echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_ANGLE, "B", "Bhh", echo=True),
+        CommandCodec(HAND_CMD_GET_THUMB_ROOT_POS, response="HB"),  # raw_encoder, pos
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ABS_ALL, response=_GET_ALL_U16),
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ALL, response=_GET_ALL_U16),
+        CommandCodec(HAND_CMD_GET_FINGER_ANGLE_ALL, response=_GET_ALL_I16),
+        # finger_id, speed, stop_current, stop_after_period, retry_interval
+        CommandCodec(HAND_CMD_GET_FINGER_STOP_PARAMS, "B", "BHHHH", echo=True),
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE_PID, "B", "B4f", echo=True),
+        # Auxiliary GET commands
+        CommandCodec(HAND_CMD_GET_SELF_TEST_LEVEL, response="B"),
+        CommandCodec(HAND_CMD_GET_BEEP_SWITCH, response="B"),
+        CommandCodec(HAND_CMD_GET_BUTTON_PRESSED_CNT, response="B"),
+        CommandCodec(HAND_CMD_GET_UID, response="III"),
+        CommandCodec(HAND_CMD_GET_BATTERY_VOLTAGE, response="H"),
+        CommandCodec(HAND_CMD_GET_USAGE_STAT, "B", _GET_USAGE_STAT),
+        CommandCodec(HAND_CMD_GET_SPEED_CTRL_PARAMS, response="HHf"),  # brake_distance, accel_distance, speed_ratio
+        # sub_model, hw_revision, serial_number, customer_tag
+        CommandCodec(HAND_CMD_GET_MANUFACTURE_DATA, response="BB16s8s"),
+        # Chief SET commands
+        CommandCodec(HAND_CMD_RESET, "B"),
+        CommandCodec(HAND_CMD_POWER_OFF),
+        CommandCodec(HAND_CMD_SET_NODE_ID, "B"),
+        CommandCodec(HAND_CMD_CALIBRATE, "H"),
+        CommandCodec(HAND_CMD_SET_CALI_DATA, _SET_CALI_DATA),
+        CommandCodec(HAND_CMD_SET_FINGER_PID, "B4f"),
+        CommandCodec(HAND_CMD_SET_FINGER_CURRENT_LIMIT, "BH"),
+        CommandCodec(HAND_CMD_SET_FINGER_FORCE_TARGET, "BH"),
+        CommandCodec(HAND_CMD_SET_FINGER_POS_LIMIT, "BHH"),
+        CommandCodec(HAND_CMD_FINGER_START, "B"),
+        CommandCodec(HAND_CMD_FINGER_STOP, "B"),
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ABS, "BHB"),  # finger_id, raw_pos, speed
+        CommandCodec(HAND_CMD_SET_FINGER_POS, "BHB"),
+        CommandCodec(HAND_CMD_SET_FINGER_ANGLE, "BhB"),
+        CommandCodec(HAND_CMD_SET_THUMB_ROOT_POS, "BB"),
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ABS_ALL, _SET_ALL_U16),
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ALL, _SET_ALL_U16),
+        CommandCodec(HAND_CMD_SET_FINGER_ANGLE_ALL, _SET_ALL_I16),
+        CommandCodec(HAND_CMD_SET_FINGER_STOP_PARAMS, "BHHHH"),
+        CommandCodec(HAND_CMD_SET_FINGER_FORCE_PID, "B4f"),
+        CommandCodec(HAND_CMD_RESET_FORCE),
+        # Auxiliary SET commands
+        CommandCodec(HAND_CMD_SET_SELF_TEST_LEVEL, "B"),
+        CommandCodec(HAND_CMD_SET_BEEP_SWITCH, "B"),
+        CommandCodec(HAND_CMD_BEEP, "H"),
+        CommandCodec(HAND_CMD_SET_BUTTON_PRESSED_CNT, "B"),
+        CommandCodec(HAND_CMD_START_INIT),
+        CommandCodec(HAND_CMD_SET_MANUFACTURE_DATA, "2sBB16s8s"),  # key, sub_model, hw_revision, serial, customer
+        CommandCodec(HAND_CMD_SET_SPEED_CTRL_PARAMS, "HHf"),
+    )
+}
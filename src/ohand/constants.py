@@ -1,3 +1,5 @@
+import os as _os
+import tempfile as _tempfile
 from typing import Final
 
 
@@ -33,6 +35,18 @@ HAND_RESP_UNMATCHED_CMD: Final = 0x06  # local error, unmatched command between
 HAND_RESP_DATA_SIZE_TOO_BIG: Final = 0x07  # local error, size of data to send exceeds the buffer size
 HAND_RESP_DATA_INVALID: Final = 0x08  # local error, data content invalid
 
+# Response wait modes, see HAND_SetWaitMode()
+HAND_WAIT_POLL: Final = 0  # Poll recv_data_impl every 1ms
+HAND_WAIT_BLOCK: Final = 1  # Block on the transport or on frames fed by a reader thread
+
+# Overrun policies of OHandCyclicExecutor
+CYCLIC_SKIP: Final = 0  # Drop missed cycles, keep the phase of the schedule
+CYCLIC_COMPRESS: Final = 1  # Run missed cycles back to back until the schedule is caught up
+
+# Interpolation of OHandTrajectory
+TRAJECTORY_MIN_JERK: Final = 0  # Minimum jerk from waypoint to waypoint, at rest at each of them
+TRAJECTORY_CUBIC: Final = 1  # Cubic spline through all waypoints, at rest at the first and last one
+
 # Sub-commands for HAND_CMD_SET_CUSTOM
 SUB_CMD_SET_SPEED: Final = 1 << 0
 SUB_CMD_SET_POS: Final = 1 << 1
@@ -112,6 +126,16 @@ HAND_CMD_SET_SPEED_CTRL_PARAMS = 0x66  # Set speed control parameters
 CMD_ERROR_MASK: Final = 1 << 7  # bit mask for command error
 
 MAX_PROTOCOL_DATA_SIZE: Final = 64
+MAX_RX_FRAMES: Final = 16  # Decoded frames queued while waiting to be claimed by a response
+READER_RECV_TIMEOUT: Final = 50  # ms, longest block of the reader thread in recv_data_impl
+POLL_INTERVAL: Final = 1.0  # ms, period of recv_data_impl calls in HAND_WAIT_POLL
+TELEMETRY_SHM_NAME: Final = "ohand_telemetry"  # Default shared memory segment of OHandTelemetryPublisher
+# Default Unix socket of OHandDaemon, private to the user: in $XDG_RUNTIME_DIR, else named by uid in the temp dir
+DAEMON_SOCKET_PATH: Final = (
+    _os.path.join(_os.environ["XDG_RUNTIME_DIR"], "ohand.sock") if _os.environ.get("XDG_RUNTIME_DIR")
+    else _os.path.join(_tempfile.gettempdir(), f"ohand-{getattr(_os, 'getuid', lambda: 0)()}.sock")
+)
+PROTOCOL_HEADER: Final = b"\x55\xaa"  # Frame header of HAND_PROTOCOL_UART
 
 # Data type
 UINT8_T = 0
@@ -0,0 +1,86 @@
+import functools
+
+import numpy as np
+
+from .constants import *
+
+__all__ = [
+    'encode_custom',
+    'decode_custom',
+    'custom_dtype',
+]
+
+# SET blocks of the request in order after the flags byte: (flag, dtype)
+_SET_BLOCKS = (
+    (SUB_CMD_SET_SPEED, "<u2"),
+    (SUB_CMD_SET_POS, "<u2"),
+    (SUB_CMD_SET_ANGLE, "<i2"),
+)
+
+# GET blocks of the reply in order: (flag, field name, dtype), each holds one entry per motor
+_GET_BLOCKS = (
+    (SUB_CMD_GET_POS, "pos", "<u2"),
+    (SUB_CMD_GET_ANGLE, "angle", "<i2"),
+    (SUB_CMD_GET_CURRENT, "current", "<u2"),
+    (SUB_CMD_GET_FORCE, "force", "<u2"),
+    (SUB_CMD_GET_STATUS, "status", "u1"),
+)
+
+_GET_MASK = SUB_CMD_GET_POS | SUB_CMD_GET_ANGLE | SUB_CMD_GET_CURRENT | SUB_CMD_GET_FORCE | SUB_CMD_GET_STATUS
+
+# Reply bytes per motor for each flags value
+_ENTRY_SIZES = [
+    sum(np.dtype(dtype).itemsize for flag, _, dtype in _GET_BLOCKS if flags & flag) for flags in range(256)
+]
+
+
+def encode_custom(speed=None, pos=None, angle=None, get=0):
+    """
+    Build the HAND_CMD_SET_CUSTOM request: flags byte, then speed, pos and angle of each motor for those given.
+    Values are converted with np.asarray(), must be integers and in range of their type: uint16, uint16, int16.
+    Raise TypeError for non-integer values, ValueError for values out of range.
+    get: SUB_CMD_GET_* flags of the blocks to read back
+    """
+    flags = get & _GET_MASK
+    blocks = [b""]
+    for (flag, dtype), values in zip(_SET_BLOCKS, (speed, pos, angle)):
+        if values is not None:
+            flags |= flag
+            blocks.append(_encode_block(values, dtype))
+    blocks[0] = bytes((flags,))
+    return b"".join(blocks)
+
+
+def _encode_block(values, dtype):
+    # Checked before astype(), which would wrap out of range values and truncate floats silently
+    array = np.asarray(values)
+    if array.size == 0:
+        return b""
+    if array.dtype.kind not in "iu":
+        raise TypeError(f"values must be integers, not {array.dtype}")
+    info = np.iinfo(dtype)
+    if array.min() < info.min or array.max() > info.max:
+        raise ValueError(f"values must be in range {info.min}..{info.max}")
+    return array.astype(dtype).tobytes()
+
+
+@functools.lru_cache(maxsize=None)
+def custom_dtype(flags, motor_cnt):
+    """Structured dtype of the reply to flags, one (motor_cnt,) array field per requested GET block"""
+    return np.dtype([(name, dtype, (motor_cnt,)) for flag, name, dtype in _GET_BLOCKS if flags & flag])
+
+
+def decode_custom(flags, payload):
+    """
+    Decode the reply to a request with flags without copying it, fields of the result are read-only arrays.
+    Return the structured record, None if flags has no GET block or the payload size doesn't match.
+    """
+    entry_size = _ENTRY_SIZES[flags]
+    if entry_size == 0:
+        return None
+
+    motor_cnt, rest = divmod(len(payload), entry_size)
+    if rest != 0 or motor_cnt == 0:
+        return None
+
+    return np.frombuffer(payload, custom_dtype(flags & _GET_MASK, motor_cnt), count=1)[0]
@@ -0,0 +1,153 @@
+import threading
+import time
+
+from .constants import *
+from .stats import OHandSamples
+
+__all__ = [
+    'OHandCyclicExecutor',
+]
+
+class OHandCyclicExecutor:
+    """
+    Runs callback(cycle) followed by the hand I/O functions io at a fixed rate, on absolute deadlines of the
+    monotonic clock so that cycles don't drift. cycle counts scheduled cycles from 0, skipped ones included.
+    io is a list of functions without arguments, e.g. OHandSetpoints.flush.
+
+    A cycle overruns if it ends after the start of the next one. overrun_policy decides what happens to the
+    cycles missed meanwhile:
+    CYCLIC_SKIP: drop them, the next cycle starts at the next deadline in the future.
+    CYCLIC_COMPRESS: run them back to back without waiting until the schedule is caught up, at most
+    max_catch_up of them, the rest is dropped.
+
+    Sleeping overshoots by tens of us, spin_us > 0 busy waits the last part of each period for lower jitter at
+    the cost of CPU time. get_stats() reports jitter (start of a cycle after its deadline), callback and I/O time
+    per cycle, overruns and skipped cycles.
+    """
+
+    def __init__(self, rate_hz, callback, io=(), overrun_policy=CYCLIC_SKIP, max_catch_up=10, spin_us=0):
+        self.period_ns = int(1e9 / rate_hz)
+        self.callback = callback
+        self.io = list(io)
+        self.overrun_policy = overrun_policy
+        self.max_catch_up = max_catch_up
+        self.spin_ns = int(spin_us * 1000)
+        self._stop = threading.Event()  # Set by stop(), cleared by start() and when run() returns
+        self._thread = None
+        self._lock = threading.Lock()  # Guards the counters read by get_stats()
+        self._jitter = OHandSamples()
+        self._callback_time = OHandSamples()
+        self._io_time = OHandSamples()
+        self.cycles = 0  # Cycles run
+        self.overruns = 0  # Cycles ending after the start of the next one
+        self.skipped = 0  # Cycles dropped
+        self.io_errors = 0  # io functions returning something else than HAND_RESP_SUCCESS or None
+
+    def run(self, duration=None, cycles=None):
+        """
+        Run in the calling thread until stop(), for duration seconds or cycles cycles of this run. A stop() from
+        another thread before run() is entered makes it return at once.
+        """
+        period = self.period_ns
+        clock = time.perf_counter_ns
+        start = clock()
+        end = None if duration is None else start + int(duration * 1e9)
+        cycle = 0
+        catch_up = 0
+        stop = self._stop
+        stop_at = None if cycles is None else self.cycles + cycles  # self.cycles counts over all runs
+
+        while not stop.is_set():
+            if stop_at is not None and self.cycles >= stop_at:
+                break
+
+            deadline = start + cycle * period
+            now = clock()
+            if end is not None and deadline >= end:
+                break
+            if now < deadline:
+                self._wait(deadline, clock)
+                now = clock()
+
+            self._run_cycle(cycle, deadline, now, clock)
+
+            # Next cycle, or where to continue after an overrun
+            cycle += 1
+            now = clock()
+            next_deadline = start + cycle * period
+            if now <= next_deadline + period:
+                catch_up = 0
+                if now > next_deadline:
+                    with self._lock:
+                        self.overruns += 1
+                continue
+
+            with self._lock:
+                self.overruns += 1
+            if self.overrun_policy == CYCLIC_COMPRESS and catch_up < self.max_catch_up:
+                catch_up += 1
+                continue
+            missed = (now - next_deadline) // period + 1  # Cycles whose deadline passed
+            with self._lock:
+                self.skipped += missed
+            cycle += missed
+            catch_up = 0
+
+        stop.clear()
+
+    def _wait(self, deadline, clock):
+        spin = self.spin_ns
+        remaining = deadline - clock() - spin
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+        if spin:
+            while clock() < deadline:
+                pass
+
+    def _run_cycle(self, cycle, deadline, now, clock):
+        self.callback(cycle)
+        callback_end = clock()
+
+        io_errors = 0
+        for io in self.io:
+            err = io()
+            if err is not None and err != HAND_RESP_SUCCESS:
+                io_errors += 1
+        io_end = clock()
+
+        with self._lock:
+            self.cycles += 1
+            self.io_errors += io_errors
+            self._jitter.add(now - deadline)
+            self._callback_time.add(callback_end - now)
+            self._io_time.add(io_end - callback_end)
+
+    def start(self, duration=None, cycles=None):
+        """Run in a background thread, see run()"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, args=(duration, cycles), name="OHandCyclic",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop after the current cycle, callable from the callback and other threads"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            self._thread = None
+
+    def get_stats(self):
+        """Return the counters, jitter, callback and I/O time percentiles over the last cycles"""
+        with self._lock:
+            return {
+                "period_us": self.period_ns / 1000,
+                "cycles": self.cycles,
+                "overruns": self.overruns,
+                "skipped": self.skipped,
+                "io_errors": self.io_errors,
+                "jitter": self._jitter.summary(),
+                "callback_time": self._callback_time.summary(),
+                "io_time": self._io_time.summary(),
+            }
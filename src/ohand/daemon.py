@@ -0,0 +1,279 @@
+import argparse
+import os
+import socket
+import stat
+import struct
+import time
+
+from .constants import *
+from .mux import OHandMux
+
+__all__ = [
+    'OHandDaemon',
+]
+
+_MAX_CLIENT_TX = 64 * 1024  # Unsent response bytes after which a client that doesn't read is dropped
+
+
+def _getuid():
+    return os.getuid() if hasattr(os, "getuid") else 0
+
+
+def _peer_allowed(sock):
+    # Same user or root, where the kernel tells the peer's credentials
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    except OSError:
+        return False
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid in (_getuid(), 0)
+
+
+class _DaemonClient:
+    __slots__ = ("sock", "rx", "tx", "closed")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.rx = bytearray()  # Received bytes not yet parsed into requests
+        self.tx = bytearray()  # Response bytes not yet accepted by the socket
+        self.closed = False
+
+
+class OHandDaemon:
+    """
+    Owns the transport and OHandSerialAPI of a port and serves local client processes over a Unix domain
+    socket, so several tools can use one serial port at the same time. Clients connect with the daemon
+    interface (interface.daemon.Daemon_Init()) and use OHandSerialAPI as with a serial port.
+
+    Requests are the frames of HAND_PROTOCOL_UART, each prefixed with one priority byte, answers are the response
+    frames. Requests of all clients are pipelined through an OHandMux: sent by priority, lower values first, then
+    in order, and identical getters of several clients, e.g. two HAND_GetFingerPosAll() of the same hand, share
+    one bus transaction. Requests the hand doesn't answer get no response, as on the bus.
+
+    Everything runs in the thread of the mux, api must not be used otherwise meanwhile. Its recv_data_impl must not
+    block with time_out=0 (see OHandMux), a blocking read would delay the requests of all clients.
+
+    The socket is created with mode 0600, and where the peer credentials are available (SO_PEERCRED) only
+    processes of the same user or root are served, the hands can't be commanded by other users.
+    """
+
+    def __init__(self, api, path=DAEMON_SOCKET_PATH, max_in_flight=1):
+        self.api = api
+        self.path = path
+        self.max_in_flight = max_in_flight
+        self._mux = None  # OHandMux while serving
+        self._listener = None
+        self._clients = []
+        self.requests = 0  # Requests received
+        self.responses = 0  # Responses sent
+        self.lrc_errors = 0  # Requests with wrong LRC, answered with ERR_PROTOCOL_WRONG_LRC
+
+    def start(self):
+        """Listen on path and start serving, return HAND_RESP_INVALID_CONTEXT if another daemon listens there"""
+        if self._listener is not None:
+            return HAND_RESP_SUCCESS
+
+        if os.path.lexists(self.path):
+            st = os.lstat(self.path)
+            if not stat.S_ISSOCK(st.st_mode) or st.st_uid != _getuid():
+                print(f"Error: {self.path} exists and is not a socket of this user")
+                return HAND_RESP_INVALID_CONTEXT
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                print(f"Error: A daemon already listens on {self.path}")
+                return HAND_RESP_INVALID_CONTEXT
+            except OSError:
+                os.unlink(self.path)  # Left behind by a daemon that died
+            finally:
+                probe.close()
+
+        self._mux = OHandMux()
+        err = self._mux.add(self.api, self.max_in_flight)
+        if err != HAND_RESP_SUCCESS:
+            self._mux.close()
+            self._mux = None
+            return err
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)  # No window in which the socket is accessible by others
+        try:
+            listener.bind(self.path)
+            os.chmod(self.path, 0o600)
+            listener.listen()
+        except OSError as e:
+            print(f"Error: Listening on {self.path} failed, {e}")
+            listener.close()
+            self._mux.close()
+            self._mux = None
+            return HAND_RESP_INVALID_CONTEXT
+        finally:
+            os.umask(umask)
+        listener.setblocking(False)
+        self._listener = listener
+        self._mux.watch(listener, self._accept)
+        self._mux.start()
+        return HAND_RESP_SUCCESS
+
+    def stop(self):
+        """Disconnect all clients, stop listening and release the port"""
+        listener = self._listener
+        if listener is None:
+            return
+        self._mux.stop()  # Releases the port, nothing runs in the mux thread any more
+        for client in list(self._clients):
+            self._close(client)
+        self._mux.close()
+        self._mux = None
+        listener.close()
+        self._listener = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def get_stats(self):
+        """Return client and request counters, with those of the mux under 'mux'"""
+        return {
+            "clients": len(self._clients),
+            "requests": self.requests,
+            "responses": self.responses,
+            "lrc_errors": self.lrc_errors,
+            "mux": None if self._mux is None else self._mux.get_stats(),
+        }
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        if not _peer_allowed(sock):
+            print("Daemon client of another user refused")
+            sock.close()
+            return
+        sock.setblocking(False)
+        client = _DaemonClient(sock)
+        self._clients.append(client)
+        self._mux.watch(sock, lambda: self._receive(client))
+
+    def _close(self, client):
+        if client.closed:
+            return
+        client.closed = True
+        self._clients.remove(client)
+        if self._mux is not None:
+            self._mux.unwatch(client.sock)
+        client.sock.close()
+
+    def _receive(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(client)
+            return
+        self._flush(client)
+
+        rx = client.rx
+        rx += data
+        header_len = len(PROTOCOL_HEADER)
+        while len(rx) >= 1 + header_len + 4:
+            # priority, header, addressed node id, client node id, command, byte count, data..., lrc
+            nb_data = rx[1 + header_len + 3]
+            if rx[1 : 1 + header_len] != PROTOCOL_HEADER or nb_data > MAX_PROTOCOL_DATA_SIZE:
+                print("Daemon client sent an invalid request, disconnected")
+                self._close(client)
+                return
+            end = 1 + header_len + 4 + nb_data + 1
+            if len(rx) < end:
+                break
+
+            priority = rx[0]
+            frame = bytes(rx[1 + header_len : end])
+            del rx[:end]
+            self.requests += 1
+            self._request(client, priority, frame)
+
+    def _request(self, client, priority, frame):
+        addr, master, cmd, nb_data = frame[:4]
+        if self.api.HAND_ProtocolLRC(frame[:-1]) != frame[-1]:
+            self.lrc_errors += 1
+            self._respond(client, master, addr, cmd | CMD_ERROR_MASK, bytes((ERR_PROTOCOL_WRONG_LRC,)))
+            return
+
+        remote_err = []
+        future = self._mux.submit_raw(self.api, addr, cmd, frame[4 : 4 + nb_data], remote_err, priority=priority)
+
+        def done(future):
+            err, payload = future.result()
+            if err == HAND_RESP_SUCCESS:
+                self._respond(client, master, addr, cmd, payload)
+            elif err == HAND_RESP_HAND_ERROR and remote_err:
+                self._respond(client, master, addr, cmd | CMD_ERROR_MASK, bytes(remote_err[:1]))
+
+        future.add_done_callback(done)
+
+    def _respond(self, client, master, addr, cmd, payload):
+        if client.closed:
+            return
+        body = bytes((master, addr, cmd, len(payload))) + payload
+        client.tx += PROTOCOL_HEADER + body + bytes((self.api.HAND_ProtocolLRC(body),))
+        self.responses += 1
+        self._flush(client)
+
+    def _flush(self, client):
+        if not client.tx:
+            return
+        try:
+            sent = client.sock.send(client.tx)
+            del client.tx[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._close(client)
+            return
+        if len(client.tx) > _MAX_CLIENT_TX:
+            print("Daemon client doesn't read its responses, disconnected")
+            self._close(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the hands on a serial port to local processes")
+    parser.add_argument("port", help="serial port, e.g. /dev/ttyUSB0")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--socket", default=DAEMON_SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--address-master", type=int, default=0x01, help="node id of the daemon on the bus")
+    args = parser.parse_args()
+
+    from .OHandSerialAPI import OHandSerialAPI
+    from .interface.uart import uart_interface
+
+    serial_port = uart_interface.Serial_Init(args.port, args.baudrate)
+    if serial_port is None:
+        return 1
+
+    api = OHandSerialAPI(serial_port, HAND_PROTOCOL_UART, args.address_master, uart_interface.send_data_impl,
+                         uart_interface.recv_data_impl)
+    api.HAND_SetTimerFunction(uart_interface.get_milli_seconds_impl, uart_interface.delay_milli_seconds_impl)
+
+    daemon = OHandDaemon(api, args.socket)
+    if daemon.start() != HAND_RESP_SUCCESS:
+        return 1
+    print(f"Serving {args.port} on {args.socket}, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import *
+
+__all__ = [
+    'OHandFleet',
+]
+
+
+class _Port:
+    __slots__ = ("api", "executor", "hands")
+
+    def __init__(self, api, executor):
+        self.api = api
+        self.executor = executor  # Single worker thread, owns all I/O of the port
+        self.hands = {}  # {key: hand_id}
+
+
+class OHandFleet:
+    """
+    Hands on several ports (UART adapters, CAN buses), each port driven by its own worker thread so ports work in
+    parallel while commands to hands of one port are serialized. Hands are addressed by key, their hand id
+    unless given otherwise, so hands with the same id on different buses can be told apart.
+
+    Batch operations run on all ports at the same time and return {key: (err, value, elapsed_ms)}, value is
+    None on error and elapsed_ms the time of the hand's commands. A hand whose function raised gets
+    HAND_RESP_HAND_ERROR with the exception as value, the other hands are not affected.
+    """
+
+    def __init__(self):
+        self._ports = []
+        self._routes = {}  # {key: (_Port, hand_id)}
+
+    def add_port(self, api, hands):
+        """
+        Add a configured OHandSerialAPI and its hands, hands is a list of hand ids or {key: hand_id}.
+        Return HAND_RESP_DATA_INVALID if a key is already used, HAND_RESP_SUCCESS otherwise.
+        """
+        hands = dict(hands) if isinstance(hands, dict) else {hand_id: hand_id for hand_id in hands}
+        if any(key in self._routes for key in hands):
+            return HAND_RESP_DATA_INVALID
+
+        name = f"OHandFleet-{len(self._ports)}"
+        port = _Port(api, ThreadPoolExecutor(max_workers=1, thread_name_prefix=name))
+        port.hands = hands
+        self._ports.append(port)
+        for key, hand_id in hands.items():
+            self._routes[key] = (port, hand_id)
+        return HAND_RESP_SUCCESS
+
+    def keys(self):
+        return list(self._routes)
+
+    def get_api(self, key):
+        """Return (api, hand_id) of hand key, None if unknown. Use submit() to not race with the port worker."""
+        route = self._routes.get(key)
+        return None if route is None else (route[0].api, route[1])
+
+    def submit(self, key, func, *args):
+        """
+        Run func(api, hand_id, *args) on the worker of the port of hand key, return a concurrent.futures.Future
+        of its result, None if key is unknown.
+        """
+        route = self._routes.get(key)
+        if route is None:
+            return None
+        port, hand_id = route
+        return port.executor.submit(func, port.api, hand_id, *args)
+
+    def call(self, key, method, *args):
+        """
+        Run api.method(hand_id, *args) on the port worker of hand key and wait for it, e.g.
+        fleet.call("left", "HAND_SetFingerPosAll", pos, speed, 6, []). Return its result, HAND_RESP_DATA_INVALID if
+        key is unknown.
+        """
+        future = self.submit(key, lambda api, hand_id: getattr(api, method)(hand_id, *args))
+        return HAND_RESP_DATA_INVALID if future is None else future.result()
+
+    def batch(self, func, keys=None):
+        """
+        Run func(api, hand_id) -> (err, value) for hands keys (default all), ports in parallel, hands of a port
+        one after the other. Return {key: (err, value, elapsed_ms)}.
+        """
+        keys = self.keys() if keys is None else keys
+        return self._batch({key: func for key in keys})
+
+    def _batch(self, funcs):
+        # funcs: {key: func(api, hand_id) -> (err, value)}
+        jobs = {}  # {_Port: [(key, hand_id, func)]}
+        results = {}
+        for key, func in funcs.items():
+            route = self._routes.get(key)
+            if route is None:
+                results[key] = (HAND_RESP_DATA_INVALID, None, 0.0)
+            else:
+                jobs.setdefault(route[0], []).append((key, route[1], func))
+
+        futures = [port.executor.submit(self._run_port, port.api, hands) for port, hands in jobs.items()]
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    @staticmethod
+    def _run_port(api, hands):
+        results = {}
+        for key, hand_id, func in hands:
+            start = time.perf_counter_ns()
+            try:
+                err, value = func(api, hand_id)
+                if err != HAND_RESP_SUCCESS:
+                    value = None
+            except Exception as e:
+                err, value = HAND_RESP_HAND_ERROR, e
+            results[key] = (err, value, (time.perf_counter_ns() - start) / 1e6)
+        return results
+
+    def set_pos_all(self, poses, speed=None, motor_cnt=MAX_MOTOR_CNT):
+        """
+        HAND_SetFingerPosAll on several hands at once, poses is {key: pos} or one pos for all hands,
+        speed one list for all hands, default full speed. Return {key: (err, None, elapsed_ms)}.
+        """
+        speed = [255] * motor_cnt if speed is None else speed
+        if not isinstance(poses, dict):
+            poses = {key: poses for key in self._routes}
+
+        def setter(pos):
+            return lambda api, hand_id: (api.HAND_SetFingerPosAll(hand_id, pos, speed, motor_cnt, []), None)
+
+        return self._batch({key: setter(pos) for key, pos in poses.items()})
+
+    def snapshot(self, keys=None, motor_cnt=MAX_MOTOR_CNT):
+        """
+        Read target and current positions of hands keys (default all), return
+        {key: (err, (target_pos, current_pos), elapsed_ms)}.
+        """
+
+        def read(api, hand_id):
+            target, current, cnt = [0] * motor_cnt, [0] * motor_cnt, [motor_cnt]
+            err = api.HAND_GetFingerPosAll(hand_id, target, current, cnt, [])
+            err = err if isinstance(err, int) else err[0]  # A bare error code on HAND_RESP_DATA_SIZE_TOO_BIG
+            return err, (target[: cnt[0]], current[: cnt[0]])
+
+        return self.batch(read, keys)
+
+    def close(self):
+        """Wait for queued commands and stop the port workers, the APIs stay open"""
+        for port in self._ports:
+            port.executor.shutdown(wait=True)
+        self._ports.clear()
+        self._routes.clear()
@@ -38,10 +38,11 @@ def send_data_impl(addr, data, length, context):
 
 
 # Receive data function (matches OHandSerialAPI interface)
-def recv_data_impl(context, api_instance=None):
+def recv_data_impl(context, api_instance=None, time_out=None):
     """
     Receive CAN data and process.
     Interface matches OHandSerialAPI: (context)
+    With time_out (ms), block until a CAN frame arrives or time_out passes
     """
     if not context:
         print("Error: null context")
@@ -54,8 +55,8 @@ def recv_data_impl(context, api_instance=None):
         return 1
 
     try:
-        # Non-blocking receive (timeout 0.005 seconds)
-        msg = can_interface.recv(timeout=0.005)
+        # Non-blocking receive (timeout 0.005 seconds) unless a deadline is given
+        msg = can_interface.recv(timeout=0.005 if time_out is None else time_out / 1000.0)
         if msg is not None:
             # Print received CAN frame info
             # print(f"Received frame: ID=0x{msg.arbitration_id:03X}, LEN={msg.dlc}, DATA=", end="")
@@ -63,10 +64,9 @@ def recv_data_impl(context, api_instance=None):
             #     print(f"{byte:02X} ", end="")
             # print()
 
-            # If the message is sent to the master device, call HAND_OnData
+            # If the message is sent to the master device, call HAND_OnBytes
             if msg.arbitration_id == 0x01:  # ADDRESS_MASTER
-                for byte in msg.data:
-                    api_instance.HAND_OnData(byte)
+                api_instance.HAND_OnBytes(msg.data)
     except can.CanError as e:
         print(f"CAN receive error: {e}")
     except Exception as e:
@@ -78,11 +78,12 @@ _start_time = None
 
 
 def get_milli_seconds_impl():
-    """Return milliseconds since program start"""
+    """Return milliseconds since program start as float"""
     global _start_time
     if _start_time is None:
-        _start_time = time.time() * 1000  # Initialize start time
-    return int(time.time() * 1000 - _start_time)
+        _start_time = time.monotonic_ns()  # Initialize start time
+    # Monotonic, unaffected by wall clock adjustments, with fractions of milliseconds
+    return (time.monotonic_ns() - _start_time) / 1e6
 
 
 def delay_milli_seconds_impl(ms):
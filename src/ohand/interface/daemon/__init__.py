@@ -0,0 +1,4 @@
+from .daemon_interface import *
+from .daemon_interface import __all__ as _daemon_all
+
+__all__ = _daemon_all
\ No newline at end of file
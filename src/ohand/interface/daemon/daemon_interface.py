@@ -0,0 +1,115 @@
+import select
+import socket
+import time
+
+from ...constants import *
+
+__all__ = [
+    'send_data_impl',
+    'recv_data_impl',
+    'get_milli_seconds_impl',
+    'delay_milli_seconds_impl',
+    'Daemon_Init',
+    'DaemonLink',
+]
+
+
+class DaemonLink:
+    """
+    Connection to an OHandDaemon, used like a serial port by OHandSerialAPI: write() sends request frames,
+    prefixed with priority (0-255, lower values are sent to the bus first), read() returns response frames.
+    """
+
+    def __init__(self, sock, priority=0):
+        self.sock = sock
+        self.priority = priority
+        self.closed = False
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def write(self, data):
+        self.sock.sendall(bytes((self.priority,)) + bytes(data))
+
+    def read(self, size, timeout=None):
+        """Return up to size bytes or more if available, b"" after timeout seconds, don't wait if None"""
+        if timeout is not None and not select.select([self.sock], [], [], timeout)[0]:
+            return b""
+        try:
+            data = self.sock.recv(max(size, 4096), socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return b""
+        if not data:
+            self.closed = True  # Daemon gone
+        return data
+
+    def close(self):
+        self.sock.close()
+
+
+# Send data function (matches OHandSerialAPI interface)
+def send_data_impl(addr, data, length, context):
+    """
+    Send a request frame to the daemon
+    Interface consistent with OHandSerialAPI: (addr, data, length, private_data)
+    """
+    if not context or not hasattr(context, 'write'):
+        print("Error: Daemon link not properly initialized")
+        return 1
+
+    try:
+        context.write(data[:length])
+        return 0
+    except OSError as e:
+        print(f"Daemon send failed, error: {e}")
+        return 1
+
+
+# Receive data function (matches OHandSerialAPI interface)
+def recv_data_impl(context, api_instance=None, time_out=None):
+    """
+    Receive response frames of the daemon and process them like the UART interface
+    With time_out (ms), block until data arrives or time_out passes
+    """
+    if not context or not hasattr(context, 'read'):
+        print("Error: Daemon link not properly initialized")
+        return
+
+    try:
+        msg_bytes = context.read(4096, None if time_out is None else time_out / 1000.0)
+    except OSError as e:
+        print(f"Daemon receive error: {e}")
+        return
+
+    if msg_bytes and api_instance:
+        api_instance.HAND_OnBytes(msg_bytes)
+    elif context.closed and time_out:
+        time.sleep(time_out / 1000.0)  # Don't spin on a closed link
+
+
+_start_time = time.monotonic_ns()
+
+
+def get_milli_seconds_impl():
+    """Return milliseconds since the module was loaded as float"""
+    return (time.monotonic_ns() - _start_time) / 1e6
+
+
+def delay_milli_seconds_impl(ms):
+    """Pause execution for specified milliseconds"""
+    time.sleep(ms / 1000.0)
+
+
+def Daemon_Init(path=DAEMON_SOCKET_PATH, priority=0):
+    """
+    Connect to the OHandDaemon listening on path, return the DaemonLink to pass as private_data to OHandSerialAPI
+    Commands are queued by the daemon with priority, lower values first
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        print(f"\nConnected to hand daemon: {path}")
+        return DaemonLink(sock, priority)
+    except OSError as e:
+        print(f"\nError: Connecting to hand daemon failed, {str(e)}")
+        return None
@@ -0,0 +1,6 @@
+from .sim_interface import *
+from .sim_interface import __all__ as _sim_all
+from .sim_device import *
+from .sim_device import __all__ as _sim_device_all
+
+__all__ = _sim_all + _sim_device_all
\ No newline at end of file
@@ -0,0 +1,484 @@
+import math
+import struct
+import time
+
+from ...constants import *
+
+__all__ = [
+    'SimHand',
+]
+
+MOTOR_STATUS_IDLE = 0  # Target reached
+MOTOR_STATUS_RUNNING = 1
+
+_FINGER_CNT = 5  # Motors with force sensors, the thumb root motor follows them
+_FORCE_ENTRIES = MAX_FORCE_ENTRIES // _FINGER_CNT
+
+# (request, response) payload formats of the commands with a fixed layout, little endian, written from the
+# protocol specification on purpose: SimHand must not share the layouts of codec.HAND_CMD_CODECS it tests
+_LAYOUTS = {
+    cmd: (struct.Struct(request), struct.Struct(response))
+    for cmd, request, response in (
+        (HAND_CMD_GET_PROTOCOL_VERSION, "<", "<BB"),  # minor, major
+        (HAND_CMD_GET_FW_VERSION, "<", "<HBB"),  # revision, minor, major
+        (HAND_CMD_GET_HW_VERSION, "<", ">BBH"),  # hw_type, hw_ver, boot_version, sent high byte first
+        (HAND_CMD_GET_FINGER_PID, "<B", "<Bffff"),  # finger_id, p, i, d, g
+        (HAND_CMD_GET_FINGER_CURRENT_LIMIT, "<B", "<BH"),  # finger_id, current_limit
+        (HAND_CMD_GET_FINGER_CURRENT, "<B", "<BH"),  # finger_id, current
+        (HAND_CMD_GET_FINGER_FORCE_TARGET, "<B", "<BH"),  # finger_id, force_target
+        (HAND_CMD_GET_FINGER_POS_LIMIT, "<B", "<BHH"),  # finger_id, low_limit, high_limit
+        (HAND_CMD_GET_FINGER_POS_ABS, "<B", "<BHH"),  # finger_id, target_pos, current_pos
+        (HAND_CMD_GET_FINGER_POS, "<B", "<BHH"),  # finger_id, target_pos, current_pos
+        (HAND_CMD_GET_FINGER_ANGLE, "<B", "<Bhh"),  # finger_id, target_angle, current_angle
+        (HAND_CMD_GET_THUMB_ROOT_POS, "<", "<HB"),  # raw_encoder, pos
+        # finger_id, speed, stop_current, stop_after_period, retry_interval
+        (HAND_CMD_GET_FINGER_STOP_PARAMS, "<B", "<BHHHH"),
+        (HAND_CMD_GET_FINGER_FORCE_PID, "<B", "<Bffff"),  # finger_id, p, i, d, g
+        (HAND_CMD_GET_SELF_TEST_LEVEL, "<", "<B"),
+        (HAND_CMD_GET_BEEP_SWITCH, "<", "<B"),
+        (HAND_CMD_GET_BUTTON_PRESSED_CNT, "<", "<B"),
+        (HAND_CMD_GET_UID, "<", "<III"),
+        (HAND_CMD_GET_BATTERY_VOLTAGE, "<", "<H"),  # mV
+        (HAND_CMD_GET_SPEED_CTRL_PARAMS, "<", "<HHf"),  # brake_distance, accel_distance, speed_ratio
+        (HAND_CMD_GET_MANUFACTURE_DATA, "<", "<BB16s8s"),  # sub_model, hw_revision, serial_number, customer_tag
+        (HAND_CMD_RESET, "<B", "<"),  # mode
+        (HAND_CMD_POWER_OFF, "<", "<"),
+        (HAND_CMD_SET_NODE_ID, "<B", "<"),  # new_id
+        (HAND_CMD_CALIBRATE, "<H", "<"),  # key
+        (HAND_CMD_SET_FINGER_PID, "<Bffff", "<"),
+        (HAND_CMD_SET_FINGER_CURRENT_LIMIT, "<BH", "<"),
+        (HAND_CMD_SET_FINGER_FORCE_TARGET, "<BH", "<"),
+        (HAND_CMD_SET_FINGER_POS_LIMIT, "<BHH", "<"),
+        (HAND_CMD_FINGER_START, "<B", "<"),  # finger_id_bits
+        (HAND_CMD_FINGER_STOP, "<B", "<"),  # finger_id_bits
+        (HAND_CMD_SET_FINGER_POS_ABS, "<BHB", "<"),  # finger_id, raw_pos, speed
+        (HAND_CMD_SET_FINGER_POS, "<BHB", "<"),  # finger_id, pos, speed
+        (HAND_CMD_SET_FINGER_ANGLE, "<BhB", "<"),  # finger_id, angle, speed
+        (HAND_CMD_SET_THUMB_ROOT_POS, "<BB", "<"),  # pos, speed
+        (HAND_CMD_SET_FINGER_STOP_PARAMS, "<BHHHH", "<"),
+        (HAND_CMD_SET_FINGER_FORCE_PID, "<Bffff", "<"),
+        (HAND_CMD_RESET_FORCE, "<", "<"),
+        (HAND_CMD_SET_SELF_TEST_LEVEL, "<B", "<"),
+        (HAND_CMD_SET_BEEP_SWITCH, "<B", "<"),
+        (HAND_CMD_BEEP, "<H", "<"),  # duration
+        (HAND_CMD_SET_BUTTON_PRESSED_CNT, "<B", "<"),
+        (HAND_CMD_START_INIT, "<", "<"),
+        (HAND_CMD_SET_MANUFACTURE_DATA, "<2sBB16s8s", "<"),  # key, sub_model, hw_revision, serial, customer_tag
+        (HAND_CMD_SET_SPEED_CTRL_PARAMS, "<HHf", "<"),
+    )
+}
+
+
+class _SimMotor:
+    __slots__ = (
+        "pos", "target", "speed", "velocity",
+        "start_pos", "end_pos", "low_limit", "high_limit", "angle_min", "angle_max",
+        "pid", "force_pid", "current_limit", "force_target", "stop_params", "open_times",
+    )
+
+    def __init__(self, angle_max=9000):
+        self.pos = 0.0  # Logical position, [0, 65535]
+        self.target = 0.0
+        self.speed = 1.0  # (0, 1], scales the time constant
+        self.velocity = 0.0  # Logical position units per second
+        self.start_pos = 1000  # Absolute position of logical 0
+        self.end_pos = 64000  # Absolute position of logical 65535
+        self.low_limit = 0
+        self.high_limit = 65535
+        self.angle_min = 0  # First joint angle in 0.01 degree at logical 0 and 65535
+        self.angle_max = angle_max
+        self.pid = (250.0, 2.0, 250.0, 1.0)
+        self.force_pid = (1.0, 0.0, 0.0, 1.0)
+        self.current_limit = 1000  # mA
+        self.force_target = 0
+        self.stop_params = (1000, 800, 100, 500)  # speed, stop_current, stop_after_period, retry_interval
+        self.open_times = 0
+
+    def abs_pos(self):
+        return round(self.start_pos + (self.end_pos - self.start_pos) * self.pos / 65535)
+
+    def angle(self, pos):
+        return round(self.angle_min + (self.angle_max - self.angle_min) * pos / 65535)
+
+    def set_target(self, pos, speed):
+        self.target = min(max(float(pos), 0.0), 65535.0)
+        self.speed = max(speed, 1e-3)
+        self.open_times += 1
+
+    def set_target_abs(self, raw_pos, speed):
+        raw_pos = min(max(raw_pos, self.low_limit), self.high_limit)
+        span = self.end_pos - self.start_pos
+        self.set_target((raw_pos - self.start_pos) * 65535 / span if span else 0, speed)
+
+    def set_target_angle(self, angle, speed):
+        span = self.angle_max - self.angle_min
+        self.set_target((angle - self.angle_min) * 65535 / span if span else 0, speed)
+
+
+class SimHand:
+    """
+    Simulated OHand answering every HAND_CMD_* like the firmware, including CMD_ERROR_MASK error responses.
+    Motors follow their targets with first-order dynamics, the time constant tau_ms is scaled up by slower
+    speeds. State advances lazily on each request from clock, seconds as float.
+    """
+
+    def __init__(self, node_id=0x02, motor_cnt=MAX_MOTOR_CNT, tau_ms=50.0, clock=time.monotonic):
+        self.node_id = node_id
+        self.motor_cnt = motor_cnt
+        self.tau = tau_ms / 1000.0
+        self.clock = clock
+        self.protocol_version = (0, 1)  # minor, major
+        self.fw_version = (0, 3, 1)  # revision, minor, major
+        self.hw_version = (1, 2, 0x0102)  # hw_type, hw_ver, boot_version
+        self.uid = (0x4F48414E, 0x44534D31, node_id)
+        self.battery_voltage = 12000  # mV
+        self.self_test_level = 1
+        self.beep_switch = 1
+        self.button_pressed_cnt = 0
+        self.speed_ctrl_params = (1000, 1000, 1.0)  # brake_distance, accel_distance, speed_ratio
+        self.manufacture_data = (0, 1, bytes(range(16)), b"SIMULATE")  # sub_model, hw_revision, serial, tag
+        self.thumb_root_pos = [2000, 30000, 60000]  # Absolute positions of the thumb root presets
+        self.thumb_root_preset = 0
+        self.motors = [_SimMotor() for _ in range(motor_cnt)]
+        self.started = self.clock()
+        self.last_update = self.started
+        self.requests = 0  # Frames handled, errors included
+
+        # Commands with a fixed layout, see _LAYOUTS, the others are parsed by their handler
+        self._handlers = {
+            HAND_CMD_GET_PROTOCOL_VERSION: lambda: self.protocol_version,
+            HAND_CMD_GET_FW_VERSION: lambda: self.fw_version,
+            HAND_CMD_GET_HW_VERSION: lambda: self.hw_version,
+            HAND_CMD_GET_FINGER_PID: lambda finger_id: (finger_id, *self._motor(finger_id).pid),
+            HAND_CMD_GET_FINGER_CURRENT_LIMIT: lambda finger_id: (finger_id, self._motor(finger_id).current_limit),
+            HAND_CMD_GET_FINGER_CURRENT: lambda finger_id: (finger_id, self._current(self._motor(finger_id))),
+            HAND_CMD_GET_FINGER_FORCE_TARGET: lambda finger_id: (finger_id, self._motor(finger_id).force_target),
+            HAND_CMD_GET_FINGER_POS_LIMIT: self._get_pos_limit,
+            HAND_CMD_GET_FINGER_POS_ABS: self._get_pos_abs,
+            HAND_CMD_GET_FINGER_POS: self._get_pos,
+            HAND_CMD_GET_FINGER_ANGLE: self._get_angle,
+            HAND_CMD_GET_THUMB_ROOT_POS: self._get_thumb_root_pos,
+            HAND_CMD_GET_FINGER_STOP_PARAMS: lambda finger_id: (finger_id, *self._motor(finger_id).stop_params),
+            HAND_CMD_GET_FINGER_FORCE_PID: lambda finger_id: (finger_id, *self._motor(finger_id).force_pid),
+            HAND_CMD_GET_SELF_TEST_LEVEL: lambda: (self.self_test_level,),
+            HAND_CMD_GET_BEEP_SWITCH: lambda: (self.beep_switch,),
+            HAND_CMD_GET_BUTTON_PRESSED_CNT: lambda: (self.button_pressed_cnt,),
+            HAND_CMD_GET_UID: lambda: self.uid,
+            HAND_CMD_GET_BATTERY_VOLTAGE: lambda: (self.battery_voltage,),
+            HAND_CMD_GET_SPEED_CTRL_PARAMS: lambda: self.speed_ctrl_params,
+            HAND_CMD_GET_MANUFACTURE_DATA: lambda: self.manufacture_data,
+            HAND_CMD_RESET: self._reset,
+            HAND_CMD_POWER_OFF: lambda: (),
+            HAND_CMD_SET_NODE_ID: self._set_node_id,
+            HAND_CMD_CALIBRATE: self._calibrate,
+            HAND_CMD_SET_FINGER_PID: self._set_pid,
+            HAND_CMD_SET_FINGER_CURRENT_LIMIT: self._set_current_limit,
+            HAND_CMD_SET_FINGER_FORCE_TARGET: self._set_force_target,
+            HAND_CMD_SET_FINGER_POS_LIMIT: self._set_pos_limit,
+            HAND_CMD_FINGER_START: lambda finger_id_bits: (),
+            HAND_CMD_FINGER_STOP: self._finger_stop,
+            HAND_CMD_SET_FINGER_POS_ABS: self._set_pos_abs,
+            HAND_CMD_SET_FINGER_POS: self._set_pos,
+            HAND_CMD_SET_FINGER_ANGLE: self._set_angle,
+            HAND_CMD_SET_THUMB_ROOT_POS: self._set_thumb_root_pos,
+            HAND_CMD_SET_FINGER_STOP_PARAMS: self._set_stop_params,
+            HAND_CMD_SET_FINGER_FORCE_PID: self._set_force_pid,
+            HAND_CMD_RESET_FORCE: lambda: (),
+            HAND_CMD_SET_SELF_TEST_LEVEL: self._set_self_test_level,
+            HAND_CMD_SET_BEEP_SWITCH: self._set_beep_switch,
+            HAND_CMD_BEEP: lambda duration: (),
+            HAND_CMD_SET_BUTTON_PRESSED_CNT: self._set_button_pressed_cnt,
+            HAND_CMD_START_INIT: lambda: (),
+            HAND_CMD_SET_MANUFACTURE_DATA: self._set_manufacture_data,
+            HAND_CMD_SET_SPEED_CTRL_PARAMS: self._set_speed_ctrl_params,
+        }
+        # Commands with a variable request or response layout, called with the payload, return payload bytes
+        self._var_handlers = {
+            HAND_CMD_GET_CALI_DATA: self._get_cali_data,
+            HAND_CMD_GET_FINGER_FORCE: self._get_finger_force,
+            HAND_CMD_GET_FINGER_POS_ABS_ALL: lambda payload: self._get_all(payload, lambda m: m.abs_pos(), "H"),
+            HAND_CMD_GET_FINGER_POS_ALL: lambda payload: self._get_all(payload, lambda m: round(m.pos), "H"),
+            HAND_CMD_GET_FINGER_ANGLE_ALL: lambda payload: self._get_all(payload, lambda m: m.angle(m.pos), "h"),
+            HAND_CMD_GET_USAGE_STAT: self._get_usage_stat,
+            HAND_CMD_SET_CALI_DATA: self._set_cali_data,
+            HAND_CMD_SET_FINGER_POS_ABS_ALL: lambda payload: self._set_all(payload, "H", _SimMotor.set_target_abs),
+            HAND_CMD_SET_FINGER_POS_ALL: lambda payload: self._set_all(payload, "H", _SimMotor.set_target),
+            HAND_CMD_SET_FINGER_ANGLE_ALL: lambda payload: self._set_all(payload, "h", _SimMotor.set_target_angle),
+            HAND_CMD_SET_CUSTOM: self._set_custom,
+        }
+
+    def handle(self, cmd, payload):
+        """Execute a request, return (response command, response payload), errors have CMD_ERROR_MASK set"""
+        self.requests += 1
+        self.update()
+
+        try:
+            handler = self._var_handlers.get(cmd)
+            if handler is not None:
+                return cmd, handler(payload)
+
+            handler = self._handlers.get(cmd)
+            if handler is None:
+                return cmd | CMD_ERROR_MASK, bytes((ERR_COMMAND_INVALID,))
+
+            request, response = _LAYOUTS[cmd]
+            if len(payload) != request.size:
+                return cmd | CMD_ERROR_MASK, bytes((ERR_COMMAND_INVALID_BYTE_COUNT,))
+
+            return cmd, response.pack(*handler(*request.unpack(payload)))
+        except (ValueError, IndexError, struct.error):
+            return cmd | CMD_ERROR_MASK, bytes((ERR_COMMAND_INVALID_DATA,))
+
+    def update(self):
+        """Advance motors to the current time"""
+        now = self.clock()
+        dt = now - self.last_update
+        self.last_update = now
+        if dt <= 0:
+            return
+
+        for motor in self.motors:
+            tau = self.tau / motor.speed
+            error = motor.target - motor.pos
+            if abs(error) < 0.5:
+                motor.pos = motor.target
+                motor.velocity = 0.0
+                continue
+            step = error * (1.0 - math.exp(-dt / tau))
+            motor.pos += step
+            motor.velocity = (motor.target - motor.pos) / tau
+
+    def _motor(self, finger_id):
+        if finger_id >= self.motor_cnt:
+            raise ValueError(finger_id)
+        return self.motors[finger_id]
+
+    def _current(self, motor):
+        # Holding current plus a share proportional to speed, up to the limit
+        return min(motor.current_limit, round(50 + abs(motor.velocity) * 0.002))
+
+    def _status(self, motor):
+        return MOTOR_STATUS_IDLE if motor.pos == motor.target else MOTOR_STATUS_RUNNING
+
+    def _force(self, motor):
+        return 0  # Free space, nothing to grasp
+
+    # Fixed layout handlers, called with the unpacked request, return the response values
+
+    def _get_pos_limit(self, finger_id):
+        motor = self._motor(finger_id)
+        return finger_id, motor.low_limit, motor.high_limit
+
+    def _get_pos_abs(self, finger_id):
+        motor = self._motor(finger_id)
+        span = motor.end_pos - motor.start_pos
+        return finger_id, round(motor.start_pos + span * motor.target / 65535), motor.abs_pos()
+
+    def _get_pos(self, finger_id):
+        motor = self._motor(finger_id)
+        return finger_id, round(motor.target), round(motor.pos)
+
+    def _get_angle(self, finger_id):
+        motor = self._motor(finger_id)
+        return finger_id, motor.angle(motor.target), motor.angle(motor.pos)
+
+    def _get_thumb_root_pos(self):
+        motor = self.motors[-1]
+        preset = self.thumb_root_preset if self._status(motor) == MOTOR_STATUS_IDLE else 255
+        return motor.abs_pos(), preset
+
+    def _reset(self, mode):
+        for motor in self.motors:
+            motor.pos = motor.target = 0.0
+            motor.velocity = 0.0
+        return ()
+
+    def _set_node_id(self, new_id):
+        self.node_id = new_id  # Answered with the old id, see SimPort
+        return ()
+
+    def _calibrate(self, key):
+        return self._reset(0)
+
+    def _set_pid(self, finger_id, p, i, d, g):
+        self._motor(finger_id).pid = (p, i, d, g)
+        return ()
+
+    def _set_current_limit(self, finger_id, current_limit):
+        self._motor(finger_id).current_limit = current_limit
+        return ()
+
+    def _set_force_target(self, finger_id, force_target):
+        self._motor(finger_id).force_target = force_target
+        return ()
+
+    def _set_pos_limit(self, finger_id, low_limit, high_limit):
+        if low_limit > high_limit:
+            raise ValueError(low_limit)
+        motor = self._motor(finger_id)
+        motor.low_limit = low_limit
+        motor.high_limit = high_limit
+        return ()
+
+    def _finger_stop(self, finger_id_bits):
+        for i, motor in enumerate(self.motors):
+            if finger_id_bits & (1 << i):
+                motor.target = motor.pos
+        return ()
+
+    def _set_pos_abs(self, finger_id, raw_pos, speed):
+        self._motor(finger_id).set_target_abs(raw_pos, speed / 255)
+        return ()
+
+    def _set_pos(self, finger_id, pos, speed):
+        self._motor(finger_id).set_target(pos, speed / 255)
+        return ()
+
+    def _set_angle(self, finger_id, angle, speed):
+        self._motor(finger_id).set_target_angle(angle, speed / 255)
+        return ()
+
+    def _set_thumb_root_pos(self, pos, speed):
+        self.motors[-1].set_target_abs(self.thumb_root_pos[pos], speed / 255)
+        self.thumb_root_preset = pos
+        return ()
+
+    def _set_stop_params(self, finger_id, *stop_params):
+        self._motor(finger_id).stop_params = stop_params
+        return ()
+
+    def _set_force_pid(self, finger_id, p, i, d, g):
+        self._motor(finger_id).force_pid = (p, i, d, g)
+        return ()
+
+    def _set_self_test_level(self, self_test_level):
+        self.self_test_level = self_test_level
+        return ()
+
+    def _set_beep_switch(self, beep_switch):
+        self.beep_switch = beep_switch
+        return ()
+
+    def _set_button_pressed_cnt(self, pressed_cnt):
+        self.button_pressed_cnt = pressed_cnt
+        return ()
+
+    def _set_manufacture_data(self, key, sub_model, hw_revision, serial_number, customer_tag):
+        self.manufacture_data = (sub_model, hw_revision, serial_number, customer_tag)
+        return ()
+
+    def _set_speed_ctrl_params(self, brake_distance, accel_distance, speed_ratio):
+        self.speed_ctrl_params = (brake_distance, accel_distance, speed_ratio)
+        return ()
+
+    # Variable layout handlers, called with the request payload, return the response payload
+
+    def _get_cali_data(self, payload):
+        if payload:
+            raise ValueError(payload)
+        n, m = self.motor_cnt, len(self.thumb_root_pos)
+        return struct.pack(
+            f"<BB{n}H{n}H{m}H",
+            n, m,
+            *(motor.end_pos for motor in self.motors),
+            *(motor.start_pos for motor in self.motors),
+            *self.thumb_root_pos,
+        )
+
+    def _get_finger_force(self, payload):
+        (finger_id,) = struct.unpack("<B", payload)
+        motor = self._motor(finger_id)
+        cnt = _FORCE_ENTRIES if finger_id < _FINGER_CNT else 0
+        return struct.pack(f"<BB{cnt}B", finger_id, cnt, *([self._force(motor)] * cnt))
+
+    def _get_all(self, payload, value, fmt):
+        if payload:
+            raise ValueError(payload)
+        n = self.motor_cnt
+        return struct.pack(
+            f"<{n}{fmt}{n}{fmt}",
+            *(value(_TargetView(motor)) for motor in self.motors),
+            *(value(motor) for motor in self.motors),
+        )
+
+    def _get_usage_stat(self, payload):
+        (motor_cnt,) = struct.unpack("<B", payload)
+        motor_cnt = min(motor_cnt, self.motor_cnt)
+        total_use_time = int(self.clock() - self.started)
+        return struct.pack(f"<I{motor_cnt}I", total_use_time, *(m.open_times for m in self.motors[:motor_cnt]))
+
+    def _set_cali_data(self, payload):
+        n = payload[0]
+        m = payload[1 + 4 * n]
+        values = struct.unpack(f"<B{n}H{n}HB{m}H", payload)
+        if n > self.motor_cnt or m > MAX_THUMB_ROOT_POS:
+            raise ValueError(payload)
+        for i in range(n):
+            self.motors[i].end_pos = values[1 + i]
+            self.motors[i].start_pos = values[1 + n + i]
+        self.thumb_root_pos = list(values[2 + 2 * n :])
+        return b""
+
+    def _set_all(self, payload, fmt, set_target):
+        n, rest = divmod(len(payload), 3)
+        if rest != 0 or n > self.motor_cnt:
+            raise ValueError(payload)
+        values = struct.unpack("<" + (fmt + "B") * n, payload)
+        for i in range(n):
+            set_target(self.motors[i], values[2 * i], values[2 * i + 1] / 255)
+        return b""
+
+    def _set_custom(self, payload):
+        flags = payload[0]
+        blocks = [
+            flag for flag in (SUB_CMD_SET_SPEED, SUB_CMD_SET_POS, SUB_CMD_SET_ANGLE) if flags & flag
+        ]
+        n = self.motor_cnt
+        if len(payload) != 1 + 2 * n * len(blocks):
+            raise ValueError(payload)
+
+        offset = 1
+        if flags & SUB_CMD_SET_SPEED:
+            speed = struct.unpack_from(f"<{n}H", payload, offset)
+            offset += 2 * n
+            for motor, value in zip(self.motors, speed):
+                motor.speed = max(value / 65535, 1e-3)
+        if flags & SUB_CMD_SET_POS:
+            pos = struct.unpack_from(f"<{n}H", payload, offset)
+            offset += 2 * n
+            for motor, value in zip(self.motors, pos):
+                motor.set_target(value, motor.speed)
+        if flags & SUB_CMD_SET_ANGLE:
+            angle = struct.unpack_from(f"<{n}h", payload, offset)
+            for motor, value in zip(self.motors, angle):
+                motor.set_target_angle(value, motor.speed)
+
+        reply = []
+        if flags & SUB_CMD_GET_POS:
+            reply.append(struct.pack(f"<{n}H", *(round(motor.pos) for motor in self.motors)))
+        if flags & SUB_CMD_GET_ANGLE:
+            reply.append(struct.pack(f"<{n}h", *(motor.angle(motor.pos) for motor in self.motors)))
+        if flags & SUB_CMD_GET_CURRENT:
+            reply.append(struct.pack(f"<{n}H", *(self._current(motor) for motor in self.motors)))
+        if flags & SUB_CMD_GET_FORCE:
+            reply.append(struct.pack(f"<{n}H", *(self._force(motor) for motor in self.motors)))
+        if flags & SUB_CMD_GET_STATUS:
+            reply.append(bytes(self._status(motor) for motor in self.motors))
+        return b"".join(reply)
+
+
+class _TargetView:
+    """Motor seen at its target, for the target half of the *_ALL getters"""
+
+    __slots__ = ("_motor", "pos")
+
+    def __init__(self, motor):
+        self._motor = motor
+        self.pos = motor.target
+
+    def abs_pos(self):
+        motor = self._motor
+        return round(motor.start_pos + (motor.end_pos - motor.start_pos) * self.pos / 65535)
+
+    def angle(self, pos):
+        return self._motor.angle(pos)
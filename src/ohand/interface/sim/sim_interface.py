@@ -0,0 +1,242 @@
+import os
+import select
+import threading
+import time
+from collections import deque
+
+from ...constants import *
+from .sim_device import SimHand
+
+__all__ = [
+    'send_data_impl',
+    'recv_data_impl',
+    'get_milli_seconds_impl',
+    'delay_milli_seconds_impl',
+    'Sim_Init',
+    'Sim_InitPty',
+    'SimPort',
+    'SimPty',
+]
+
+_BITS_PER_BYTE = 10  # Start bit, 8 data bits, stop bit
+
+
+class SimPort:
+    """
+    Loopback transport of simulated hands sharing one half-duplex bus, used like a serial port:
+    write() sends requests, read() returns responses once they have crossed the wire.
+    baudrate: emulated wire speed, None for no wire time
+    response_delay_ms: processing time of a hand between request and response
+    Frames addressed to a node id without hand are not answered, like on a real bus.
+    """
+
+    def __init__(self, hands, baudrate=115200, response_delay_ms=0.1, clock=time.monotonic):
+        self.hands = {hand.node_id: hand for hand in hands}
+        self.baudrate = baudrate
+        self.response_delay = response_delay_ms / 1000.0
+        self.clock = clock
+        self.timeout = 0.005  # Default read() timeout in seconds, like Serial_Init()
+        self.bytes_sent = 0  # Bytes written by the host
+        self.bytes_received = 0  # Bytes of responses read by the host
+        self._cond = threading.Condition()
+        self._tx_buf = bytearray()  # Bytes written, not yet decoded into a request
+        self._responses = deque()  # Pending responses as (arrival time, frame), in arrival order
+        self._rx_buf = bytearray()  # Bytes of arrived responses not read yet
+        self._wire_free = 0.0  # Time the wire becomes idle
+
+    def _wire_time(self, size):
+        return size * _BITS_PER_BYTE / self.baudrate if self.baudrate else 0.0
+
+    def write(self, data):
+        now = self.clock()
+        with self._cond:
+            self.bytes_sent += len(data)
+            self._tx_buf += data
+            for frame in self._decode_requests():
+                # Request on the wire after what is already being sent
+                request_end = max(now, self._wire_free) + self._wire_time(len(frame))
+                self._wire_free = request_end
+                response = self._execute(frame)
+                if response is None:
+                    continue
+                # Response on the wire after the hand processed the request
+                arrival = max(request_end + self.response_delay, self._wire_free) + self._wire_time(len(response))
+                self._wire_free = arrival
+                self._responses.append((arrival, response))
+            self._cond.notify_all()
+        return len(data)
+
+    def _decode_requests(self):
+        buf = self._tx_buf
+        frames = []
+        while True:
+            start = buf.find(PROTOCOL_HEADER)
+            if start < 0:
+                del buf[: max(len(buf) - 1, 0)]  # Keep a possible first header byte
+                return frames
+            if len(buf) < start + 6 or len(buf) < start + 7 + buf[start + 5]:
+                del buf[:start]
+                return frames
+            end = start + 7 + buf[start + 5]
+            frames.append(bytes(buf[start:end]))
+            del buf[:end]
+
+    def _execute(self, frame):
+        # frame: header, addressed node id, own node id, command, byte count, data..., lrc
+        hand = self.hands.get(frame[2])
+        if hand is None:
+            return None
+
+        master, cmd, payload = frame[3], frame[4], frame[6:-1]
+        lrc = 0
+        for byte in frame[2:-1]:
+            lrc ^= byte
+        if lrc != frame[-1]:
+            cmd, payload = cmd | CMD_ERROR_MASK, bytes((ERR_PROTOCOL_WRONG_LRC,))
+        else:
+            cmd, payload = hand.handle(cmd, payload)
+
+        node_id = frame[2]  # Answered with the former id after HAND_CMD_SET_NODE_ID
+        if hand.node_id != node_id:
+            self.hands[hand.node_id] = self.hands.pop(node_id)
+
+        body = bytes((master, node_id, cmd, len(payload))) + payload
+        lrc = 0
+        for byte in body:
+            lrc ^= byte
+        return PROTOCOL_HEADER + body + bytes((lrc,))
+
+    def _deliver(self, now):
+        # Move arrived responses to the read buffer, return the arrival time of the next one or None
+        responses = self._responses
+        while responses and responses[0][0] <= now:
+            self._rx_buf += responses.popleft()[1]
+        return responses[0][0] if responses else None
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            self._deliver(self.clock())
+            return len(self._rx_buf)
+
+    def next_arrival(self):
+        """Return the arrival time of the next pending response, None if there is none"""
+        with self._cond:
+            return self._responses[0][0] if self._responses else None
+
+    def read(self, size=1, timeout=None):
+        """Return up to size bytes, wait up to timeout seconds (default: self.timeout) for size bytes to arrive"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = self.clock() + timeout
+        with self._cond:
+            while True:
+                now = self.clock()
+                next_arrival = self._deliver(now)
+                if len(self._rx_buf) >= size or now >= deadline:
+                    break
+                wait = deadline if next_arrival is None else min(deadline, next_arrival)
+                self._cond.wait(wait - now)
+
+            data = bytes(self._rx_buf[:size])
+            del self._rx_buf[:size]
+            self.bytes_received += len(data)
+            return data
+
+
+class SimPty:
+    """
+    Serves a SimPort on a pseudo terminal, open name with Serial_Init() of the UART interface to test the whole
+    serial stack, or with AsyncOHandSerialAPI which needs a file descriptor. POSIX only.
+    """
+
+    def __init__(self, port):
+        import tty  # POSIX only, the loopback SimPort works everywhere
+
+        self.port = port
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.name = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="OHandSimPty", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        port = self.port
+        while self._running:
+            next_arrival = port.next_arrival()
+            wait = 0.05 if next_arrival is None else min(max(next_arrival - port.clock(), 0.0), 0.05)
+            readable, _, _ = select.select([self._master], [], [], wait)
+            if readable:
+                port.write(os.read(self._master, 4096))
+            size = port.in_waiting
+            if size:
+                os.write(self._master, port.read(size, 0))
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+
+# Send data function (matches OHandSerialAPI interface)
+def send_data_impl(addr, data, length, context):
+    """
+    Send data to the simulated hands
+    Interface consistent with OHandSerialAPI: (addr, data, length, private_data)
+    """
+    if not context or not hasattr(context, 'write'):
+        print("Error: Simulated port not properly initialized")
+        return 1
+
+    context.write(bytes(data[:length]))
+    return 0
+
+
+# Receive data function (matches OHandSerialAPI interface)
+def recv_data_impl(context, api_instance=None, time_out=None):
+    """
+    Receive responses of the simulated hands and process them like the UART interface
+    With time_out (ms), block until the frame being decoded completes or time_out passes
+    """
+    if not context or not hasattr(context, 'read'):
+        print("Error: Simulated port not properly initialized")
+        return
+
+    if time_out is None:
+        msg_bytes = context.read(context.in_waiting or 1)
+    else:
+        size = context.in_waiting
+        if api_instance:
+            size = max(size, api_instance.get_rx_need())
+        msg_bytes = context.read(size or 1, time_out / 1000.0)
+
+    if msg_bytes and api_instance:
+        api_instance.HAND_OnBytes(msg_bytes)
+
+
+_start_time = time.monotonic_ns()
+
+
+def get_milli_seconds_impl():
+    """Return milliseconds since the module was loaded as float"""
+    return (time.monotonic_ns() - _start_time) / 1e6
+
+
+def delay_milli_seconds_impl(ms):
+    """Pause execution for specified milliseconds"""
+    time.sleep(ms / 1000.0)
+
+
+def Sim_Init(hands=None, baudrate=115200, response_delay_ms=0.1):
+    """
+    Create simulated hands on a loopback port, return the SimPort to pass as private_data to OHandSerialAPI
+    hands: SimHand list, default one hand with node id 0x02
+    """
+    return SimPort(hands if hands is not None else [SimHand()], baudrate, response_delay_ms)
+
+
+def Sim_InitPty(hands=None, baudrate=115200, response_delay_ms=0.1):
+    """Create simulated hands served on a pseudo terminal, return the SimPty, its name is the device path"""
+    return SimPty(Sim_Init(hands, baudrate, response_delay_ms))
@@ -1,6 +1,9 @@
+import select
 import time
 import serial
 
+from ...constants import *
+
 __all__ = [
     'send_data_impl',
     'recv_data_impl',
@@ -35,10 +38,12 @@ def send_data_impl(addr, data, length, context):
         return 1
 
 # Receive data function (adapted for Serial)
-def recv_data_impl(context, api_instance=None):
+def recv_data_impl(context, api_instance=None, time_out=None):
     """
     Receive serial data and process (read all available data at once)
     Interface consistent with OHandSerialAPI: (private_data)
+    With time_out (ms), wait up to time_out for data and read what is available, never longer: time_out=0
+    must not block, the event loop of AsyncOHandSerialAPI and OHandMux rely on it
     """
     if not context or not hasattr(context, 'read'):
         print("Error: Serial port not properly initialized")
@@ -47,7 +52,23 @@ def recv_data_impl(context, api_instance=None):
     uart_interface = context
         
     try:
-        msg_bytes = uart_interface.read(uart_interface.in_waiting or 1)
+        if time_out is None:
+            msg_bytes = uart_interface.read(uart_interface.in_waiting or 1)
+        else:
+            # Wait with select() instead of assigning serial.timeout, which reconfigures the port (tcsetattr).
+            # Ports without file descriptor (Windows) sleep a poll interval at most, the caller loops until its
+            # deadline. Only bytes already received are read, read() of more would block for serial.timeout
+            size = uart_interface.in_waiting
+            if not size and time_out > 0:
+                fileno = getattr(uart_interface, 'fileno', None)
+                if fileno is not None:
+                    select.select([fileno()], [], [], time_out / 1000.0)
+                else:
+                    time.sleep(min(time_out, POLL_INTERVAL) / 1000.0)
+                size = uart_interface.in_waiting
+            if not size:
+                return
+            msg_bytes = uart_interface.read(size)
         if msg_bytes:
             # Print received byte data
             # print(f"Receive data: LEN={len(msg_bytes)}, DATA=", end="")
@@ -55,23 +76,23 @@ def recv_data_impl(context, api_instance=None):
             #     print(f"{byte:02X} ", end="")
             # print()
 
-            # Parse data according to actual protocol, here assume bytes are passed to HAND_OnData
-            for byte in msg_bytes:
-                if api_instance:
-                    api_instance.HAND_OnData(byte)
+            # Parse data according to actual protocol, the whole chunk is passed to HAND_OnBytes
+            if api_instance:
+                api_instance.HAND_OnBytes(msg_bytes)
     except serial.SerialException as e:
         print(f"Serial receive error: {e}")
     except Exception as e:
         print(f"Receive exception: {e}")
 
-# Time related functions (unchanged)
+# Time related functions
 _start_time = None
 def get_milli_seconds_impl():
-    """Return milliseconds since program started"""
+    """Return milliseconds since program started as float"""
     global _start_time
     if _start_time is None:
-        _start_time = time.time() * 1000  # Initialize start time
-    return int(time.time() * 1000 - _start_time)
+        _start_time = time.monotonic_ns()  # Initialize start time
+    # Monotonic, unaffected by wall clock adjustments, with fractions of milliseconds
+    return (time.monotonic_ns() - _start_time) / 1e6
 
 def delay_milli_seconds_impl(ms):
     """Pause execution for specified milliseconds"""
@@ -0,0 +1,455 @@
+import heapq
+import itertools
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from .codec import HAND_CMD_CODECS
+from .constants import *
+
+__all__ = [
+    'OHandMux',
+]
+
+
+class _MuxRequest:
+    """Command submitted to OHandMux, completed by the receive path like OHandRequest"""
+
+    __slots__ = ("hand_id", "cmd", "args", "data", "key", "priority", "remote_err", "future", "time_out",
+                 "deadline", "sent_ns", "frame", "followers", "_port")
+
+    def __init__(self, port, hand_id, cmd, args, data, remote_err, time_out, priority, coalesce):
+        self.hand_id = hand_id
+        self.cmd = cmd
+        self.args = args  # None for raw requests, answered with the response payload
+        self.data = data  # Packed request
+        # Getters don't change the hand, identical ones share a transaction
+        self.key = (hand_id, cmd, bytes(data)) if coalesce and cmd < HAND_CMD_RESET else None
+        self.priority = priority
+        self.remote_err = remote_err
+        self.future = Future()
+        self.time_out = time_out
+        self.deadline = None  # perf_counter_ns() at which it times out, set when sent
+        self.sent_ns = None
+        self.frame = None  # Response frame
+        self.followers = []  # Identical requests answered with this one's result
+        self._port = port
+
+    def _complete(self, frame, tick):
+        # Called by HAND_OnBytes in the mux thread with the frame queue lock held, finished by the loop
+        self.frame = frame
+        self._port.mux._completed.append(self)
+
+
+class _MuxPort:
+    """
+    Request state machine of one port: queued requests are sent by priority, then in order, as soon as fewer
+    than max_in_flight wait
+    """
+
+    __slots__ = ("api", "fd", "mux", "max_in_flight", "queue", "in_flight", "reads")
+
+    def __init__(self, mux, api, fd, max_in_flight):
+        self.api = api
+        self.fd = fd
+        self.mux = mux
+        self.max_in_flight = max_in_flight
+        self.queue = []  # Heap of (priority, sequence, _MuxRequest) not sent yet
+        self.in_flight = []  # _MuxRequest sent, oldest first
+        self.reads = {}  # Unfinished getters by key, {key: _MuxRequest}
+
+
+class OHandMux:
+    """
+    One thread serving many ports: watches the file descriptors of serial ports and socketcan sockets with
+    selectors (epoll on Linux), feeds readable bytes to the decoder of their OHandSerialAPI and drives one request
+    state machine per port, nothing blocks but the selector. recv_data_impl(private_data, api, 0) must read only
+    what is buffered and return at once, a blocking read stalls every port of the mux.
+
+    submit() queues a command and returns a concurrent.futures.Future of (err, values) like HAND_Execute().
+    Each port sends a request as soon as fewer than max_in_flight of its requests wait for a response, 1 by
+    default as a half-duplex RS-485 bus requires. Requests with a lower priority value are sent first.
+    Getters identical to one queued or in flight share its transaction and result. Futures complete in the mux
+    thread, done callbacks must not block.
+
+    Added ports are owned by the mux like by a reader thread: blocking HAND_* calls from other threads still
+    work, their responses are received by the mux, but they bypass the request queues of the ports.
+
+    A port whose transport raises, e.g. a serial port unplugged, is removed and its pending requests complete
+    with HAND_RESP_HAND_ERROR. Exceptions of watch() callbacks stop watching their file, the mux keeps running.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._ports = {}  # {api: _MuxPort}
+        self._ops = deque()  # Functions to run in the mux thread, queued by other threads
+        self._completed = deque()  # _MuxRequest with a response, to be finished
+        self._timers = []  # Heap of (deadline, sequence, _MuxRequest)
+        self._sequence = itertools.count()
+        self._running = False
+        self._thread = None
+        self.submitted = 0  # Requests queued
+        self.coalesced = 0  # Requests answered by an identical one
+        self.sent = 0  # Requests sent
+
+    def add(self, api, max_in_flight=1):
+        """
+        Serve api, its private_data must have fileno() and recv_data_impl accept time_out (0: don't block).
+        Return HAND_RESP_INVALID_CONTEXT if the transport has no file descriptor or a reader already receives.
+        """
+        try:
+            fd = api.private_data.fileno()
+        except Exception as e:
+            print(f"Transport has no file descriptor: {e}")
+            return HAND_RESP_INVALID_CONTEXT
+
+        if api in self._ports or not api.recv_data_impl or api._set_rx_driver(self) != HAND_RESP_SUCCESS:
+            return HAND_RESP_INVALID_CONTEXT  # A reader or another mux already receives
+
+        port = _MuxPort(self, api, fd, max_in_flight)
+
+        def register():
+            self._ports[api] = port
+            self._selector.register(fd, selectors.EVENT_READ, port)
+
+        try:
+            self._call(register)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Watching the transport failed: {e}")
+            self._ports.pop(api, None)
+            api._set_rx_driver(None)
+            return HAND_RESP_INVALID_CONTEXT
+        return HAND_RESP_SUCCESS
+
+    def remove(self, api):
+        """Stop serving api, its pending requests complete with HAND_RESP_TIMEOUT"""
+
+        def unregister():
+            port = self._ports.get(api)
+            if port is not None:
+                self._release(port, HAND_RESP_TIMEOUT)
+
+        self._call(unregister)
+
+    def watch(self, fileobj, callback):
+        """Call callback() in the mux thread whenever fileobj (with fileno()) is readable, e.g. client sockets"""
+        self._call(lambda: self._selector.register(fileobj, selectors.EVENT_READ, callback))
+
+    def unwatch(self, fileobj):
+        self._call(lambda: self._selector.unregister(fileobj))
+
+    def submit(self, api, hand_id, cmd, args=(), remote_err=None, time_out=None, priority=0, coalesce=True):
+        """
+        Queue cmd with args packed by its layout in codec.HAND_CMD_CODECS for hand_id on port api.
+        Return a Future of (err, values), values is the unpacked response, None on error. time_out in ms,
+        default that of the command, see OHandSerialAPI.enable_adaptive_timeout(). Lower priority values are
+        sent first, coalesce=False sends a getter even if an identical one is pending.
+        """
+        port = self._ports.get(api)
+        if port is None:
+            err = HAND_RESP_INVALID_CONTEXT
+        else:
+            err, data = self._pack(cmd, args)
+        if err != HAND_RESP_SUCCESS:
+            return self._resolved((err, None))
+
+        cache = api._cache
+        if cache is not None:
+            values = cache.on_request(hand_id, cmd, args)
+            if values is not None:
+                return self._resolved((HAND_RESP_SUCCESS, values))
+
+        return self._submit(port, hand_id, cmd, args, data, remote_err, time_out, priority, coalesce)
+
+    def submit_raw(self, api, hand_id, cmd, data, remote_err=None, time_out=None, priority=0, coalesce=True):
+        """
+        Like submit() with the packed request payload data, the Future is of (err, payload), payload is the
+        response payload as bytes, None on error.
+        """
+        port = self._ports.get(api)
+        if port is None:
+            return self._resolved((HAND_RESP_INVALID_CONTEXT, None))
+        if len(data) > MAX_PROTOCOL_DATA_SIZE:
+            return self._resolved((HAND_RESP_DATA_SIZE_TOO_BIG, None))
+        return self._submit(port, hand_id, cmd, None, bytes(data), remote_err, time_out, priority, coalesce)
+
+    def _submit(self, port, hand_id, cmd, args, data, remote_err, time_out, priority, coalesce):
+        if time_out is None:
+            time_out = port.api._command_timeout(hand_id, cmd)
+        request = _MuxRequest(port, hand_id, cmd, args, data, remote_err, time_out, priority, coalesce)
+        if threading.current_thread() is self._thread:
+            self._enqueue(request)  # Sent at the end of the current loop iteration
+        else:
+            self._ops.append(lambda: self._enqueue(request))
+            self._wakeup()
+        return request.future
+
+    @staticmethod
+    def _resolved(result):
+        future = Future()
+        future.set_result(result)
+        return future
+
+    @staticmethod
+    def _pack(cmd, args):
+        try:
+            return HAND_RESP_SUCCESS, HAND_CMD_CODECS[cmd].request.get(args).pack(*args)
+        except (struct.error, TypeError, IndexError, KeyError):
+            return HAND_RESP_DATA_INVALID, None
+
+    def _enqueue(self, request):
+        port = request._port
+        if self._ports.get(port.api) is not port:
+            request.future.set_result((HAND_RESP_INVALID_CONTEXT, None))
+            return
+        self.submitted += 1
+
+        key = request.key
+        if key is not None:
+            leader = port.reads.get(key)
+            if leader is not None and (leader.args is None) == (request.args is None):
+                leader.followers.append(request)
+                self.coalesced += 1
+                if request.priority < leader.priority and leader.sent_ns is None:
+                    leader.priority = request.priority  # Queued again, the old entry is skipped
+                    heapq.heappush(port.queue, (leader.priority, next(self._sequence), leader))
+                return
+            port.reads[key] = request
+        heapq.heappush(port.queue, (request.priority, next(self._sequence), request))
+
+    def get_stats(self):
+        """Return request counters and the requests queued and in flight per port"""
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "ports": [(len(port.queue), len(port.in_flight)) for port in list(self._ports.values())],
+        }
+
+    def start(self):
+        """Start the mux thread"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name="OHandMux", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the mux thread and release all ports, their pending requests complete with HAND_RESP_TIMEOUT"""
+        thread = self._thread
+        if thread is not None:
+            self._running = False
+            self._wakeup()
+            thread.join()
+            self._thread = None
+        for port in list(self._ports.values()):
+            self._release(port, HAND_RESP_TIMEOUT)
+
+    def close(self):
+        """Stop and release the selector"""
+        self.stop()
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _call(self, func):
+        # Run func in the mux thread and wait for it, directly if not running or called from the mux thread
+        if self._thread is None or threading.current_thread() is self._thread:
+            func()
+            return
+        done = threading.Event()
+        error = []
+
+        def op():
+            try:
+                func()
+            except Exception as e:
+                error.append(e)  # Raised in the calling thread
+            finally:
+                done.set()
+
+        self._ops.append(op)
+        self._wakeup()
+        done.wait()
+        if error:
+            raise error[0]
+
+    def _wakeup(self):
+        try:
+            self._wakeup_w.send(b"\0")
+        except BlockingIOError:
+            pass  # Already pending
+
+    def _loop(self):
+        select = self._selector.select
+        clock = time.perf_counter_ns
+        while self._running:
+            timeout = None
+            if self._timers:
+                timeout = max(self._timers[0][0] - clock(), 0) / 1e9
+
+            for key, _ in select(timeout):
+                data = key.data
+                if data is None:
+                    try:
+                        self._wakeup_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                elif isinstance(data, _MuxPort):
+                    if self._ports.get(data.api) is not data:
+                        continue  # Released by an earlier event of this iteration
+                    api = data.api
+                    try:
+                        api.recv_data_impl(api.private_data, api, 0)  # Doesn't block, see the class docstring
+                    except Exception as e:
+                        self._fail(data, e)
+                else:
+                    try:
+                        data()
+                    except Exception as e:
+                        print(f"Mux callback failed, no longer watched: {e!r}")
+                        self._unwatch_failed(key.fileobj)
+
+            ops = self._ops
+            while ops:
+                try:
+                    ops.popleft()()
+                except Exception as e:
+                    print(f"Mux operation failed: {e!r}")
+
+            completed = self._completed
+            while completed:
+                request = completed.popleft()
+                try:
+                    self._finish(request)
+                except Exception as e:
+                    print(f"Mux response handling failed: {e!r}")
+                    self._resolve(request, HAND_RESP_HAND_ERROR, None)
+
+            self._expire(clock())
+
+            for port in list(self._ports.values()):
+                if port.queue and len(port.in_flight) < port.max_in_flight:
+                    try:
+                        self._send(port)
+                    except Exception as e:
+                        self._fail(port, e)
+
+    def _fail(self, port, error):
+        # Transport of port raised: release it, its requests complete with HAND_RESP_HAND_ERROR
+        if self._ports.get(port.api) is not port:
+            return
+        print(f"Port failed, removed from the mux: {error!r}")
+        self._release(port, HAND_RESP_HAND_ERROR)
+
+    def _unwatch_failed(self, fileobj):
+        try:
+            self._selector.unregister(fileobj)
+        except (KeyError, ValueError, OSError):
+            pass  # Unwatched or closed by the callback
+
+    def _release(self, port, err):
+        # Stop serving port, complete its pending requests with err
+        api = port.api
+        del self._ports[api]
+        try:
+            self._selector.unregister(port.fd)
+        except (KeyError, ValueError, OSError):
+            pass  # Closed by a transport error
+        self._abort(port, err)
+        api._set_rx_driver(None)
+
+    def _send(self, port):
+        api = port.api
+        clock = time.perf_counter_ns
+        while port.queue and len(port.in_flight) < port.max_in_flight:
+            request = heapq.heappop(port.queue)[2]
+            if request.sent_ns is not None:
+                continue  # Entry left behind when queued again with a higher priority
+            request.sent_ns = clock()
+            try:
+                err = api._send_request(request, request.data, len(request.data))
+            except Exception:
+                with api._rx_lock:
+                    api._cancel_request(request)
+                self._resolve(request, HAND_RESP_HAND_ERROR, None)
+                raise
+            if err != HAND_RESP_SUCCESS:
+                self._resolve(request, err, None)
+                continue
+            self.sent += 1
+            request.deadline = request.sent_ns + int(request.time_out * 1e6)
+            port.in_flight.append(request)
+            heapq.heappush(self._timers, (request.deadline, next(self._sequence), request))
+
+    def _finish(self, request):
+        port = request._port
+        api = port.api
+        if request not in port.in_flight:
+            return  # Timed out or aborted meanwhile
+        port.in_flight.remove(request)
+
+        values = None
+        frame = request.frame
+        remote_err = [] if request.remote_err is not None or request.followers else None
+        err = api._parse_response(frame, None, remote_err)
+        if err == HAND_RESP_SUCCESS:
+            if request.args is None:
+                values = bytes(frame[4 : 4 + frame[3]])
+            else:
+                codec = HAND_CMD_CODECS[request.cmd]
+                values = api._unpack_response(codec, request.args, frame)
+                if values is None:
+                    err = HAND_RESP_DATA_INVALID
+                elif api._cache is not None:
+                    api._cache.on_response(request.hand_id, request.cmd, request.args, values)
+
+        if api._timing:
+            api._record_result(request.hand_id, request.cmd, err, request.sent_ns)
+        self._resolve(request, err, values, remote_err)
+
+    def _resolve(self, request, err, values, remote_err=None):
+        # Complete request and the identical ones that joined it
+        port = request._port
+        if request.key is not None and port.reads.get(request.key) is request:
+            del port.reads[request.key]
+        for req in [request] + request.followers:
+            if remote_err and req.remote_err is not None:
+                req.remote_err.extend(remote_err)
+            if not req.future.done():
+                req.future.set_result((err, values))
+
+    def _expire(self, now):
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            request = heapq.heappop(timers)[2]
+            port = request._port
+            if request not in port.in_flight or request.frame is not None:
+                continue  # Completed, finished with the next loop iteration if not yet
+            api = port.api
+            with api._rx_lock:
+                api._cancel_request(request)
+            if request.frame is not None:
+                continue
+            port.in_flight.remove(request)
+            if api._timing:
+                api._record_result(request.hand_id, request.cmd, HAND_RESP_TIMEOUT, request.sent_ns)
+            self._resolve(request, HAND_RESP_TIMEOUT, None)
+
+    def _abort(self, port, err):
+        api = port.api
+        with api._rx_lock:
+            for request in port.in_flight:
+                api._cancel_request(request)
+        for request in itertools.chain(port.in_flight, (entry[2] for entry in port.queue)):
+            self._resolve(request, err, None)
+        port.in_flight.clear()
+        port.queue.clear()
+        port.reads.clear()
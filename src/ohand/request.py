@@ -0,0 +1,37 @@
+import threading
+
+__all__ = [
+    'OHandRequest',
+]
+
+
+class OHandRequest:
+    """
+    Pending response of a command sent with OHandSerialAPI.HAND_SendRequest().
+    Completed by whichever thread decodes the answer, usually the reader thread.
+    """
+
+    __slots__ = ("hand_id", "cmd", "frame", "tick", "_api", "_event")
+
+    def __init__(self, api, hand_id, cmd):
+        self.hand_id = hand_id
+        self.cmd = cmd
+        self.frame = None  # Response frame: addressed node id, own node id, command, byte count, data..., lrc
+        self.tick = None  # Arrival tick of the response
+        self._api = api
+        self._event = threading.Event()
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, time_out=None, resp_bytes=None, remote_err=None):
+        """
+        Wait up to time_out ms (default: command timeout) for the response.
+        Return HAND_RESP_* like HAND_GetResponse, response data is copied to resp_bytes.
+        """
+        return self._api._wait_request(self, time_out, resp_bytes, remote_err)
+
+    def _complete(self, frame, tick):
+        self.frame = frame
+        self.tick = tick
+        self._event.set()
@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import deque
+
+from .constants import *
+from .stats import OHandSamples
+from .stream import OHandStream
+
+__all__ = [
+    'OHandSetpointFilter',
+    'OHandSetpoints',
+]
+
+# Bytes of a frame besides its payload: header, node ids, command, byte count, LRC. Each command frame is
+# answered by one, an acknowledgement without payload is the same size.
+_FRAME_OVERHEAD = len(PROTOCOL_HEADER) + 5
+_SET_FINGER_POS_SIZE = 4  # finger_id, pos, speed
+
+
+class OHandSetpointFilter:
+    """
+    Deadband and keep-alive of the position targets sent to a hand. check() returns the fingers whose target
+    moved more than their deadband from the one last sent, so frames of targets that barely changed are
+    suppressed. Every finger is due when nothing was sent yet or no frame went out for keep_alive_ms (None:
+    never), so the hand gets frames even while the targets stand still.
+    deadband: one value for all fingers or one per finger, in position units, 0 suppresses identical targets only.
+    """
+
+    def __init__(self, motor_cnt=MAX_MOTOR_CNT, deadband=0, keep_alive_ms=None):
+        self.motor_cnt = motor_cnt
+        self.deadband = [deadband] * motor_cnt if isinstance(deadband, (int, float)) else list(deadband)
+        self.keep_alive_ms = keep_alive_ms
+        self._sent = None  # Targets last sent per finger
+        self._sent_ns = None  # perf_counter_ns() of the last frame
+        self.checks = 0
+        self.suppressed = 0  # Checks without a finger due
+        self.keep_alives = 0  # Checks due to keep_alive_ms only
+
+    def keep_alive_due(self):
+        if self.keep_alive_ms is None or self._sent_ns is None:
+            return False
+        return time.perf_counter_ns() - self._sent_ns >= self.keep_alive_ms * 1e6
+
+    def check(self, pos):
+        """Return the ids of the fingers to send, all of them if due, [] if the frame is to be suppressed"""
+        self.checks += 1
+        sent = self._sent
+        if sent is None:
+            return list(range(self.motor_cnt))
+        deadband = self.deadband
+        finger_ids = [i for i in range(self.motor_cnt) if abs(pos[i] - sent[i]) > deadband[i]]
+        if not finger_ids:
+            if self.keep_alive_due():
+                self.keep_alives += 1
+                return list(range(self.motor_cnt))
+            self.suppressed += 1
+        return finger_ids
+
+    def sent(self, finger_ids, pos):
+        """Record the targets of finger_ids as sent"""
+        if self._sent is None:
+            self._sent = [0] * self.motor_cnt
+        for i in finger_ids:
+            self._sent[i] = pos[i]
+        self._sent_ns = time.perf_counter_ns()
+
+    def get_stats(self):
+        return {"checks": self.checks, "suppressed": self.suppressed, "keep_alives": self.keep_alives}
+
+
+class OHandSetpoints:
+    """
+    Latest-wins setpoint mailbox of one hand. Producers update targets of single fingers or all of them at any
+    rate, newer targets overwrite pending older ones. flush(), called once per control tick, merges all updates
+    since the previous frame into one HAND_CMD_SET_FINGER_POS_ALL or HAND_CMD_SET_CUSTOM frame streamed with
+    OHandStream.
+
+    A frame is only sent while fewer than max_in_flight are unacknowledged, so neither the bus load nor the age
+    of commands on the wire grow when producers are faster than the bus: updates wait in the mailbox and are
+    merged instead.
+
+    Fingers keep their last target, initially pos. Without pos, nothing is sent until every finger got one.
+    Speeds are 0-255 for HAND_CMD_SET_FINGER_POS_ALL and 0-65535 for HAND_CMD_SET_CUSTOM, default the maximum.
+
+    Targets pass an OHandSetpointFilter (deadband, keep_alive_ms): frames of targets within the deadband of those
+    sent are suppressed, speed changes alone don't send a frame. With single_finger, when few fingers changed
+    and their HAND_CMD_SET_FINGER_POS frames take fewer bytes on the bus than one frame of all fingers, those
+    are sent instead, within max_in_flight too: fingers beyond it are carried over to the next flushes, ahead
+    of the fingers changed meanwhile.
+
+    Latency: updates may carry stamp_ns, the perf_counter_ns() of the input they were computed from (default:
+    when they are set). get_stats() reports the time from the stamp of the newest update in a frame until the
+    hand acknowledged it.
+    """
+
+    def __init__(self, api, hand_id, motor_cnt=MAX_MOTOR_CNT, cmd=HAND_CMD_SET_FINGER_POS_ALL, pos=None,
+                 speed=None, max_in_flight=1, ack_timeout=None, deadband=0, keep_alive_ms=None, single_finger=True):
+        if cmd not in (HAND_CMD_SET_FINGER_POS_ALL, HAND_CMD_SET_CUSTOM):
+            raise ValueError("cmd must be HAND_CMD_SET_FINGER_POS_ALL or HAND_CMD_SET_CUSTOM")
+
+        self.hand_id = hand_id
+        self.motor_cnt = motor_cnt
+        self.cmd = cmd
+        self.max_in_flight = max_in_flight
+        self.single_finger = single_finger
+        self.filter = OHandSetpointFilter(motor_cnt, deadband, keep_alive_ms)
+        self.stream = OHandStream(api, hand_id, ack_timeout)
+        max_speed = 255 if cmd == HAND_CMD_SET_FINGER_POS_ALL else 65535
+        self._pos = [None] * motor_cnt if pos is None else list(pos)
+        self._speed = [max_speed if speed is None else speed] * motor_cnt
+        self._lock = threading.Lock()
+        self._dirty_since = None  # perf_counter_ns() of the oldest update not sent yet, None if none
+        self._stamp_ns = None  # stamp_ns of the newest update not sent yet
+        self._unacked = deque()  # (_StreamAck, stamp_ns) of frames sent with updates, oldest first
+        self._carried = []  # Fingers due but not sent by the last flush, first in line for the next one
+        self._latency = OHandSamples()
+        self.updates = 0  # Finger targets set
+        self.frames = 0  # Frames sent
+        self.single_frames = 0  # Of those, HAND_CMD_SET_FINGER_POS frames
+        self.busy_ticks = 0  # Flushes deferred because of unacknowledged frames
+        self.last_age_ms = 0.0  # Age of the oldest update merged into the last frame when it was sent
+        self.max_age_ms = 0.0
+
+    def set_finger_pos(self, finger_id, pos, speed=None, stamp_ns=None):
+        """Set the target of one finger, sent with the next frame"""
+        with self._lock:
+            self._pos[finger_id] = pos
+            if speed is not None:
+                self._speed[finger_id] = speed
+            self._touch(1, stamp_ns)
+
+    def set_finger_pos_all(self, pos, speed=None, stamp_ns=None):
+        """Set the targets of the first len(pos) fingers, speed is one value per finger or None to keep it"""
+        with self._lock:
+            n = len(pos)
+            self._pos[:n] = pos
+            if speed is not None:
+                self._speed[:n] = speed
+            self._touch(n, stamp_ns)
+
+    def _touch(self, n, stamp_ns):
+        self.updates += n
+        now = time.perf_counter_ns()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._stamp_ns = now if stamp_ns is None else stamp_ns
+
+    def pending(self):
+        """Whether updates wait to be sent"""
+        return self._dirty_since is not None
+
+    def flush(self):
+        """
+        Send pending updates as one frame, or one per changed finger if that is cheaper, unless max_in_flight
+        frames are unacknowledged or the filter suppresses them. Sends the keep-alive frame when due.
+        Return HAND_RESP_* of sending, HAND_RESP_SUCCESS if there was nothing to send or the bus is busy.
+        """
+        stream = self.stream
+        stream.poll()
+        self._collect_acks()
+
+        with self._lock:
+            if None in self._pos or (self._dirty_since is None and not self.filter.keep_alive_due()):
+                return HAND_RESP_SUCCESS
+            budget = self.max_in_flight - len(stream._in_flight)  # Frames that may be sent
+            if budget <= 0:
+                self.busy_ticks += 1
+                return HAND_RESP_SUCCESS
+
+            pos, speed = list(self._pos), list(self._speed)
+            dirty_since, self._dirty_since = self._dirty_since, None
+            stamp_ns, self._stamp_ns = self._stamp_ns, None
+
+        finger_ids = self.filter.check(pos)
+        if not finger_ids:
+            return HAND_RESP_SUCCESS
+
+        carried = []
+        if len(finger_ids) < self.motor_cnt and self._singles_cheaper(len(finger_ids)):
+            first = [i for i in self._carried if i in finger_ids]
+            finger_ids = first + [i for i in finger_ids if i not in first]
+            finger_ids, carried = finger_ids[:budget], finger_ids[budget:]
+            sent = []
+            for i in finger_ids:
+                # Speed of HAND_CMD_SET_FINGER_POS is 0-255 like that of HAND_CMD_SET_FINGER_POS_ALL
+                finger_speed = speed[i] >> 8 if self.cmd == HAND_CMD_SET_CUSTOM else speed[i]
+                err = stream.send(HAND_CMD_SET_FINGER_POS, (i, pos[i], finger_speed))
+                if err != HAND_RESP_SUCCESS:
+                    carried = finger_ids[len(sent):] + carried
+                    break
+                sent.append(i)
+            self.single_frames += len(sent)
+            self.frames += len(sent)
+        else:
+            if self.cmd == HAND_CMD_SET_CUSTOM:
+                err = stream.set_custom(speed=speed, pos=pos)
+            else:
+                err = stream.set_finger_pos_all(pos, speed)
+            sent = range(self.motor_cnt) if err == HAND_RESP_SUCCESS else ()
+            if err == HAND_RESP_SUCCESS:
+                self.frames += 1
+        if sent:
+            self.filter.sent(sent, pos)
+            if stamp_ns is not None:
+                self._unacked.append((stream._in_flight[-1], stamp_ns))
+
+        self._carried = carried
+        if err != HAND_RESP_SUCCESS or carried:
+            with self._lock:
+                if dirty_since is not None and (self._dirty_since is None or dirty_since < self._dirty_since):
+                    self._dirty_since = dirty_since  # Retried with the next flush
+                if self._stamp_ns is None:
+                    self._stamp_ns = stamp_ns
+            if err != HAND_RESP_SUCCESS:
+                return err
+
+        if dirty_since is not None:
+            self.last_age_ms = (time.perf_counter_ns() - dirty_since) / 1e6
+            if self.last_age_ms > self.max_age_ms:
+                self.max_age_ms = self.last_age_ms
+        return err
+
+    def _collect_acks(self):
+        unacked = self._unacked
+        now = time.perf_counter_ns()
+        while unacked and (unacked[0][0].done or unacked[0][0].deadline < now):
+            ack, stamp_ns = unacked.popleft()
+            if ack.done:
+                with self._lock:
+                    self._latency.add(ack.done_ns - stamp_ns)
+
+    def _singles_cheaper(self, count):
+        # Bytes on the bus of count HAND_CMD_SET_FINGER_POS frames vs one frame of all fingers, with their acks
+        if not self.single_finger:
+            return False
+        all_size = 3 * self.motor_cnt if self.cmd == HAND_CMD_SET_FINGER_POS_ALL else 1 + 4 * self.motor_cnt
+        return count * (2 * _FRAME_OVERHEAD + _SET_FINGER_POS_SIZE) < 2 * _FRAME_OVERHEAD + all_size
+
+    def get_stats(self):
+        """Return mailbox counters, latency percentiles, with those of the stream under 'stream'"""
+        with self._lock:
+            latency = self._latency.summary()
+        return {
+            "updates": self.updates,
+            "frames": self.frames,
+            "single_frames": self.single_frames,
+            "busy_ticks": self.busy_ticks,
+            "last_age_ms": self.last_age_ms,
+            "max_age_ms": self.max_age_ms,
+            "latency": latency,
+            "filter": self.filter.get_stats(),
+            "stream": self.stream.get_stats(),
+        }
@@ -0,0 +1,207 @@
+import ast
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+__all__ = [
+    'OHandShmBlock',
+]
+
+# Segment layout: header, dtype description of the record, record
+# Header: sequence counter (u8), description size (u4), record offset (u4), creator pid (u4), padded to a
+# cache line
+_HEADER_SIZE = 64
+_PID_OFFSET = 16
+_ALIGN = 64
+_READ_TIME_OUT = 1000  # ms, default time for read() to get a consistent snapshot
+
+
+def _attach(name):
+    # Not tracked by the resource tracker, which would remove the segment when this process exits
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Before Python 3.13, the segment is registered on POSIX
+        pass
+    shm = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        # Also drops the registration of the creator if it shares the tracker (same or spawned process),
+        # restored by close() before unlinking
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink(shm):
+    # Registered again first, unlink() unregisters the segment, see _attach()
+    if os.name == "posix" and getattr(shm, "_track", True):
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _remove_stale(name):
+    # Remove segment name if the process which created it is gone, return whether it was removed
+    if os.name != "posix":
+        return False  # Removed with its last handle, it can't outlive its processes
+    try:
+        shm = _attach(name)
+    except FileNotFoundError:
+        return True  # Removed meanwhile
+    try:
+        pid = struct.unpack_from("<I", shm.buf, _PID_OFFSET)[0] if shm.size >= _HEADER_SIZE else 0
+        if not pid:
+            return False  # Unknown creator
+        try:
+            os.kill(pid, 0)
+            return False
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            return False  # Alive, of another user
+        _unlink(shm)
+        return True
+    finally:
+        shm.close()
+
+
+class OHandShmBlock:
+    """
+    Fixed-layout record in a named shared memory segment, written by one process and read by any number of
+    others without locks, pickling or pipes.
+
+    The record is guarded by a sequence counter like a seqlock: the writer makes it odd before and even again
+    after updating the record, readers copy the record and retry if the counter was odd or changed meanwhile.
+    The version returned by read() counts completed writes, readers compare it with the last one they saw to
+    detect updates. read() gives up with TimeoutError if the writer died in the middle of a write.
+
+    dtype: numpy dtype of the record, e.g. np.dtype([("pos", "<u2", (6,)), ("stamp_ns", "<u8")]), stored in the
+    segment: when attaching, None takes it from there, otherwise it must be the same.
+    name: segment to attach to, None to create one with a unique name, see name.
+    create: create the segment name instead of attaching to it. A segment left by a creator which is gone, e.g.
+    crashed, is replaced, FileExistsError if its creator still runs.
+    The creator removes the segment on close().
+    """
+
+    def __init__(self, dtype=None, name=None, create=False):
+        create = create or name is None
+        if create:
+            self.dtype = np.dtype(dtype)
+            descr = repr(np.lib.format.dtype_to_descr(self.dtype)).encode()
+            offset = _HEADER_SIZE + (len(descr) + _ALIGN - 1) // _ALIGN * _ALIGN
+            try:
+                self._shm = shared_memory.SharedMemory(name, True, offset + self.dtype.itemsize)
+            except FileExistsError:
+                if not _remove_stale(name):
+                    raise FileExistsError(f"Shared memory {name} exists, its creator still runs") from None
+                self._shm = shared_memory.SharedMemory(name, True, offset + self.dtype.itemsize)
+            header = np.ndarray((3,), np.uint32, self._shm.buf, 8)
+            header[:] = len(descr), offset, os.getpid()
+            self._shm.buf[_HEADER_SIZE : _HEADER_SIZE + len(descr)] = descr
+            del header
+        else:
+            self._shm = _attach(name)
+            try:
+                self.dtype, offset = self._layout(dtype)
+            except (ValueError, SyntaxError, TypeError) as e:
+                self._shm.close()
+                raise ValueError(f"Shared memory {name} doesn't hold the record: {e}") from None
+        self._owner = create
+        buf = self._shm.buf
+        self._seq = np.ndarray((1,), np.uint64, buf, 0)
+        self._record = np.ndarray((), self.dtype, buf, offset)
+        self._write_lock = threading.Lock()  # Writes of several threads of the writing process
+        self._fence_lock = threading.Lock()
+        if create:
+            self._seq[0] = 0
+            self._record[...] = np.zeros((), self.dtype)
+
+    def _layout(self, dtype):
+        # Return the record dtype and offset stored in the attached segment
+        buf = self._shm.buf
+        descr_size, offset = np.frombuffer(buf, np.uint32, 2, 8).tolist()
+        if offset < _HEADER_SIZE + descr_size or offset > self._shm.size:
+            raise ValueError("invalid header")
+        text = bytes(buf[_HEADER_SIZE : _HEADER_SIZE + descr_size]).decode()
+        stored = np.lib.format.descr_to_dtype(ast.literal_eval(text))
+        if dtype is not None and np.dtype(dtype) != stored:
+            raise ValueError(f"record is {stored}")
+        if offset + stored.itemsize > self._shm.size:
+            raise ValueError("segment too small")
+        return stored, offset
+
+    @property
+    def name(self):
+        """Name of the segment, pass it to OHandShmBlock(name=name) in other processes"""
+        return self._shm.name
+
+    @property
+    def version(self):
+        """Completed writes, changes with every write"""
+        return int(self._seq[0]) >> 1
+
+    def _fence(self):
+        # Acquiring a lock is a full memory barrier, orders the counter and record accesses on weakly ordered CPUs
+        with self._fence_lock:
+            pass
+
+    def write(self, record=None, **fields):
+        """
+        Replace the record by record, a np.ndarray of shape () and dtype, and/or update fields of it, e.g.
+        block.write(pos=pos, stamp_ns=time.monotonic_ns())
+        """
+        with self._write_lock:
+            seq = self._seq
+            seq[0] += 1
+            self._fence()
+            if record is not None:
+                self._record[...] = record
+            for field, value in fields.items():
+                self._record[field] = value
+            self._fence()
+            seq[0] += 1
+
+    def read(self, out=None, time_out=_READ_TIME_OUT):
+        """
+        Copy a consistent snapshot of the record into out (a np.ndarray of shape () and dtype) or a new one.
+        Return (version, record). Raise TimeoutError if there is none within time_out ms, e.g. the writer died
+        in the middle of a write.
+        """
+        if out is None:
+            out = np.empty((), self.dtype)
+        seq = self._seq
+        deadline = None
+        while True:
+            before = int(seq[0])
+            if not before & 1:
+                self._fence()
+                out[...] = self._record
+                self._fence()
+                if int(seq[0]) == before:
+                    return before >> 1, out
+
+            # Write in progress, retry until the deadline
+            now = time.monotonic_ns()
+            if deadline is None:
+                deadline = now + int(time_out * 1e6)
+            elif now >= deadline:
+                raise TimeoutError(f"Shared memory {self.name} stays locked by its writer")
+            time.sleep(0)
+
+    def view(self):
+        """
+        Return a read-only view of the record in shared memory, without copying but changing while it is being
+        written. Compare version before and after accessing it, or use read() for a consistent snapshot.
+        """
+        view = self._record.view()
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        """Detach from the segment, the creator also removes it"""
+        self._seq = self._record = None
+        self._shm.close()
+        if self._owner:
+            _unlink(self._shm)
+            self._owner = False
@@ -0,0 +1,145 @@
+import bisect
+import threading
+
+from .constants import *
+
+__all__ = [
+    'OHandStats',
+    'OHandSamples',
+    'LATENCY_BUCKETS_US',
+]
+
+# Upper bounds of the latency histogram buckets in us, a last bucket counts longer round trips
+LATENCY_BUCKETS_US = (
+    50, 100, 200, 500,
+    1000, 2000, 5000, 10000, 20000, 50000,
+    100000, 200000, 500000, 1000000,
+)
+
+_BUCKETS_NS = tuple(bound * 1000 for bound in LATENCY_BUCKETS_US)
+
+_SAMPLES = 4096  # Values kept by OHandSamples for its percentiles
+
+
+class _Histogram:
+    __slots__ = ("count", "sum_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(_BUCKETS_NS) + 1)
+
+    def add(self, latency_ns):
+        self.count += 1
+        self.sum_ns += latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+        self.buckets[bisect.bisect_left(_BUCKETS_NS, latency_ns)] += 1
+
+    def percentile_us(self, q):
+        """Upper bound of the bucket holding quantile q, the maximum for the last bucket"""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return LATENCY_BUCKETS_US[i] if i < len(LATENCY_BUCKETS_US) else self.max_ns / 1000
+        return 0
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_us": self.sum_ns / self.count / 1000 if self.count else 0,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile_us(0.50),
+            "p99_us": self.percentile_us(0.99),
+            "buckets": list(self.buckets),
+        }
+
+
+class OHandSamples:
+    """Ring of the last _SAMPLES durations in ns, summarized as exact p50/p99 and the maximum over all values"""
+
+    __slots__ = ("values", "index", "count", "max")
+
+    def __init__(self):
+        self.values = [0] * _SAMPLES
+        self.index = 0
+        self.count = 0
+        self.max = 0  # Over all values
+
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % _SAMPLES
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def summary(self):
+        values = sorted(self.values[: min(self.count, _SAMPLES)])
+        if not values:
+            return {"p50_us": 0, "p99_us": 0, "max_us": 0}
+        return {
+            "p50_us": values[len(values) // 2] / 1000,
+            "p99_us": values[min(len(values) - 1, int(0.99 * len(values)))] / 1000,
+            "max_us": self.max / 1000,
+        }
+
+
+class OHandStats:
+    """
+    Command instrumentation of OHandSerialAPI, see enable_stats(): latency histograms per (hand_id, cmd) with
+    fixed buckets (LATENCY_BUCKETS_US), counts of every return code and bytes on the wire.
+    Latency runs from handing the request to send_data_impl to HAND_GetResponse returning, measured with
+    time.perf_counter_ns(). Timeouts are counted, but kept out of the histograms.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._latency = {}  # {(hand_id, cmd): _Histogram}
+            self._results = {}  # {return code: count}
+            self._rejected = 0  # Responses received, but failing validation of their payload
+            self._frames_sent = 0
+            self._bytes_sent = 0
+            self._bytes_received = 0
+
+    def on_send(self, size):
+        with self._lock:
+            self._frames_sent += 1
+            self._bytes_sent += size
+
+    def on_receive(self, size):
+        with self._lock:
+            self._bytes_received += size
+
+    def on_result(self, hand_id, cmd, err, latency_ns=None):
+        """Count err as result of cmd, add latency_ns to its histogram if known and a response arrived"""
+        with self._lock:
+            self._results[err] = self._results.get(err, 0) + 1
+            if latency_ns is not None and err != HAND_RESP_TIMEOUT:
+                histogram = self._latency.get((hand_id, cmd))
+                if histogram is None:
+                    histogram = self._latency[(hand_id, cmd)] = _Histogram()
+                histogram.add(latency_ns)
+
+    def on_rejected(self):
+        with self._lock:
+            self._rejected += 1
+
+    def get_stats(self):
+        """Return a snapshot of all counters, latency is {(hand_id, cmd): histogram summary}"""
+        with self._lock:
+            return {
+                "frames_sent": self._frames_sent,
+                "bytes_sent": self._bytes_sent,
+                "bytes_received": self._bytes_received,
+                "results": dict(self._results),
+                "rejected": self._rejected,
+                "latency": {key: histogram.snapshot() for key, histogram in self._latency.items()},
+                "latency_buckets_us": LATENCY_BUCKETS_US,
+            }
@@ -0,0 +1,165 @@
+import struct
+import time
+from collections import deque
+
+from .codec import HAND_CMD_CODECS
+from .constants import *
+from .custom import encode_custom
+
+__all__ = [
+    'OHandStream',
+]
+
+
+class _StreamAck:
+    """Pending acknowledgement of a streamed command, completed by the receive path like OHandRequest"""
+
+    __slots__ = ("hand_id", "cmd", "sent_ns", "deadline", "done", "done_ns", "_stream")
+
+    def __init__(self, stream, hand_id, cmd, sent_ns, deadline):
+        self.hand_id = hand_id
+        self.cmd = cmd
+        self.sent_ns = sent_ns
+        self.deadline = deadline  # perf_counter_ns() after which the ack counts as missing
+        self.done = False
+        self.done_ns = None  # perf_counter_ns() when the ack arrived
+        self._stream = stream
+
+    def _complete(self, frame, tick):
+        self.done_ns = time.perf_counter_ns()
+        self.done = True
+        self._stream._on_ack(self, frame)
+
+
+class OHandStream:
+    """
+    Fire-and-forget setpoints to one hand: commands are written without waiting for their acknowledgements,
+    which are matched in the background and only counted, see get_stats(). The setpoint rate is then limited
+    by the wire instead of round trips.
+
+    Acks are drained by the reader thread (HAND_StartReader()), the event loop of AsyncOHandSerialAPI, or
+    otherwise by every call of the stream without blocking. Acks not received within ack_timeout ms (default:
+    command timeout) count as missing. Do not wait for responses of the streamed commands with blocking calls
+    at the same time, the stream would take them.
+    """
+
+    def __init__(self, api, hand_id, ack_timeout=None):
+        self._api = api
+        self.hand_id = hand_id
+        self.ack_timeout = ack_timeout
+        self._buf = bytearray(MAX_PROTOCOL_DATA_SIZE)
+        self._in_flight = deque()  # _StreamAck, oldest first
+        self.sent = 0
+        self.acked = 0
+        self.missing = 0
+        self.errors = {}  # {device error code or ERR_PROTOCOL_WRONG_LRC: count}
+
+    def send(self, cmd, args=()):
+        """Send cmd with args packed by its layout in codec.HAND_CMD_CODECS, return HAND_RESP_*"""
+        try:
+            layout = HAND_CMD_CODECS[cmd].request.get(args)
+            layout.pack_into(self._buf, 0, *args)
+        except (struct.error, TypeError, IndexError):
+            return HAND_RESP_DATA_INVALID
+        return self._send(cmd, self._buf, layout.size)
+
+    def set_finger_pos_all(self, pos, speed):
+        """HAND_SetFingerPosAll() without waiting, one pos and speed per motor"""
+        return self._send_all(HAND_CMD_SET_FINGER_POS_ALL, pos, speed)
+
+    def set_finger_angle_all(self, angle, speed):
+        """HAND_SetFingerAngleAll() without waiting, one angle and speed per motor"""
+        return self._send_all(HAND_CMD_SET_FINGER_ANGLE_ALL, angle, speed)
+
+    def set_custom(self, speed=None, pos=None, angle=None):
+        """HAND_CMD_SET_CUSTOM without waiting, see custom.encode_custom(), nothing is read back"""
+        try:
+            data = encode_custom(speed, pos, angle)
+        except (OverflowError, ValueError, TypeError):
+            return HAND_RESP_DATA_INVALID
+        return self._send(HAND_CMD_SET_CUSTOM, data, len(data))
+
+    def _send_all(self, cmd, values, speed):
+        if len(values) != len(speed) or len(values) > MAX_MOTOR_CNT:
+            return HAND_RESP_DATA_INVALID
+        args = [0] * (2 * len(values))
+        args[0::2] = values
+        args[1::2] = speed
+        return self.send(cmd, args)
+
+    def _send(self, cmd, data, nb_data):
+        api = self._api
+        self.poll()
+
+        ack_timeout = api.timeout if self.ack_timeout is None else self.ack_timeout
+        now = time.perf_counter_ns()
+        ack = _StreamAck(self, self.hand_id, cmd, now, now + int(ack_timeout * 1e6))
+        err = api._send_request(ack, data, nb_data)
+        if err == HAND_RESP_SUCCESS:
+            self.sent += 1
+            self._in_flight.append(ack)
+        return err
+
+    def _on_ack(self, ack, frame):
+        # Called by the receive path with the frame queue lock held
+        byte_count = frame[3]
+        lrc = 0
+        for byte in frame[: byte_count + 4]:
+            lrc ^= byte
+        if lrc != frame[byte_count + 4]:
+            err = ERR_PROTOCOL_WRONG_LRC
+        elif frame[2] & CMD_ERROR_MASK:
+            err = frame[4] if byte_count else HAND_RESP_HAND_ERROR
+        else:
+            self.acked += 1
+            err = None
+
+        if err is not None:
+            self.errors[err] = self.errors.get(err, 0) + 1
+
+        stats = self._api._stats
+        if stats is not None:
+            result = HAND_RESP_SUCCESS if err is None else HAND_RESP_HAND_ERROR
+            stats.on_result(ack.hand_id, ack.cmd, result, time.perf_counter_ns() - ack.sent_ns)
+
+    def poll(self):
+        """Receive available acks unless the API has a reader, count expired ones as missing"""
+        api = self._api
+        api._poll_transport(0)
+
+        in_flight = self._in_flight
+        now = time.perf_counter_ns()
+        while in_flight and (in_flight[0].done or in_flight[0].deadline < now):
+            ack = in_flight.popleft()
+            if not ack.done:
+                with api._rx_lock:
+                    api._cancel_request(ack)
+                    if ack.done:
+                        continue  # Completed meanwhile
+                self.missing += 1
+                if api._stats is not None:
+                    api._stats.on_result(ack.hand_id, ack.cmd, HAND_RESP_TIMEOUT)
+
+    def drain(self, time_out=None):
+        """Wait up to time_out ms (default: ack timeout) for all acks, return the number still in flight"""
+        api = self._api
+        if time_out is None:
+            time_out = api.timeout if self.ack_timeout is None else self.ack_timeout
+        deadline = time.perf_counter_ns() + int(time_out * 1e6)
+
+        while True:
+            self.poll()
+            if not self._in_flight or time.perf_counter_ns() >= deadline:
+                return len(self._in_flight)
+            remaining = (deadline - time.perf_counter_ns()) / 1e6
+            if not api._poll_transport(min(remaining, POLL_INTERVAL)):
+                time.sleep(min(remaining, POLL_INTERVAL) / 1000.0)  # Another thread receives
+
+    def get_stats(self):
+        return {
+            "sent": self.sent,
+            "acked": self.acked,
+            "missing": self.missing,
+            "errors": dict(self.errors),
+            "in_flight": len(self._in_flight),
+        }
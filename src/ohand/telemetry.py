@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+
+from .constants import *
+from .custom import custom_dtype
+from .shm import OHandShmBlock
+
+__all__ = [
+    'OHandTelemetryPublisher',
+    'OHandTelemetryReader',
+]
+
+
+def _telemetry_dtype(hand_cnt, motor_cnt, get):
+    # One row per hand: hand id, HAND_RESP_* of its last poll, time.monotonic_ns() of its last successful poll,
+    # then one (hand_cnt, motor_cnt) array per requested GET block, named like the fields of custom.decode_custom()
+    fields = [("hand_id", "u1", (hand_cnt,)), ("err", "u1", (hand_cnt,)), ("stamp_ns", "<u8", (hand_cnt,))]
+    for name in custom_dtype(get, motor_cnt).names:
+        dtype = custom_dtype(get, motor_cnt)[name].base
+        fields.append((name, dtype, (hand_cnt, motor_cnt)))
+    return np.dtype(fields)
+
+
+class OHandTelemetryPublisher:
+    """
+    Polls hands once and publishes their state in a named shared memory segment, so any number of local
+    processes (logger, UI, safety monitor, planner) read it with OHandTelemetryReader without touching the bus.
+
+    Each hand is polled with one HAND_CMD_SET_CUSTOM frame without SET blocks, which reads the get blocks
+    (SUB_CMD_GET_POS, SUB_CMD_GET_CURRENT, ... , default positions, currents and forces) of all motors in one
+    transaction, instead of HAND_GetFingerPosAll() plus a HAND_GetFingerCurrent() per finger.
+
+    poll() polls all hands and publishes one record, call it from a loop or as io function of
+    OHandCyclicExecutor. The segment is removed by close(). A segment left by a publisher which crashed is
+    replaced, while its publisher runs, a second one raises FileExistsError and needs another name.
+    """
+
+    def __init__(self, api, hand_ids, name=TELEMETRY_SHM_NAME, motor_cnt=MAX_MOTOR_CNT,
+                 get=SUB_CMD_GET_POS | SUB_CMD_GET_CURRENT | SUB_CMD_GET_FORCE):
+        self._api = api
+        self.hand_ids = list(hand_ids)
+        self.motor_cnt = motor_cnt
+        self.get = get
+        self._block = OHandShmBlock(_telemetry_dtype(len(self.hand_ids), motor_cnt, get), name, create=True)
+        self._record = np.zeros((), self._block.dtype)  # Next record, published as a whole
+        self._record["hand_id"] = self.hand_ids
+        self._record["err"] = HAND_RESP_TIMEOUT  # Not polled yet
+        self._fields = self._block.dtype.names[3:]
+        self._block.write(self._record)
+
+    @property
+    def name(self):
+        return self._block.name
+
+    def poll(self):
+        """Poll all hands and publish the result, return HAND_RESP_SUCCESS or the error of the last failing hand"""
+        result = HAND_RESP_SUCCESS
+        record = self._record
+        for i, hand_id in enumerate(self.hand_ids):
+            err, values = self._api.set_custom(hand_id, get=self.get)
+            if err == HAND_RESP_SUCCESS and len(values[self._fields[0]]) != self.motor_cnt:
+                err = HAND_RESP_DATA_INVALID  # Other motor count than the layout
+            record["err"][i] = err
+            if err != HAND_RESP_SUCCESS:
+                result = err
+                continue  # Values of the last successful poll are kept
+            record["stamp_ns"][i] = time.monotonic_ns()
+            for field in self._fields:
+                record[field][i] = values[field]
+        self._block.write(record)
+        return result
+
+    def close(self):
+        """Remove the segment, readers keep their mapping until they close"""
+        self._block.close()
+
+
+class OHandTelemetryReader:
+    """
+    Maps the segment of an OHandTelemetryPublisher. read() copies a consistent snapshot of all hands (a record
+    with the fields hand_id, err, stamp_ns and one (hand, motor) array per polled quantity, e.g. 'pos'),
+    view() gives zero-copy access to the live record.
+    """
+
+    def __init__(self, name=TELEMETRY_SHM_NAME):
+        self._block = OHandShmBlock(name=name)
+        self.dtype = self._block.dtype
+        self.hand_ids = self._block.view()["hand_id"].tolist()
+        self._last_version = None
+
+    @property
+    def version(self):
+        """Records published so far"""
+        return self._block.version
+
+    def index(self, hand_id):
+        """Row of hand_id in the arrays of the record"""
+        return self.hand_ids.index(hand_id)
+
+    def read(self, out=None):
+        """
+        Return (version, record), a consistent copy of the latest record into out or a new one. TimeoutError if
+        the publisher died in the middle of a write, see OHandShmBlock.read().
+        """
+        return self._block.read(out)
+
+    def view(self):
+        """Return the live record in shared memory, read-only and not consistent while being written"""
+        return self._block.view()
+
+    def wait(self, time_out=None, out=None):
+        """
+        Wait up to time_out ms (None: forever) for a record newer than the one last returned by wait(), return
+        (version, record) or (version, None) on timeout.
+        """
+        deadline = None if time_out is None else time.monotonic_ns() + int(time_out * 1e6)
+        while True:
+            version = self._block.version
+            if version != self._last_version:
+                version, record = self._block.read(out)
+                self._last_version = version
+                return version, record
+            if deadline is not None and time.monotonic_ns() >= deadline:
+                return version, None
+            time.sleep(POLL_INTERVAL / 1000.0)
+
+    def close(self):
+        """Unmap the segment, views returned by view() must be released before"""
+        self._block.close()
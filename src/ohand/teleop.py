@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+
+from .constants import *
+from .cyclic import OHandCyclicExecutor
+from .setpoint import OHandSetpoints
+
+__all__ = [
+    'OHandTeleop',
+]
+
+
+class OHandTeleop:
+    """
+    Glove-to-hand teleoperation pipeline, the input and output stages run at their own rates.
+
+    Input: push() takes every EMG batch (samples x channels) at the rate of the sensor, e.g. from the loop
+    receiving the BLE notifications of a glove. The samples of channels (one channel per motor) are appended to a
+    ring buffer of capacity samples, none is dropped. Each batch then updates the targets: mean of the last
+    window samples per motor, smoothed exponentially with alpha, mapped linearly from emg_min..emg_max to
+    positions 65535..0 and published to an OHandSetpoints mailbox, latest wins.
+
+    Output: start() sends the latest targets at rate_hz from an OHandCyclicExecutor thread, with cmd at speed,
+    filtered by deadband and keep_alive_ms, see OHandSetpoints. The hand is read by the API's reader thread
+    (HAND_StartReader()) or the output stage.
+
+    Latency: push() stamps the targets with the notification time of their batch (stamp_ns, default: when
+    pushed), get_stats() reports the time until the hand acknowledged them.
+
+    Without emg_min and emg_max, batches are buffered but no targets published until calibrated, see
+    start_calibration().
+    """
+
+    def __init__(self, api, hand_id, channels, rate_hz=100.0, cmd=HAND_CMD_SET_CUSTOM, speed=None, emg_min=None,
+                 emg_max=None, window=8, alpha=0.25, capacity=4096, deadband=0, keep_alive_ms=None, max_in_flight=1):
+        self.hand_id = hand_id
+        self.channels = list(channels)
+        self.motor_cnt = len(self.channels)
+        self.window = min(window, capacity)
+        self.alpha = alpha
+        self.setpoints = OHandSetpoints(api, hand_id, self.motor_cnt, cmd, speed=speed, max_in_flight=max_in_flight,
+                                        deadband=deadband, keep_alive_ms=keep_alive_ms)
+        self._executor = OHandCyclicExecutor(rate_hz, lambda cycle: None, io=[self.setpoints.flush])
+        self._lock = threading.Lock()  # Guards the input state against calibration and get_stats()
+        self._ring = np.zeros((capacity, self.motor_cnt))
+        self._head = 0  # Next row of the ring
+        self._value = None  # Smoothed EMG per motor
+        self._emg_min = None
+        self._emg_max = None
+        self._calibrating = False
+        if emg_min is not None and emg_max is not None:
+            self.set_calibration(emg_min, emg_max)
+        self.batches = 0  # Batches pushed
+        self.samples = 0  # Samples pushed
+        self.published = 0  # Targets published to the output stage
+
+    def set_calibration(self, emg_min, emg_max):
+        """Map emg_min to position 65535 and emg_max to 0, one value per motor"""
+        emg_min = np.asarray(emg_min, dtype=np.float64)
+        emg_max = np.asarray(emg_max, dtype=np.float64)
+        if emg_min.shape != (self.motor_cnt,) or emg_max.shape != (self.motor_cnt,) or np.any(emg_min >= emg_max):
+            raise ValueError("emg_min and emg_max must be one value per motor with emg_min < emg_max")
+        with self._lock:
+            self._emg_min, self._emg_max = emg_min, emg_max
+            self._calibrating = False
+
+    def start_calibration(self):
+        """Record the range of the filtered EMG instead of publishing targets, e.g. while opening and closing the hand"""
+        with self._lock:
+            self._emg_min = np.full(self.motor_cnt, np.inf)
+            self._emg_max = np.full(self.motor_cnt, -np.inf)
+            self._calibrating = True
+
+    def finish_calibration(self):
+        """Use the range recorded since start_calibration(), return (valid, emg_min, emg_max)"""
+        with self._lock:
+            self._calibrating = False
+            emg_min, emg_max = self._emg_min, self._emg_max
+            valid = emg_min is not None and bool(np.all(emg_min < emg_max))
+            if not valid:
+                self._emg_min = self._emg_max = None  # Nothing published until calibrated
+        return valid, emg_min, emg_max
+
+    def push(self, batch, stamp_ns=None):
+        """Ingest one EMG batch (samples x channels) received at stamp_ns, perf_counter_ns() of its notification"""
+        if stamp_ns is None:
+            stamp_ns = time.perf_counter_ns()
+        samples = np.asarray(batch)[:, self.channels]
+        ring = self._ring
+        capacity = len(ring)
+        n = len(samples)
+        if n == 0:
+            return
+
+        with self._lock:
+            if n > capacity:
+                samples = samples[-capacity:]
+            rows = (self._head + np.arange(len(samples))) % capacity
+            ring[rows] = samples
+            self._head = (self._head + len(samples)) % capacity
+            self.batches += 1
+            self.samples += n
+
+            window = min(self.window, self.samples)
+            mean = ring[(self._head - window + np.arange(window)) % capacity].mean(axis=0)
+            if self._value is None:
+                self._value = mean
+            else:
+                self._value = self._value + self.alpha * (mean - self._value)
+
+            if self._calibrating:
+                np.minimum(self._emg_min, self._value, out=self._emg_min)
+                np.maximum(self._emg_max, self._value, out=self._emg_max)
+                return
+            if self._emg_min is None:
+                return
+            pos = 65535 - (self._value - self._emg_min) / (self._emg_max - self._emg_min) * 65535
+            self.published += 1
+
+        self.setpoints.set_finger_pos_all(np.clip(np.rint(pos), 0, 65535).astype(int).tolist(), stamp_ns=stamp_ns)
+
+    def recent(self, count=None):
+        """Return a copy of the last count samples (default: all buffered) of the ring, oldest first"""
+        with self._lock:
+            count = min(self.samples, len(self._ring)) if count is None else min(count, self.samples, len(self._ring))
+            return self._ring[(self._head - count + np.arange(count)) % len(self._ring)]
+
+    def start(self):
+        """Start the output stage"""
+        self._executor.start()
+
+    def stop(self, time_out=None):
+        """Stop the output stage and wait up to time_out ms (default: ack timeout) for outstanding acks"""
+        self._executor.stop()
+        self.setpoints.stream.drain(time_out)
+
+    def get_stats(self):
+        """Return input counters, with those of the setpoints under 'output' and the executor under 'cycle'"""
+        with self._lock:
+            stats = {"batches": self.batches, "samples": self.samples, "published": self.published}
+        stats["output"] = self.setpoints.get_stats()
+        stats["cycle"] = self._executor.get_stats()
+        return stats
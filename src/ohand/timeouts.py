@@ -0,0 +1,87 @@
+import threading
+from collections import deque
+
+from .constants import *
+
+__all__ = [
+    'OHandTimeouts',
+]
+
+
+class _RttWindow:
+    __slots__ = ("samples", "timeout", "backoff")
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)  # Recent round trip times in ms
+        self.timeout = None  # Learned timeout in ms, None until enough samples
+        self.backoff = 0  # Consecutive timeouts, each doubles the timeout
+
+
+class OHandTimeouts:
+    """
+    Adaptive response timeouts per (hand_id, cmd), see OHandSerialAPI.enable_adaptive_timeout().
+    The timeout is the percentile of the last window round trip times times multiplier, clamped to
+    [floor, ceiling] ms. Until min_samples responses arrived the command timeout is used. Each timeout in a row
+    doubles the timeout of the command up to ceiling, so slow commands like HAND_CMD_CALIBRATE grow theirs,
+    the next response resets it.
+    """
+
+    def __init__(self, percentile=0.99, multiplier=2.0, floor=2.0, ceiling=2000.0, window=32, min_samples=8):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.window = window
+        self.min_samples = min_samples
+        self._entries = {}  # {(hand_id, cmd): _RttWindow}
+        self._lock = threading.Lock()
+
+    def get(self, hand_id, cmd, default):
+        """Return the timeout in ms of cmd to hand_id, default while not learned yet"""
+        entry = self._entries.get((hand_id, cmd))
+        if entry is None:
+            return default
+
+        timeout = default if entry.timeout is None else entry.timeout
+        if entry.backoff:
+            timeout = min(timeout * (1 << entry.backoff), max(self.ceiling, default))
+        return timeout
+
+    def on_result(self, hand_id, cmd, err, rtt_ms):
+        """Learn from the result of a request, rtt_ms is None if the time it was sent is unknown"""
+        if err != HAND_RESP_TIMEOUT and rtt_ms is None:
+            return
+
+        with self._lock:
+            entry = self._entries.get((hand_id, cmd))
+            if entry is None:
+                entry = self._entries[(hand_id, cmd)] = _RttWindow(self.window)
+
+            if err == HAND_RESP_TIMEOUT:
+                if entry.backoff < 16:
+                    entry.backoff += 1
+                return
+
+            entry.backoff = 0
+            samples = entry.samples
+            samples.append(rtt_ms)
+            if len(samples) >= self.min_samples:
+                ordered = sorted(samples)
+                rtt = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+                entry.timeout = min(max(rtt * self.multiplier, self.floor), self.ceiling)
+
+    def clear(self, hand_id=None):
+        """Forget what was learned about hand_id, all hands if None"""
+        with self._lock:
+            if hand_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == hand_id]:
+                    del self._entries[key]
+
+    def get_timeouts(self):
+        """Return {(hand_id, cmd): (timeout in ms or None if not learned, samples, consecutive timeouts)}"""
+        with self._lock:
+            return {
+                key: (entry.timeout, len(entry.samples), entry.backoff) for key, entry in self._entries.items()
+            }
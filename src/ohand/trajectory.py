@@ -0,0 +1,221 @@
+import threading
+
+import numpy as np
+
+from .constants import *
+from .cyclic import OHandCyclicExecutor
+
+__all__ = [
+    'interpolate_trajectory',
+    'OHandTrajectory',
+]
+
+
+def _cubic_moments(times, positions):
+    # Second derivatives at the knots of the cubic spline with zero velocity at both ends, tridiagonal system
+    # solved with the Thomas algorithm, vectorized over motors
+    n = len(times)
+    h = np.diff(times)[:, None]
+    slope = np.diff(positions, axis=0) / h
+    lower = np.zeros((n, 1))
+    diag = np.empty((n, 1))
+    upper = np.zeros((n, 1))
+    rhs = np.empty_like(positions)
+    diag[0], upper[0], rhs[0] = 2 * h[0], h[0], 6 * slope[0]
+    diag[-1], lower[-1], rhs[-1] = 2 * h[-1], h[-1], -6 * slope[-1]
+    lower[1:-1], upper[1:-1] = h[:-1], h[1:]
+    diag[1:-1] = 2 * (h[:-1] + h[1:])
+    rhs[1:-1] = 6 * (slope[1:] - slope[:-1])
+
+    for i in range(1, n):
+        w = lower[i] / diag[i - 1]
+        diag[i] = diag[i] - w * upper[i - 1]
+        rhs[i] = rhs[i] - w * rhs[i - 1]
+    moments = np.empty_like(positions)
+    moments[-1] = rhs[-1] / diag[-1]
+    for i in range(n - 2, -1, -1):
+        moments[i] = (rhs[i] - upper[i] * moments[i + 1]) / diag[i]
+    return moments
+
+
+def interpolate_trajectory(times, positions, rate_hz, method=TRAJECTORY_MIN_JERK):
+    """
+    Sample the trajectory through positions (waypoints x motors) at times (seconds, increasing) at rate_hz.
+    method: TRAJECTORY_MIN_JERK or TRAJECTORY_CUBIC. Return (sample_times, samples), sample_times in seconds from
+    times[0], samples as uint16 (samples x motors), the last sample is the last waypoint.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    if positions.ndim != 2 or len(times) != len(positions) or len(times) == 0:
+        raise ValueError("positions must be waypoints x motors with one time per waypoint")
+    if np.any(np.diff(times) <= 0):
+        raise ValueError("times must be increasing")
+
+    duration = times[-1] - times[0]
+    count = int(np.floor(duration * rate_hz + 1e-9)) + 1
+    sample_times = np.arange(count) / rate_hz
+    if sample_times[-1] < duration:
+        sample_times = np.append(sample_times, duration)
+
+    if len(times) == 1:
+        samples = np.repeat(positions, len(sample_times), axis=0)
+    else:
+        t = sample_times + times[0]
+        segment = np.clip(np.searchsorted(times, t, side="right") - 1, 0, len(times) - 2)
+        t0, t1 = times[segment][:, None], times[segment + 1][:, None]
+        p0, p1 = positions[segment], positions[segment + 1]
+        tau = (t[:, None] - t0) / (t1 - t0)
+        if method == TRAJECTORY_MIN_JERK:
+            samples = p0 + (p1 - p0) * (tau**3 * (10 - 15 * tau + 6 * tau**2))
+        elif method == TRAJECTORY_CUBIC:
+            moments = _cubic_moments(times, positions)
+            m0, m1 = moments[segment], moments[segment + 1]
+            h = t1 - t0
+            a, b = t1 - t[:, None], t[:, None] - t0
+            samples = (m0 * a**3 + m1 * b**3) / (6 * h) + (p0 / h - m0 * h / 6) * a + (p1 / h - m1 * h / 6) * b
+        else:
+            raise ValueError("method must be TRAJECTORY_MIN_JERK or TRAJECTORY_CUBIC")
+
+    return sample_times, np.clip(np.rint(samples), 0, 65535).astype(np.uint16)
+
+
+class OHandTrajectory:
+    """
+    Streams a trajectory to one hand: the waypoints are interpolated once with interpolate_trajectory(), the
+    samples are then sent at rate_hz by an OHandCyclicExecutor, with HAND_CMD_SET_CUSTOM (default) or
+    HAND_CMD_SET_FINGER_POS_ALL at speed (default: maximum, the samples are close enough to be followed directly).
+
+    Samples are taken by deadline: the sample of a cycle is that of its time since start, samples of cycles
+    missed after an overrun are skipped so the motion stays on schedule. pause() holds the last sample sent,
+    resume() continues from there.
+
+    Tracking error: with HAND_CMD_SET_CUSTOM the current positions are piggy-backed on each sample's response
+    (SUB_CMD_GET_POS), with HAND_CMD_SET_FINGER_POS_ALL they are read with HAND_GetFingerPosAll() every
+    feedback_divider samples. feedback_divider=0 disables reading positions.
+    """
+
+    def __init__(self, api, hand_id, times, positions, rate_hz=50.0, method=TRAJECTORY_MIN_JERK,
+                 cmd=HAND_CMD_SET_CUSTOM, speed=None, feedback_divider=1, spin_us=0):
+        if cmd not in (HAND_CMD_SET_FINGER_POS_ALL, HAND_CMD_SET_CUSTOM):
+            raise ValueError("cmd must be HAND_CMD_SET_FINGER_POS_ALL or HAND_CMD_SET_CUSTOM")
+
+        self._api = api
+        self.hand_id = hand_id
+        self.cmd = cmd
+        self.feedback_divider = feedback_divider
+        self.sample_times, self.samples = interpolate_trajectory(times, positions, rate_hz, method)
+        self.motor_cnt = self.samples.shape[1]
+        if speed is None and cmd == HAND_CMD_SET_FINGER_POS_ALL:
+            speed = 255
+        self.speed = None if speed is None else [speed] * self.motor_cnt if np.isscalar(speed) else list(speed)
+        self.actual = np.full(self.samples.shape, np.nan)  # Positions read after sending each sample
+        self._samples = self.samples.tolist()
+        self._executor = OHandCyclicExecutor(rate_hz, self._cycle, spin_us=spin_us)
+        self._lock = threading.Lock()
+        self._base = None  # (cycle, sample index) the schedule counts from, None until started or resumed
+        self._index = 0  # Next sample
+        self._paused = False
+        self._aborted = False
+        self._finished = threading.Event()
+        self.sent = 0  # Samples sent
+        self.skipped = 0  # Samples skipped after overruns
+        self.errors = 0  # Samples or position reads failed
+
+    def run(self):
+        """Stream the trajectory in the calling thread until done or aborted"""
+        self._executor.run()
+        self._finished.set()
+
+    def start(self):
+        """Stream the trajectory in a background thread, see wait()"""
+        threading.Thread(target=self.run, name="OHandTrajectory", daemon=True).start()
+
+    def wait(self, time_out=None):
+        """Wait up to time_out seconds until the trajectory is done or aborted, return whether it is"""
+        return self._finished.wait(time_out)
+
+    def pause(self):
+        with self._lock:
+            self._paused = True
+
+    def resume(self):
+        with self._lock:
+            self._paused = False
+            self._base = None
+
+    def abort(self):
+        """Stop streaming, the hand holds the last sample sent"""
+        with self._lock:
+            self._aborted = True
+
+    def progress(self):
+        """Return (samples done, sample count)"""
+        with self._lock:
+            return self._index, len(self._samples)
+
+    def _cycle(self, cycle):
+        with self._lock:
+            if self._aborted:
+                self._executor.stop()
+                return
+            if self._paused:
+                return
+            if self._base is None:
+                self._base = (cycle, self._index)
+            index = self._base[1] + cycle - self._base[0]
+
+            count = len(self._samples)
+            if index >= count:
+                if self._index >= count:
+                    self._executor.stop()
+                    return
+                index = count - 1  # The last sample is always sent
+            self.skipped += index - self._index
+            self._index = index + 1
+        self._send(index)
+
+    def _send(self, index):
+        api = self._api
+        sample = self._samples[index]
+        read = self.feedback_divider and index % self.feedback_divider == 0
+        if self.cmd == HAND_CMD_SET_CUSTOM:
+            err, result = api.set_custom(self.hand_id, speed=self.speed, pos=sample, get=SUB_CMD_GET_POS if read else 0)
+            if err == HAND_RESP_SUCCESS and read:
+                self.actual[index] = result["pos"][: self.motor_cnt]
+        else:
+            err = api.HAND_SetFingerPosAll(self.hand_id, sample, self.speed, self.motor_cnt, [])
+            if err == HAND_RESP_SUCCESS and read:
+                current, cnt = [0] * self.motor_cnt, [self.motor_cnt]
+                err = api.HAND_GetFingerPosAll(self.hand_id, [], current, cnt, [])
+                err = err if isinstance(err, int) else err[0]  # A bare error code on HAND_RESP_DATA_SIZE_TOO_BIG
+                if err == HAND_RESP_SUCCESS:
+                    self.actual[index, : cnt[0]] = current[: cnt[0]]
+
+        if err == HAND_RESP_SUCCESS:
+            self.sent += 1
+        else:
+            self.errors += 1
+
+    def get_tracking(self):
+        """Return (sample_times, commanded samples, positions read after each sample, NaN where not read)"""
+        return self.sample_times, self.samples, self.actual
+
+    def get_stats(self):
+        """Return sample counters, tracking error per motor and the deadline statistics of the executor"""
+        error = self.actual - self.samples
+        read = ~np.isnan(error[:, 0])
+        if read.any():
+            tracking = {
+                "rms": np.sqrt(np.mean(error[read] ** 2, axis=0)).tolist(),
+                "max": np.max(np.abs(error[read]), axis=0).tolist(),
+            }
+        else:
+            tracking = None
+        return {
+            "samples": len(self._samples),
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "tracking_error": tracking,
+            "cycle": self._executor.get_stats(),
+        }
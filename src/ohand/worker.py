@@ -0,0 +1,328 @@
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+from .constants import *
+from .cyclic import OHandCyclicExecutor
+from .setpoint import OHandSetpoints
+from .shm import OHandShmBlock
+
+__all__ = [
+    'OHandWorker',
+]
+
+
+def _setpoint_dtype(motor_cnt):
+    # mask: fingers given a target, stamp_ns: time.monotonic_ns() of the last update
+    return np.dtype([("pos", "<u2", (motor_cnt,)), ("speed", "<u2", (motor_cnt,)), ("mask", "u1", (motor_cnt,)),
+                     ("stamp_ns", "<u8")])
+
+
+def _telemetry_dtype(motor_cnt):
+    # stamp_ns: time.monotonic_ns() of the response, motor_cnt: motors reported
+    return np.dtype([("err", "u1"), ("motor_cnt", "u1"), ("target_pos", "<u2", (motor_cnt,)),
+                     ("current_pos", "<u2", (motor_cnt,)), ("stamp_ns", "<u8")])
+
+
+class _WorkerHand:
+    """State of one hand in the worker process"""
+
+    def __init__(self, api, hand_id, motor_cnt, cmd, setpoint_name, telemetry_name):
+        self.hand_id = hand_id
+        self.setpoints = OHandSetpoints(api, hand_id, motor_cnt, cmd)
+        self.setpoint_block = OHandShmBlock(_setpoint_dtype(motor_cnt), setpoint_name)
+        self.telemetry_block = OHandShmBlock(_telemetry_dtype(motor_cnt), telemetry_name)
+        self.setpoint = np.empty((), self.setpoint_block.dtype)
+        self.version = 0  # Setpoint version taken over
+        self.telemetry_due = False  # Poll deferred until the setpoint frames are acknowledged
+        self.target = [0] * motor_cnt
+        self.current = [0] * motor_cnt
+        self.pickup_ms = 0.0  # Time from the last setpoint update to taking it over
+        self.max_pickup_ms = 0.0
+
+
+def _worker_main(factory, hands, config, conn):
+    """Entry of the worker process: open the hand with factory() and serve until stopped"""
+    rate_hz, motor_cnt, cmd, telemetry_divider = config
+    try:
+        api = factory()
+    except Exception as e:
+        print(f"Worker failed to open the hand: {e}")
+        api = None
+    if api is None or api.HAND_StartReader() != HAND_RESP_SUCCESS:
+        conn.send(HAND_RESP_INVALID_CONTEXT)
+        return
+
+    workers = [_WorkerHand(api, hand_id, motor_cnt, cmd, *names) for hand_id, names in hands]
+
+    def take_setpoints(cycle):
+        for hand in workers:
+            block = hand.setpoint_block
+            if block.version == hand.version:
+                continue
+            try:
+                hand.version, setpoint = block.read(hand.setpoint)
+            except TimeoutError as e:
+                print(f"Worker stops, setpoints of hand {hand.hand_id} unreadable: {e}")
+                executor.stop()
+                return
+            if not setpoint["stamp_ns"]:
+                continue  # Initial record without targets
+            hand.pickup_ms = (time.monotonic_ns() - int(setpoint["stamp_ns"])) / 1e6
+            hand.max_pickup_ms = max(hand.max_pickup_ms, hand.pickup_ms)
+            for finger_id in np.flatnonzero(setpoint["mask"]).tolist():
+                hand.setpoints.set_finger_pos(finger_id, int(setpoint["pos"][finger_id]),
+                                              int(setpoint["speed"][finger_id]))
+
+    telemetry_cycle = [0]
+
+    def read_telemetry():
+        telemetry_cycle[0] += 1
+        if telemetry_cycle[0] >= telemetry_divider:
+            telemetry_cycle[0] = 0
+            for hand in workers:
+                hand.telemetry_due = True
+
+        result = HAND_RESP_SUCCESS
+        for hand in workers:
+            if not hand.telemetry_due:
+                continue
+            # The blocking poll would queue behind an unacknowledged setpoint frame, wait for its ack
+            stream = hand.setpoints.stream
+            stream.poll()
+            if stream._in_flight:
+                continue
+            hand.telemetry_due = False
+            cnt = [motor_cnt]
+            err = api.HAND_GetFingerPosAll(hand.hand_id, hand.target, hand.current, cnt, [])
+            err = err if isinstance(err, int) else err[0]  # A bare error code on HAND_RESP_DATA_SIZE_TOO_BIG
+            if err == HAND_RESP_SUCCESS:
+                hand.telemetry_block.write(err=err, motor_cnt=cnt[0], target_pos=hand.target,
+                                           current_pos=hand.current, stamp_ns=time.monotonic_ns())
+            else:
+                hand.telemetry_block.write(err=err)
+                result = err
+        return result
+
+    # Polled before the setpoints are flushed, so that the frames of the previous cycle are acknowledged
+    io = [read_telemetry] + [hand.setpoints.flush for hand in workers]
+    executor = OHandCyclicExecutor(rate_hz, take_setpoints, io)
+
+    def get_stats():
+        return {
+            "cycle": executor.get_stats(),
+            "hands": {
+                hand.hand_id: dict(hand.setpoints.get_stats(), pickup_ms=hand.pickup_ms,
+                                   max_pickup_ms=hand.max_pickup_ms)
+                for hand in workers
+            },
+        }
+
+    def serve():
+        # HAND_* calls of the client, answered with the result and the arguments to copy out-parameters back
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                break  # Client gone
+            if request is None:
+                break
+
+            method, args = request
+            try:
+                if method == "get_stats":
+                    result = get_stats()
+                elif method.startswith("HAND_"):
+                    result = getattr(api, method)(*args)
+                else:
+                    result = HAND_RESP_DATA_INVALID
+            except Exception as e:
+                print(f"Worker call {method} failed: {e}")
+                result = HAND_RESP_DATA_INVALID
+            conn.send((result, args))
+        executor.stop()
+
+    threading.Thread(target=serve, name="OHandWorkerCalls", daemon=True).start()
+    conn.send(HAND_RESP_SUCCESS)
+    executor.run()
+
+    api.HAND_StopReader()
+    for hand in workers:
+        hand.setpoint_block.close()
+        hand.telemetry_block.close()
+    conn.close()
+
+
+class OHandWorker:
+    """
+    Runs the transport and control loop of hands in a dedicated child process, so their I/O timing doesn't
+    suffer from CPU- and GIL-heavy code in the application process.
+
+    factory() opens and configures the OHandSerialAPI in the child, it must be picklable, e.g. a module-level
+    function, as the child is spawned. Its loop runs at rate_hz: it takes over the setpoints of hands
+    (OHandSetpoints with cmd, latest wins) and polls their positions every telemetry_divider cycles, as soon as
+    their setpoint frames are acknowledged.
+
+    Setpoints and telemetry are exchanged through shared memory blocks (OHandShmBlock), without pickling or
+    pipes: set_finger_pos_all() / get_finger_pos_all() and their mirrors HAND_SetFingerPosAll() /
+    HAND_GetFingerPosAll() for the worker's hands return immediately. All other HAND_* calls are forwarded to
+    the child through a pipe and wait for its result, out-parameters are filled in like by OHandSerialAPI.
+    """
+
+    def __init__(self, factory, hands, rate_hz=100.0, motor_cnt=MAX_MOTOR_CNT, cmd=HAND_CMD_SET_FINGER_POS_ALL,
+                 telemetry_divider=1):
+        self.factory = factory
+        self.hand_ids = list(hands)
+        self.rate_hz = rate_hz
+        self.motor_cnt = motor_cnt
+        self.cmd = cmd
+        self.telemetry_divider = telemetry_divider
+        self._setpoints = {}  # {hand_id: OHandShmBlock}
+        self._setpoint_records = {}  # {hand_id: latest setpoint written}
+        self._setpoint_lock = threading.Lock()
+        self._telemetry = {}  # {hand_id: OHandShmBlock}
+        self._process = None
+        self._conn = None
+        self._call_lock = threading.Lock()  # One call on the pipe at a time
+
+    def start(self, time_out=5000):
+        """Spawn the worker process and wait up to time_out ms until it opened the hand, return HAND_RESP_*"""
+        if self._process is not None:
+            return HAND_RESP_SUCCESS
+
+        max_speed = 255 if self.cmd == HAND_CMD_SET_FINGER_POS_ALL else 65535
+        hands = []
+        for hand_id in self.hand_ids:
+            setpoint = self._setpoints[hand_id] = OHandShmBlock(_setpoint_dtype(self.motor_cnt))
+            record = self._setpoint_records[hand_id] = np.zeros((), setpoint.dtype)
+            record["speed"] = max_speed
+            setpoint.write(record)
+            telemetry = self._telemetry[hand_id] = OHandShmBlock(_telemetry_dtype(self.motor_cnt))
+            telemetry.write(err=HAND_RESP_TIMEOUT)
+            hands.append((hand_id, (setpoint.name, telemetry.name)))
+
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        config = (self.rate_hz, self.motor_cnt, self.cmd, self.telemetry_divider)
+        self._process = context.Process(target=_worker_main, args=(self.factory, hands, config, child_conn),
+                                        name="OHandWorker", daemon=True)
+        self._process.start()
+        child_conn.close()
+
+        err = HAND_RESP_TIMEOUT
+        try:
+            if self._conn.poll(time_out / 1000.0):
+                err = self._conn.recv()
+        except (EOFError, OSError):
+            err = HAND_RESP_INVALID_CONTEXT
+        if err != HAND_RESP_SUCCESS:
+            self.stop()
+        return err
+
+    def stop(self, time_out=2000):
+        """Stop the worker process and remove the shared memory blocks"""
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if conn is not None:
+            try:
+                with self._call_lock:
+                    conn.send(None)
+            except OSError:
+                pass
+        if process is not None:
+            process.join(time_out / 1000.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        if conn is not None:
+            conn.close()
+
+        for block in list(self._setpoints.values()) + list(self._telemetry.values()):
+            block.close()
+        self._setpoints.clear()
+        self._setpoint_records.clear()
+        self._telemetry.clear()
+
+    def set_finger_pos_all(self, hand_id, pos, speed=None):
+        """Set targets of the first len(pos) fingers, taken over by the next cycle of the worker"""
+        block = self._setpoints.get(hand_id)
+        if block is None or len(pos) > self.motor_cnt:
+            return HAND_RESP_DATA_INVALID
+        n = len(pos)
+        with self._setpoint_lock:
+            record = self._setpoint_records[hand_id]  # Latest setpoint written, only written by this process
+            record["pos"][:n] = pos
+            if speed is not None:
+                record["speed"][:n] = speed[:n]
+            record["mask"][:n] = 1
+            record["stamp_ns"] = time.monotonic_ns()
+            block.write(record)
+        return HAND_RESP_SUCCESS
+
+    def get_finger_pos_all(self, hand_id):
+        """
+        Return (err, target_pos, current_pos, age_ms) of the latest poll of the worker, age_ms is the time since its
+        response. err is HAND_RESP_TIMEOUT until the first poll and the error of the latest poll if it failed, the
+        positions are those of the last successful one.
+        """
+        block = self._telemetry.get(hand_id)
+        if block is None:
+            return HAND_RESP_DATA_INVALID, None, None, None
+        try:
+            _, record = block.read()
+        except TimeoutError:
+            return HAND_RESP_INVALID_CONTEXT, None, None, None  # Worker died in the middle of a write
+        cnt = int(record["motor_cnt"])
+        age_ms = (time.monotonic_ns() - int(record["stamp_ns"])) / 1e6 if record["stamp_ns"] else None
+        return (int(record["err"]), record["target_pos"][:cnt].tolist(), record["current_pos"][:cnt].tolist(),
+                age_ms)
+
+    def HAND_SetFingerPosAll(self, hand_id, pos, speed, motor_cnt, remote_err):
+        if hand_id not in self._setpoints:
+            return self._call("HAND_SetFingerPosAll", (hand_id, pos, speed, motor_cnt, remote_err))
+        if motor_cnt > self.motor_cnt or len(pos) < motor_cnt or len(speed) < motor_cnt:
+            return HAND_RESP_DATA_INVALID
+        return self.set_finger_pos_all(hand_id, pos[:motor_cnt], speed[:motor_cnt])
+
+    def HAND_GetFingerPosAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
+        if hand_id not in self._telemetry:
+            return self._call("HAND_GetFingerPosAll", (hand_id, target_pos, current_pos, motor_cnt, remote_err))
+        err, target, current, _ = self.get_finger_pos_all(hand_id)
+        if err == HAND_RESP_SUCCESS:
+            if motor_cnt[0] < len(target):
+                return HAND_RESP_DATA_SIZE_TOO_BIG
+            motor_cnt[0] = len(target)
+            if target_pos:
+                target_pos[: len(target)] = target
+            if current_pos:
+                current_pos[: len(current)] = current
+        return err, target_pos, current_pos
+
+    def get_stats(self):
+        """Return the cycle statistics of the worker loop and setpoint statistics per hand, None if not running"""
+        return self._call("get_stats", ())
+
+    def _call(self, method, args):
+        conn = self._conn
+        if conn is None:
+            return HAND_RESP_INVALID_CONTEXT if method != "get_stats" else None
+        try:
+            with self._call_lock:
+                conn.send((method, args))
+                result, ret_args = conn.recv()
+        except (EOFError, OSError):
+            return HAND_RESP_INVALID_CONTEXT if method != "get_stats" else None
+
+        # Copy out-parameters filled in by the worker back into those of the caller
+        for arg, ret_arg in zip(args, ret_args):
+            if isinstance(arg, (list, bytearray)):
+                arg[:] = ret_arg
+        return result
+
+    def __getattr__(self, name):
+        # HAND_* calls not served from shared memory are executed by the worker
+        if name.startswith("HAND_"):
+            return lambda *args: self._call(name, args)
+        raise AttributeError(name)